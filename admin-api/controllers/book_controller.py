@@ -1,12 +1,14 @@
-from typing import List
+from fastapi.responses import StreamingResponse
 
 from controllers.base_controller import BaseController
 from models.book_model import BookModel
 from models.borrowed_book_model import BorrowedBookModel
+from models.page_model import PageModel
 from service.meta.book_service_meta import BookServiceMeta
-from utils.decorator_utility import async_controller_exception_handler, controller_exception_handler
+from utils.decorator_utility import async_controller_exception_handler
 from utils.dependecy_resolver import ResolveDependency
 from utils.logger_utility import getlogger
+from utils.stream_utility import NDJSON_MEDIA_TYPE, to_ndjson
 
 
 class BookController(BaseController):
@@ -23,26 +25,40 @@ class BookController(BaseController):
         self._logger.info(f"Adding book with title {book.title}")
         return await self.service.add(book)
 
-    @controller_exception_handler
-    def get_book_by_id(self, id: int) -> BookModel:
+    @async_controller_exception_handler
+    async def get_book_by_id(self, id: int) -> BookModel:
         self._logger.info(f"Searching for book with id {id}")
-        return self.service.get_by_id(id)
+        return await self.service.get_by_id(id)
 
     @async_controller_exception_handler
     async def remove_book(self, id: int) -> BookModel:
         self._logger.info(f"Removing book with id {id}")
         return await self.service.remove_book(id)
 
-    @controller_exception_handler
-    def get_all_books(self) -> List[BookModel]:
+    @async_controller_exception_handler
+    async def get_all_books(
+        self, limit: int, cursor: str | None = None
+    ) -> PageModel[BookModel]:
         self._logger.info("Fetching all books")
-        return self.service.get_all()
+        return await self.service.get_all(limit, cursor)
 
-    @controller_exception_handler
-    def get_all_borrowed_books(self) -> List[BorrowedBookModel]:
+    @async_controller_exception_handler
+    async def get_all_borrowed_books(
+        self, limit: int, cursor: str | None = None
+    ) -> PageModel[BorrowedBookModel]:
         self._logger.info("Fetching all borrowed books")
-        return self.service.get_all_borrowed()
-    
-    def close(self) -> None:
-        self.service.close()
+        return await self.service.get_all_borrowed(limit, cursor)
 
+    @async_controller_exception_handler
+    async def stream_all_books(self) -> StreamingResponse:
+        self._logger.info("Streaming all books")
+        return StreamingResponse(
+            to_ndjson(self.service.stream_all()), media_type=NDJSON_MEDIA_TYPE
+        )
+
+    @async_controller_exception_handler
+    async def stream_all_borrowed_books(self) -> StreamingResponse:
+        self._logger.info("Streaming all borrowed books")
+        return StreamingResponse(
+            to_ndjson(self.service.stream_all_borrowed()), media_type=NDJSON_MEDIA_TYPE
+        )
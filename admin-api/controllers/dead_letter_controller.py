@@ -0,0 +1,28 @@
+from typing import List
+
+from controllers.base_controller import BaseController
+from models.dead_letter_model import DeadLetterModel
+from service.meta.dead_letter_service_meta import DeadLetterServiceMeta
+from utils.decorator_utility import async_controller_exception_handler
+from utils.dependecy_resolver import ResolveDependency
+from utils.logger_utility import getlogger
+
+
+class DeadLetterController(BaseController):
+
+    def __init__(
+        self,
+        service: DeadLetterServiceMeta = ResolveDependency(DeadLetterServiceMeta),
+    ) -> None:
+        super().__init__(getlogger("DeadLetterController"))
+        self.service = service
+
+    @async_controller_exception_handler
+    async def get_all_dead_letters(self, limit: int) -> List[DeadLetterModel]:
+        self._logger.info(f"Getting up to {limit} dead letters")
+        return await self.service.get_all(limit)
+
+    @async_controller_exception_handler
+    async def replay_dead_letters(self, limit: int) -> List[DeadLetterModel]:
+        self._logger.info(f"Replaying up to {limit} dead letters")
+        return await self.service.replay_all(limit)
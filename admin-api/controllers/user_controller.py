@@ -1,12 +1,14 @@
-from typing import List
+from fastapi.responses import StreamingResponse
 
 from controllers.base_controller import BaseController
 from models.user_books_model import UserBooksModel
+from models.page_model import PageModel
 from models.user_model import UserModel
 from service.meta.user_service_meta import UserServiceMeta
-from utils.decorator_utility import controller_exception_handler
+from utils.decorator_utility import async_controller_exception_handler
 from utils.dependecy_resolver import ResolveDependency
 from utils.logger_utility import getlogger
+from utils.stream_utility import NDJSON_MEDIA_TYPE, to_ndjson
 
 
 class UserController(BaseController):
@@ -18,23 +20,42 @@ class UserController(BaseController):
         super().__init__(getlogger("UserController"))
         self.service = service
 
-    @controller_exception_handler
-    def get_user_by_id(self, id: int) -> UserModel:
+    @async_controller_exception_handler
+    async def get_user_by_id(self, id: int) -> UserModel:
         self._logger.info(f"Fetching user with id {id}")
-        return self.service.get_by_id(id)
+        return await self.service.get_by_id(id)
 
-    @controller_exception_handler
-    def get_all_users(self) -> List[UserModel]:
+    @async_controller_exception_handler
+    async def get_all_users(
+        self, limit: int, cursor: str | None = None
+    ) -> PageModel[UserModel]:
         self._logger.info(f"Getting all users")
-        return self.service.get_all_users()
+        return await self.service.get_all_users(limit, cursor)
 
-    @controller_exception_handler
-    def get_all_users_with_books(self, include_returned: bool) -> List[UserBooksModel]:
+    @async_controller_exception_handler
+    async def get_all_users_with_books(
+        self,
+        include_returned: bool,
+        limit: int,
+        cursor: str | None = None,
+        user_id: int | None = None,
+    ) -> PageModel[UserBooksModel]:
         self._logger.info(f"Getting all users and their borrowed books")
         if include_returned:
             self._logger.info("Including returned books")
-            return self.service.get_all_users_books_including_returned()
-        return self.service.get_all_users_currently_borrowed_books()
-    
-    def close(self) -> None:
-        self.service.close()
+            return await self.service.get_all_users_books_including_returned(
+                limit, cursor, user_id
+            )
+        return await self.service.get_all_users_currently_borrowed_books(
+            limit, cursor, user_id
+        )
+
+    @async_controller_exception_handler
+    async def stream_all_users_with_books(
+        self, include_returned: bool, user_id: int | None = None
+    ) -> StreamingResponse:
+        self._logger.info(f"Streaming all users and their borrowed books")
+        return StreamingResponse(
+            to_ndjson(self.service.stream_users_with_books(include_returned, user_id)),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
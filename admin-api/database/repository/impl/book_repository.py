@@ -1,11 +1,14 @@
 from datetime import date
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List
 from database.repository.meta.book_repository_meta import BookRepositoryMeta
 from database.schema.book_schema import BookSchema
 from database.schema.borrow_entry_schema import BorrowEntrySchema
+from database.schema.database import unit_of_work
 from models.book_model import BookModel
 from models.borrowed_book_model import BorrowedBookModel
+from utils.constants import STREAM_BATCH_SIZE
 from utils.dependecy_resolver import ResolveDependency
 from utils.logger_utility import getlogger
 
@@ -14,27 +17,37 @@ class BookRepository(BookRepositoryMeta):
 
     _logger = getlogger(name="BookRepository")
 
-    def __init__(self, db: Session = ResolveDependency(Session)) -> None:
+    def __init__(self, db: AsyncSession = ResolveDependency(AsyncSession)) -> None:
         self.db = db
 
-    def save(self, book: BookSchema) -> BookModel:
-        self.db.add(book)
-        self.db.commit()
-        self.db.refresh(book)
-        return self.db.query(BookSchema).filter(BookSchema.title == book.title).first()
+    async def save(self, book: BookModel) -> BookModel:
+        result = await self.db.execute(
+            insert(BookSchema)
+            .values(book.model_dump(exclude_none=True))
+            .returning(*BookSchema.__table__.columns)
+        )
+        return BookModel.model_validate(result.one())
+
+    async def get_by_id(self, id: int) -> BookModel | None:
+        return await self.db.scalar(select(BookSchema).where(BookSchema.id == id))
 
-    def get_by_id(self, id: int) -> BookModel | None:
-        return self.db.query(BookSchema).filter(BookSchema.id == id).first()
+    async def get_by_title(self, title: str) -> BookModel:
+        return await self.db.scalar(select(BookSchema).where(BookSchema.title == title))
 
-    def get_by_title(self, title: str) -> BookModel:
-        return self.db.query(BookSchema).filter(BookSchema.title == title).first()
+    async def get_all_by_titles(self, titles: List[str]) -> List[BookModel]:
+        return (
+            await self.db.scalars(select(BookSchema).where(BookSchema.title.in_(titles)))
+        ).all()
 
-    def get_all_borrowed(self) -> List[BorrowedBookModel]:
-        result = (
-            self.db.query(BookSchema, BorrowEntrySchema)
+    async def get_all_borrowed(
+        self, limit: int, after_id: int = 0
+    ) -> List[BorrowedBookModel]:
+        result = await self.db.execute(
+            select(BookSchema, BorrowEntrySchema)
             .join(BorrowEntrySchema)
-            .filter(BorrowEntrySchema.is_returned == False)
-            .all()
+            .where(BorrowEntrySchema.is_returned == False, BookSchema.id > after_id)
+            .order_by(BookSchema.id)
+            .limit(limit)
         )
         return [
             BorrowedBookModel(
@@ -46,18 +59,17 @@ class BookRepository(BookRepositoryMeta):
                 return_date=borrow_entry.return_date,
                 is_returned=borrow_entry.is_returned
             )
-            for book, borrow_entry in result
+            for book, borrow_entry in result.all()
         ]
 
-    def get_all_due(self) -> List[BookModel]:
-        result = (
-            self.db.query(BookSchema, BorrowEntrySchema.return_date)
+    async def get_all_due(self) -> List[BookModel]:
+        result = await self.db.execute(
+            select(BookSchema, BorrowEntrySchema)
             .join(BorrowEntrySchema)
-            .filter(
+            .where(
                 BorrowEntrySchema.is_returned == False,
                 BorrowEntrySchema.return_date == date.today(),
             )
-            .all()
         )
         return [
             BorrowedBookModel(
@@ -69,20 +81,60 @@ class BookRepository(BookRepositoryMeta):
                 return_date=borrow_entry.return_date,
                 is_returned=borrow_entry.is_returned
             )
-            for book, borrow_entry in result
+            for book, borrow_entry in result.all()
         ]
 
-    def get_all(self) -> List[BookModel]:
-        return self.db.query(BookSchema).all()
+    async def get_all(self, limit: int, after_id: int = 0) -> List[BookModel]:
+        return (
+            await self.db.scalars(
+                select(BookSchema)
+                .where(BookSchema.id > after_id)
+                .order_by(BookSchema.id)
+                .limit(limit)
+            )
+        ).all()
+
+    # Streams hold a connection for as long as the client keeps reading, which
+    # outlives the request's session, so they run on a session of their own
+    async def stream_all(self) -> AsyncIterator[BookModel]:
+        async with unit_of_work() as session:
+            books = await session.stream(
+                select(*BookSchema.__table__.columns)
+                .order_by(BookSchema.id)
+                .execution_options(yield_per=STREAM_BATCH_SIZE)
+            )
+            async for book in books:
+                yield BookModel.model_validate(book)
+
+    async def stream_all_borrowed(self) -> AsyncIterator[BorrowedBookModel]:
+        async with unit_of_work() as session:
+            books = await session.stream(
+                select(
+                    *BookSchema.__table__.columns,
+                    BorrowEntrySchema.date_borrowed,
+                    BorrowEntrySchema.return_date,
+                    BorrowEntrySchema.is_returned,
+                )
+                .join(BorrowEntrySchema)
+                .where(BorrowEntrySchema.is_returned == False)
+                .order_by(BookSchema.id)
+                .execution_options(yield_per=STREAM_BATCH_SIZE)
+            )
+            async for book in books:
+                yield BorrowedBookModel.model_validate(book)
+
+    async def remove(self, id: int) -> BookModel | None:
+        result = await self.db.execute(
+            delete(BookSchema)
+            .where(BookSchema.id == id)
+            .returning(*BookSchema.__table__.columns)
+            .execution_options(synchronize_session=False)
+        )
+        row = result.one_or_none()
+        return BookModel.model_validate(row) if row is not None else None
 
-    def remove(self, id: int) -> BookModel:
-        book = self.db.query(BookSchema).filter(BookSchema.id == id).first()
-        self.db.query(BookSchema).filter(BookSchema.id == id).delete()
-        self.db.commit()
-        return book
+    async def rollback(self) -> None:
+        await self.db.rollback()
 
-    def rollback(self) -> None:
-        self.db.rollback()
-        
-    def close(self) -> None:
-        self.db.close()
+    def with_session(self, db: AsyncSession) -> "BookRepository":
+        return BookRepository(db=db)
@@ -1,9 +1,12 @@
 from datetime import date
 from typing import List
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from database.repository.meta.borrow_entry_repository_meta import (
     BorrowEntryRepositoryMeta,
 )
+from database.schema.book_schema import BookSchema
 from database.schema.borrow_entry_schema import BorrowEntrySchema
 from models.borrow_entry_model import BorrowEntryModel
 from utils.dependecy_resolver import ResolveDependency
@@ -11,53 +14,95 @@ from utils.dependecy_resolver import ResolveDependency
 
 class BorrowEntryRepository(BorrowEntryRepositoryMeta):
 
-    def __init__(self, db: Session = ResolveDependency(Session)) -> None:
+    def __init__(self, db: AsyncSession = ResolveDependency(AsyncSession)) -> None:
         self.db = db
 
-    def save(self, borrowed_book: BorrowEntrySchema) -> BorrowEntryModel:
-        self.db.add(borrowed_book)
-        self.db.commit()
-        self.db.refresh(borrowed_book)
-        return (
-            self.db.query(BorrowEntrySchema)
-            .filter(
-                BorrowEntrySchema.return_date == borrowed_book.return_date,
-                BorrowEntrySchema.book_id == borrowed_book.book_id,
+    async def save(self, borrowed_book: BorrowEntryModel) -> BorrowEntryModel | None:
+        # Returns None when the book already has an open entry
+        result = await self.db.execute(
+            insert(BorrowEntrySchema)
+            .values(borrowed_book.model_dump(exclude_none=True))
+            .on_conflict_do_nothing(
+                index_elements=[BorrowEntrySchema.book_id],
+                index_where=BorrowEntrySchema.is_returned == False,
             )
-            .first()
+            .returning(*BorrowEntrySchema.__table__.columns)
         )
+        row = result.one_or_none()
+        return BorrowEntryModel.model_validate(row) if row is not None else None
 
-    def update_return_status(self, id: int) -> BorrowEntryModel:
-        self.db.query(BorrowEntrySchema).filter(
-            BorrowEntrySchema.id == id,
-        ).update({"is_returned": True})
-        self.db.commit()
-        return (
-            self.db.query(BorrowEntrySchema).filter(BorrowEntrySchema.id == id).first()
+    async def save_all(
+        self, borrowed_books: List[BorrowEntryModel]
+    ) -> List[BorrowEntryModel]:
+        # Books that already have an open entry are skipped and left out of the result
+        result = await self.db.execute(
+            insert(BorrowEntrySchema)
+            .values(
+                [borrowed_book.model_dump(exclude_none=True) for borrowed_book in borrowed_books]
+            )
+            .on_conflict_do_nothing(
+                index_elements=[BorrowEntrySchema.book_id],
+                index_where=BorrowEntrySchema.is_returned == False,
+            )
+            .returning(*BorrowEntrySchema.__table__.columns)
+        )
+        return [BorrowEntryModel.model_validate(row) for row in result.all()]
+
+    async def update_return_status(self, id: int) -> BorrowEntryModel | None:
+        result = await self.db.execute(
+            update(BorrowEntrySchema)
+            .where(BorrowEntrySchema.id == id)
+            .values(is_returned=True)
+            .returning(*BorrowEntrySchema.__table__.columns)
+            .execution_options(synchronize_session=False)
         )
+        row = result.one_or_none()
+        return BorrowEntryModel.model_validate(row) if row is not None else None
 
-    def get_all_due(self) -> List[BorrowEntryModel]:
+    async def get_all_due(self) -> List[BorrowEntryModel]:
         return (
-            self.db.query(BorrowEntrySchema)
-            .filter(
+            await self.db.scalars(
+                select(BorrowEntrySchema).where(
+                    BorrowEntrySchema.is_returned == False,
+                    BorrowEntrySchema.return_date <= date.today(),
+                )
+            )
+        ).all()
+
+    async def return_all_due(self, shards: int = 1, shard: int = 0) -> List[str]:
+        # UPDATE ... FROM books, so the titles come back with the returned entries.
+        # Issued against the table since the ORM cannot map RETURNING of another table
+        statement = (
+            update(BorrowEntrySchema.__table__)
+            .where(
+                BorrowEntrySchema.book_id == BookSchema.id,
                 BorrowEntrySchema.is_returned == False,
                 BorrowEntrySchema.return_date <= date.today(),
             )
-            .all()
+            .values(is_returned=True)
+            .returning(BookSchema.title)
         )
+        if shards > 1:
+            statement = statement.where(BorrowEntrySchema.id % shards == shard)
+        return (await self.db.scalars(statement)).all()
 
-    def get_unreturned_entry_by_book_id(self, book_id: int) -> BorrowEntryModel:
-        return (
-            self.db.query(BorrowEntrySchema)
-            .filter(
+    async def get_unreturned_entry_by_book_id(self, book_id: int) -> BorrowEntryModel:
+        return await self.db.scalar(
+            select(BorrowEntrySchema).where(
                 BorrowEntrySchema.is_returned == False,
                 BorrowEntrySchema.book_id == book_id,
             )
-            .first()
         )
 
-    def rollback(self) -> None:
-        self.db.rollback()
+    async def get_unreturned_book_ids(self, book_ids: List[int]) -> List[int]:
+        return (
+            await self.db.scalars(
+                select(BorrowEntrySchema.book_id).where(
+                    BorrowEntrySchema.is_returned == False,
+                    BorrowEntrySchema.book_id.in_(book_ids),
+                )
+            )
+        ).all()
 
-    def close(self) -> None:
-        self.db.close()
\ No newline at end of file
+    async def rollback(self) -> None:
+        await self.db.rollback()
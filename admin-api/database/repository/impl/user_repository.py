@@ -1,14 +1,16 @@
-from typing import List
-from sqlalchemy.orm import Session
+from typing import AsyncIterator, List
+from sqlalchemy import JSON, func, insert, select, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from database.repository.meta.user_repository_meta import UserRepositoryMeta
 from database.schema.book_schema import BookSchema
+from database.schema.database import unit_of_work
 from database.schema.borrow_entry_schema import BorrowEntrySchema
 from database.schema.user_schema import UserSchema
-from models.book_model import BookModel
-from models.borrowed_book_model import BorrowedBookModel
 from models.user_books_model import UserBooksModel
 from models.user_model import UserModel
 from models.user_update_model import UserUpdateModel
+from utils.constants import STREAM_BATCH_SIZE
 from utils.dependecy_resolver import ResolveDependency
 from utils.logger_utility import getlogger
 
@@ -17,104 +19,123 @@ class UserRepository(UserRepositoryMeta):
 
     _logger = getlogger(name="UserRepository")
 
-    def __init__(self, db: Session = ResolveDependency(Session)) -> None:
+    def __init__(self, db: AsyncSession = ResolveDependency(AsyncSession)) -> None:
         self.db = db
 
-    def save(self, user: UserSchema) -> UserModel:
-        self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
-        return self.db.query(UserSchema).filter(UserSchema.email == user.email).first()
-
-    def get_by_id(self, id: int) -> UserModel:
-        return self.db.query(UserSchema).filter(UserSchema.id == id).first()
-
-    def get_by_email(self, email: str) -> UserModel:
-        return self.db.query(UserSchema).filter(UserSchema.email == email).first()
-
-    def get_all(self) -> List[UserModel]:
-        return self.db.query(UserSchema).all()
-
-    def get_all_books_including_returned(self) -> List[UserBooksModel]:
-        results = (
-            self.db.query(UserSchema, BookSchema, BorrowEntrySchema)
-            .select_from(UserSchema)
-            .join(BorrowEntrySchema)
-            .join(BookSchema)
-            .all()
+    async def save(self, user: UserModel) -> UserModel:
+        result = await self.db.execute(
+            insert(UserSchema)
+            .values(user.model_dump(exclude_none=True))
+            .returning(*UserSchema.__table__.columns)
+        )
+        return UserModel.model_validate(result.one())
+
+    async def save_all(self, users: List[UserModel]) -> List[UserModel]:
+        # Emails that already exist are skipped, so redelivered messages are harmless
+        result = await self.db.execute(
+            pg_insert(UserSchema)
+            .values([user.model_dump(exclude_none=True) for user in users])
+            .on_conflict_do_nothing(index_elements=[UserSchema.email])
+            .returning(*UserSchema.__table__.columns)
         )
-        users_books = {}
-
-        for user, book, borrow_entry in results:
-            if user.id not in users_books:
-                self._logger.debug(f"user id: {user.id}")
-                users_books[user.id] = {
-                    "id": user.id,
-                    "email": user.email,
-                    "firstname": user.firstname,
-                    "lastname": user.lastname,
-                    "joined_on": user.joined_on,
-                    "borrowed_books": [],
-                }
-            users_books[user.id]["borrowed_books"].append(
-                BorrowedBookModel(
-                    id=book.id,
-                    title=book.title,
-                    publisher=book.publisher,
-                    category=book.category,
-                    date_borrowed=borrow_entry.date_borrowed,
-                    return_date=borrow_entry.return_date,
-                    is_returned=borrow_entry.is_returned,
-                )
+        return [UserModel.model_validate(row) for row in result.all()]
+
+    async def get_by_id(self, id: int) -> UserModel:
+        return await self.db.scalar(select(UserSchema).where(UserSchema.id == id))
+
+    async def get_by_email(self, email: str) -> UserModel:
+        return await self.db.scalar(select(UserSchema).where(UserSchema.email == email))
+
+    async def get_all_by_emails(self, emails: List[str]) -> List[UserModel]:
+        return (
+            await self.db.scalars(select(UserSchema).where(UserSchema.email.in_(emails)))
+        ).all()
+
+    async def get_all(self, limit: int, after_id: int = 0) -> List[UserModel]:
+        return (
+            await self.db.scalars(
+                select(UserSchema)
+                .where(UserSchema.id > after_id)
+                .order_by(UserSchema.id)
+                .limit(limit)
             )
-
-        return list(users_books.values())
-
-    def get_all_users_with_currently_borrowed_books(self) -> List[UserBooksModel]:
-        results = (
-            self.db.query(UserSchema, BookSchema, BorrowEntrySchema)
+        ).all()
+
+    def _users_with_books(self, *filters, user_id: int | None = None):
+        # One row per user, with their books aggregated into a JSON array by Postgres
+        if user_id is not None:
+            filters = (*filters, UserSchema.id == user_id)
+        borrowed_books = func.json_agg(
+            aggregate_order_by(
+                func.json_build_object(
+                    "id", BookSchema.id,
+                    "title", BookSchema.title,
+                    "publisher", BookSchema.publisher,
+                    "category", BookSchema.category,
+                    "date_borrowed", BorrowEntrySchema.date_borrowed,
+                    "return_date", BorrowEntrySchema.return_date,
+                    "is_returned", BorrowEntrySchema.is_returned,
+                ),
+                BorrowEntrySchema.id,
+            ),
+            type_=JSON,
+        )
+        return (
+            select(*UserSchema.__table__.columns, borrowed_books.label("borrowed_books"))
             .select_from(UserSchema)
             .join(BorrowEntrySchema)
-            .filter(BorrowEntrySchema.is_returned == False)
             .join(BookSchema)
-            .all()
+            .where(*filters)
+            .group_by(UserSchema.id)
+            .order_by(UserSchema.id)
         )
-        users_books = {}
-
-        for user, book, borrow_entry in results:
-            if user.id not in users_books:
-                self._logger.debug(f"user id: {user.id}")
-                users_books[user.id] = {
-                    "id": user.id,
-                    "email": user.email,
-                    "firstname": user.firstname,
-                    "lastname": user.lastname,
-                    "joined_on": user.joined_on,
-                    "borrowed_books": [],
-                }
-            users_books[user.id]["borrowed_books"].append(
-                BorrowedBookModel(
-                    id=book.id,
-                    title=book.title,
-                    publisher=book.publisher,
-                    category=book.category,
-                    date_borrowed=borrow_entry.date_borrowed,
-                    return_date=borrow_entry.return_date,
-                    is_returned=borrow_entry.is_returned,
-                )
-            )
 
-        return list(users_books.values())
+    async def get_all_books_including_returned(
+        self, limit: int, after_id: int = 0, user_id: int | None = None
+    ) -> List[UserBooksModel]:
+        result = await self.db.execute(
+            self._users_with_books(UserSchema.id > after_id, user_id=user_id).limit(limit)
+        )
+        return [UserBooksModel.model_validate(row) for row in result.all()]
+
+    async def get_all_users_with_currently_borrowed_books(
+        self, limit: int, after_id: int = 0, user_id: int | None = None
+    ) -> List[UserBooksModel]:
+        result = await self.db.execute(
+            self._users_with_books(
+                UserSchema.id > after_id,
+                BorrowEntrySchema.is_returned == False,
+                user_id=user_id,
+            ).limit(limit)
+        )
+        return [UserBooksModel.model_validate(row) for row in result.all()]
+
+    async def stream_users_with_books(
+        self, include_returned: bool = True, user_id: int | None = None
+    ) -> AsyncIterator[UserBooksModel]:
+        filters = [] if include_returned else [BorrowEntrySchema.is_returned == False]
+        query = self._users_with_books(*filters, user_id=user_id).execution_options(
+            yield_per=STREAM_BATCH_SIZE
+        )
 
-    def update(self, id: int, user_update: UserUpdateModel) -> UserModel:
-        self.db.query(UserSchema).filter(UserSchema.id == id).update(
-            user_update.model_dump(exclude_none=True)
+        # Runs on its own session as the stream outlives the request's session
+        async with unit_of_work() as session:
+            async for row in await session.stream(query):
+                yield UserBooksModel.model_validate(row)
+
+    async def update(self, id: int, user_update: UserUpdateModel) -> UserModel | None:
+        result = await self.db.execute(
+            update(UserSchema)
+            .where(UserSchema.id == id)
+            .values(user_update.model_dump(exclude_none=True))
+            .returning(*UserSchema.__table__.columns)
+            .execution_options(synchronize_session=False)
         )
-        self.db.commit()
-        return self.db.query(UserSchema).filter(UserSchema.id == id).first()
+        row = result.one_or_none()
+        return UserModel.model_validate(row) if row is not None else None
 
-    def rollback(self) -> None:
-        self.db.rollback()
+    async def rollback(self) -> None:
+        await self.db.rollback()
 
-    def close(self) -> None:
-        self.db.close()
\ No newline at end of file
+    def with_session(self, db: AsyncSession) -> "UserRepository":
+        return UserRepository(db=db)
@@ -1,39 +1,54 @@
 from abc import abstractmethod, ABC
-from typing import List
-from database.schema.book_schema import BookSchema
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List
 from models.book_model import BookModel
 from models.borrowed_book_model import BorrowedBookModel
 
 
 class BookRepositoryMeta(ABC):
     @abstractmethod
-    def save(self, book: BookSchema) -> BookModel:
+    async def save(self, book: BookModel) -> BookModel:
         pass
 
     @abstractmethod
-    def get_by_id(self, id: int) -> BookModel:
+    async def get_by_id(self, id: int) -> BookModel:
         pass
 
     @abstractmethod
-    def get_by_title(self, title: str) -> BookModel:
+    async def get_by_title(self, title: str) -> BookModel:
         pass
 
     @abstractmethod
-    def get_all_borrowed(self) -> List[BorrowedBookModel]:
+    async def get_all_by_titles(self, titles: List[str]) -> List[BookModel]:
         pass
 
     @abstractmethod
-    def get_all(self) -> List[BookModel]:
+    async def get_all_borrowed(
+        self, limit: int, after_id: int = 0
+    ) -> List[BorrowedBookModel]:
         pass
 
     @abstractmethod
-    def remove(self, id: int) -> BookModel:
+    async def get_all(self, limit: int, after_id: int = 0) -> List[BookModel]:
         pass
 
     @abstractmethod
-    def rollback(self) -> None:
+    def stream_all(self) -> AsyncIterator[BookModel]:
         pass
-    
+
+    @abstractmethod
+    def stream_all_borrowed(self) -> AsyncIterator[BorrowedBookModel]:
+        pass
+
     @abstractmethod
-    def close(self) -> None:
-        pass
\ No newline at end of file
+    async def remove(self, id: int) -> BookModel | None:
+        pass
+
+    @abstractmethod
+    async def rollback(self) -> None:
+        pass
+
+    @abstractmethod
+    def with_session(self, db: AsyncSession) -> "BookRepositoryMeta":
+        """Returns a repository of the same kind working on another session."""
+        pass
@@ -1,31 +1,40 @@
 from abc import abstractmethod, ABC
 from typing import List
-from database.schema.borrow_entry_schema import BorrowEntrySchema
 from models.borrow_entry_model import BorrowEntryModel
 
 
 class BorrowEntryRepositoryMeta(ABC):
     @abstractmethod
-    def save(self, borrowed_book: BorrowEntrySchema) -> BorrowEntryModel:
+    async def save(self, borrowed_book: BorrowEntryModel) -> BorrowEntryModel | None:
         pass
 
     @abstractmethod
-    def update_return_status(self, id: int) -> BorrowEntryModel:
+    async def save_all(
+        self, borrowed_books: List[BorrowEntryModel]
+    ) -> List[BorrowEntryModel]:
         pass
 
     @abstractmethod
-    def get_all_due(self) -> List[BorrowEntryModel]:
+    async def update_return_status(self, id: int) -> BorrowEntryModel | None:
+        pass
+
+    @abstractmethod
+    async def get_all_due(self) -> List[BorrowEntryModel]:
         pass
     
     @abstractmethod
-    def get_unreturned_entry_by_book_id(self, book_id: int) -> BorrowEntryModel:
+    async def return_all_due(self, shards: int = 1, shard: int = 0) -> List[str]:
         pass
 
+    @abstractmethod
+    async def get_unreturned_entry_by_book_id(self, book_id: int) -> BorrowEntryModel:
+        pass
 
     @abstractmethod
-    def rollback(self) -> None:
+    async def get_unreturned_book_ids(self, book_ids: List[int]) -> List[int]:
         pass
-    
+
+
     @abstractmethod
-    def close(self) -> None:
+    async def rollback(self) -> None:
         pass
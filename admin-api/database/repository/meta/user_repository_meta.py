@@ -1,6 +1,6 @@
 from abc import abstractmethod, ABC
-from typing import List
-from database.schema.user_schema import UserSchema
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List
 from models.user_books_model import UserBooksModel
 from models.user_model import UserModel
 from models.user_update_model import UserUpdateModel
@@ -8,37 +8,56 @@ from models.user_update_model import UserUpdateModel
 
 class UserRepositoryMeta(ABC):
     @abstractmethod
-    def save(self, user: UserSchema) -> UserModel:
+    async def save(self, user: UserModel) -> UserModel:
         pass
 
     @abstractmethod
-    def get_by_id(self, id: int) -> UserModel:
+    async def save_all(self, users: List[UserModel]) -> List[UserModel]:
         pass
 
     @abstractmethod
-    def get_by_email(self, email: str) -> UserModel:
+    async def get_by_id(self, id: int) -> UserModel:
         pass
 
     @abstractmethod
-    def get_all(self) -> List[UserModel]:
+    async def get_by_email(self, email: str) -> UserModel:
         pass
 
     @abstractmethod
-    def get_all_books_including_returned(self) -> List[UserBooksModel]:
+    async def get_all_by_emails(self, emails: List[str]) -> List[UserModel]:
         pass
 
     @abstractmethod
-    def get_all_users_with_currently_borrowed_books(self) -> List[UserBooksModel]:
+    async def get_all(self, limit: int, after_id: int = 0) -> List[UserModel]:
         pass
 
     @abstractmethod
-    def update(self, id: int, user_update: UserUpdateModel) -> UserModel:
+    async def get_all_books_including_returned(
+        self, limit: int, after_id: int = 0, user_id: int | None = None
+    ) -> List[UserBooksModel]:
         pass
 
     @abstractmethod
-    def rollback(self) -> None:
+    async def get_all_users_with_currently_borrowed_books(
+        self, limit: int, after_id: int = 0, user_id: int | None = None
+    ) -> List[UserBooksModel]:
         pass
-    
+
+    @abstractmethod
+    def stream_users_with_books(
+        self, include_returned: bool = True, user_id: int | None = None
+    ) -> AsyncIterator[UserBooksModel]:
+        pass
+
+    @abstractmethod
+    async def update(self, id: int, user_update: UserUpdateModel) -> UserModel | None:
+        pass
+
+    @abstractmethod
+    async def rollback(self) -> None:
+        pass
+
     @abstractmethod
-    def close(self) -> None:
+    def with_session(self, db: AsyncSession) -> "UserRepositoryMeta":
+        """Returns a repository of the same kind working on another session."""
         pass
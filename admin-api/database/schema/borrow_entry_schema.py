@@ -1,6 +1,6 @@
 from datetime import date
 from typing import List
-from sqlalchemy import Boolean, Column, Integer, String, Date, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, Date, ForeignKey, Index, text
 from sqlalchemy.orm import relationship, Mapped
 
 from database.schema.database import Base
@@ -16,10 +16,30 @@ class BorrowEntrySchema(Base):
     user_id = Column(
         Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
-    date_borrowed = Column(Date, nullable=False, default=date.today())
+    date_borrowed = Column(Date, nullable=False, default=date.today)
     return_date = Column(Date, nullable=False)
     is_returned = Column(Boolean, nullable=False, default=False)
 
+    __table_args__ = (
+        # A book can have at most one open (unreturned) borrow entry
+        Index(
+            "ix_borrow_entries_open_book_id",
+            "book_id",
+            unique=True,
+            postgresql_where=text("is_returned = false"),
+        ),
+        # Due entries for the auto-return job
+        Index(
+            "ix_borrow_entries_open_return_date",
+            "return_date",
+            postgresql_where=text("is_returned = false"),
+        ),
+        # Users with their borrowed books, both current and returned
+        Index("ix_borrow_entries_user_id_book_id", "user_id", "book_id"),
+        # ON DELETE CASCADE from books
+        Index("ix_borrow_entries_book_id", "book_id"),
+    )
+
 
 BorrowEntrySchema.user = relationship("UserSchema", back_populates="borrowed_books")
 BorrowEntrySchema.book = relationship("BookSchema", back_populates="users")
@@ -12,7 +12,7 @@ class UserSchema(Base):
     email = Column(String, unique=True, nullable=False)
     firstname = Column(String, nullable=False)
     lastname = Column(String, nullable=False)
-    joined_on = Column(DateTime, nullable=False, default=datetime.now())
+    joined_on = Column(DateTime, nullable=False, default=datetime.now)
     
     borrowed_books = relationship("BorrowEntrySchema", back_populates="user")
     
@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 
 from routes.books import books_route
+from routes.dead_letters import dead_letters_route
 from routes.health import health_route
 from routes.users import users_route
 from utils.constants import DOCS_URL
@@ -21,4 +22,5 @@ app.state.ioc_container = get_container()
 
 app.include_router(books_route, prefix="/api")
 app.include_router(users_route, prefix="/api")
+app.include_router(dead_letters_route, prefix="/api")
 app.include_router(health_route)
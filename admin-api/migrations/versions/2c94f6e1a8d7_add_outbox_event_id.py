@@ -0,0 +1,28 @@
+"""Add Outbox Event Id
+
+Revision ID: 2c94f6e1a8d7
+Revises: d71c3e8b52a4
+Create Date: 2026-10-18 04:05:41.208317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c94f6e1a8d7'
+down_revision: Union[str, None] = 'd71c3e8b52a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Events already in the outbox get an id of their own from the server default
+    op.add_column('outbox_events', sa.Column('event_id', postgresql.UUID(as_uuid=True), server_default=sa.text('gen_random_uuid()'), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('outbox_events', 'event_id')
@@ -0,0 +1,44 @@
+"""Add Open Borrow Entry Unique Index
+
+Revision ID: 4f2a9c7d1e3b
+Revises: c866d16280f9
+Create Date: 2026-10-18 03:05:12.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f2a9c7d1e3b'
+down_revision: Union[str, None] = 'c866d16280f9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Close duplicate open entries left behind by racing borrows, keeping the oldest
+    op.execute(
+        """
+        UPDATE borrow_entries SET is_returned = true
+        WHERE is_returned = false
+          AND id NOT IN (
+            SELECT min(id) FROM borrow_entries
+            WHERE is_returned = false
+            GROUP BY book_id
+          )
+        """
+    )
+    op.create_index(
+        'ix_borrow_entries_open_book_id',
+        'borrow_entries',
+        ['book_id'],
+        unique=True,
+        postgresql_where=sa.text('is_returned = false'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_borrow_entries_open_book_id', table_name='borrow_entries')
@@ -0,0 +1,26 @@
+"""Add Catalog Version Sequence
+
+Revision ID: 7c5e2a40d8b3
+Revises: 6a1f0d93c2e5
+Create Date: 2026-10-18 06:12:31.408215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c5e2a40d8b3'
+down_revision: Union[str, None] = '6a1f0d93c2e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence('catalog_version_seq')))
+
+
+def downgrade() -> None:
+    op.execute(sa.schema.DropSequence(sa.Sequence('catalog_version_seq')))
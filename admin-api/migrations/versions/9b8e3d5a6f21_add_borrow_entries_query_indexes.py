@@ -0,0 +1,63 @@
+"""Add Borrow Entries Query Indexes
+
+Revision ID: 9b8e3d5a6f21
+Revises: 4f2a9c7d1e3b
+Create Date: 2026-10-18 03:20:47.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b8e3d5a6f21'
+down_revision: Union[str, None] = '4f2a9c7d1e3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction, so every
+# statement runs in an autocommit block. If a concurrent build fails it leaves
+# an INVALID index behind which must be dropped before re-running the upgrade.
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_borrow_entries_open_return_date',
+            'borrow_entries',
+            ['return_date'],
+            postgresql_where=sa.text('is_returned = false'),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_borrow_entries_user_id_book_id',
+            'borrow_entries',
+            ['user_id', 'book_id'],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_borrow_entries_book_id',
+            'borrow_entries',
+            ['book_id'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_borrow_entries_book_id',
+            table_name='borrow_entries',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_borrow_entries_user_id_book_id',
+            table_name='borrow_entries',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_borrow_entries_open_return_date',
+            table_name='borrow_entries',
+            postgresql_concurrently=True,
+        )
@@ -3,7 +3,7 @@ from datetime import date
 
 
 class BorrowEntryModel(BaseModel):
-    id: int
+    id: int | None = None
     book_id: int
     user_id: int
     date_borrowed: date
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class BorrowRequestModel(BaseModel):
+    book_title: str
+    user_id: int
+    borrow_duration_days: int
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+from models.borrow_entry_model import BorrowEntryModel
+
+
+class BorrowResultModel(BaseModel):
+    book_title: str
+    user_id: int
+    borrow_entry: BorrowEntryModel | None = None
+    error: str | None = None
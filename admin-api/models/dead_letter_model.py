@@ -0,0 +1,13 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class DeadLetterModel(BaseModel):
+    topic: str
+    partition: int
+    offset: int
+    key: str | None = None
+    attempts: int
+    error: str | None = None
+    failed_at: datetime
+    value: str
@@ -0,0 +1,30 @@
+from typing import Annotated, List, Literal, Union
+from pydantic import Field
+
+from models.borrow_details_model import BorrowDetailsModel
+from models.event_envelope_model import EventEnvelopeModel
+from models.user_model import UserModel
+from models.user_update_model import UserUpdateModel
+from utils.constants import BOOK_BORROWED_EVENT, USER_CREATED_EVENT, USER_UPDATED_EVENT
+
+
+class UserCreatedEventModel(EventEnvelopeModel):
+    type: Literal[USER_CREATED_EVENT]
+    payload: List[UserModel]
+
+
+class UserUpdatedEventModel(EventEnvelopeModel):
+    type: Literal[USER_UPDATED_EVENT]
+    payload: List[UserUpdateModel]
+
+
+class BookBorrowedEventModel(EventEnvelopeModel):
+    type: Literal[BOOK_BORROWED_EVENT]
+    payload: List[BorrowDetailsModel]
+
+
+# Events published by the frontend, told apart by their type
+FrontendEventModel = Annotated[
+    Union[UserCreatedEventModel, UserUpdatedEventModel, BookBorrowedEventModel],
+    Field(discriminator="type"),
+]
@@ -0,0 +1,16 @@
+from datetime import datetime
+from uuid import UUID, uuid4
+from pydantic import BaseModel, Field
+
+
+class OutboxEventModel(BaseModel):
+    id: int | None = None
+    event_id: UUID = Field(default_factory=uuid4)
+    topic: str
+    key: str | None = None
+    payload: list
+    # Left to the database when saving
+    created_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,12 @@
+from typing import Generic, List, TypeVar
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class PageModel(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: str | None = None
+
+    class Config:
+        from_attributes = True
@@ -1,32 +1,53 @@
-from typing import List
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 
 from controllers.book_controller import BookController
 from models.book_model import BookModel
 from models.borrowed_book_model import BorrowedBookModel
+from models.page_model import PageModel
+from utils.catalog_version_utility import check_catalog_version
+from utils.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 books_route = APIRouter(tags=["Book Routes"], prefix="/books")
 
 
-@books_route.get("/")
+@books_route.get("/", dependencies=[Depends(check_catalog_version)])
 async def get_all_books(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
     controller: BookController = Depends(BookController),
-) -> List[BookModel]:
-    return controller.get_all_books()
+) -> PageModel[BookModel]:
+    return await controller.get_all_books(limit, cursor)
 
 
-@books_route.get("/borrowed")
+@books_route.get("/borrowed", dependencies=[Depends(check_catalog_version)])
 async def get_all_borrowed_books(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
     controller: BookController = Depends(BookController),
-) -> List[BorrowedBookModel]:
-    return controller.get_all_borrowed_books()
+) -> PageModel[BorrowedBookModel]:
+    return await controller.get_all_borrowed_books(limit, cursor)
 
 
-@books_route.get("/{id}")
+@books_route.get("/export", response_class=StreamingResponse)
+async def export_all_books(
+    controller: BookController = Depends(BookController),
+) -> StreamingResponse:
+    return await controller.stream_all_books()
+
+
+@books_route.get("/borrowed/export", response_class=StreamingResponse)
+async def export_all_borrowed_books(
+    controller: BookController = Depends(BookController),
+) -> StreamingResponse:
+    return await controller.stream_all_borrowed_books()
+
+
+@books_route.get("/{id}", dependencies=[Depends(check_catalog_version)])
 async def get_book_by_id(
     id: int, controller: BookController = Depends(BookController)
 ) -> BookModel:
-    return controller.get_book_by_id(id)
+    return await controller.get_book_by_id(id)
 
 
 @books_route.post("/")
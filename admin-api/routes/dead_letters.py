@@ -0,0 +1,24 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query
+
+from controllers.dead_letter_controller import DeadLetterController
+from models.dead_letter_model import DeadLetterModel
+from utils.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+dead_letters_route = APIRouter(tags=["Dead Letter Routes"], prefix="/dead-letters")
+
+
+@dead_letters_route.get("/")
+async def get_all_dead_letters(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    controller: DeadLetterController = Depends(DeadLetterController),
+) -> List[DeadLetterModel]:
+    return await controller.get_all_dead_letters(limit)
+
+
+@dead_letters_route.post("/replay")
+async def replay_dead_letters(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    controller: DeadLetterController = Depends(DeadLetterController),
+) -> List[DeadLetterModel]:
+    return await controller.replay_dead_letters(limit)
@@ -1,30 +1,48 @@
-from typing import List
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 
 from controllers.user_controller import UserController
 from models.user_books_model import UserBooksModel
+from models.page_model import PageModel
 from models.user_model import UserModel
+from utils.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 users_route = APIRouter(tags=["User Routes"], prefix="/users")
 
 
 @users_route.get("/")
 async def get_all_users(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
     controller: UserController = Depends(UserController),
-) -> List[UserModel]:
-    return controller.get_all_users()
+) -> PageModel[UserModel]:
+    return await controller.get_all_users(limit, cursor)
 
 
 @users_route.get("/books")
 async def get_all_users_with_books(
     include_returned: bool = True,
+    user_id: int | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
     controller: UserController = Depends(UserController),
-) -> List[UserBooksModel]:
-    return controller.get_all_users_with_books(include_returned)
+) -> PageModel[UserBooksModel]:
+    return await controller.get_all_users_with_books(
+        include_returned, limit, cursor, user_id
+    )
+
+
+@users_route.get("/books/export", response_class=StreamingResponse)
+async def export_all_users_with_books(
+    include_returned: bool = True,
+    user_id: int | None = None,
+    controller: UserController = Depends(UserController),
+) -> StreamingResponse:
+    return await controller.stream_all_users_with_books(include_returned, user_id)
 
 
 @users_route.get("/{id}")
 async def get_user_by_id(
     id: int, controller: UserController = Depends(UserController)
 ) -> UserModel:
-    return controller.get_user_by_id(id)
+    return await controller.get_user_by_id(id)
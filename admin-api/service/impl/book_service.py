@@ -1,19 +1,21 @@
 from datetime import date, timedelta
-from typing import List
+from typing import AsyncIterator, List
 
-from aiokafka import AIOKafkaProducer
-from psycopg2.errors import UniqueViolation
+from psycopg2.errorcodes import UNIQUE_VIOLATION
 from sqlalchemy.exc import IntegrityError
 
 from database.repository.meta.book_repository_meta import BookRepositoryMeta
 from database.repository.meta.borrow_entry_repository_meta import (
     BorrowEntryRepositoryMeta,
 )
-from database.schema.book_schema import BookSchema
-from database.schema.borrow_entry_schema import BorrowEntrySchema
+from database.repository.meta.outbox_repository_meta import OutboxRepositoryMeta
 from models.book_model import BookModel
 from models.borrow_entry_model import BorrowEntryModel
+from models.borrow_request_model import BorrowRequestModel
+from models.borrow_result_model import BorrowResultModel
 from models.borrowed_book_model import BorrowedBookModel
+from models.outbox_event_model import OutboxEventModel
+from models.page_model import PageModel
 from service.meta.book_service_meta import BookServiceMeta
 from utils.environment import (
     KAFKA_ADD_BOOK_TOPIC,
@@ -26,6 +28,8 @@ from utils.custom_exceptions import (
 )
 from utils.dependecy_resolver import ResolveDependency
 from utils.logger_utility import getlogger
+from utils.pagination_utility import build_page, decode_cursor
+from utils.single_flight_utility import single_flight
 
 
 class BookService(BookServiceMeta):
@@ -37,30 +41,34 @@ class BookService(BookServiceMeta):
         borrow_entry_repository: BorrowEntryRepositoryMeta = ResolveDependency(
             BorrowEntryRepositoryMeta
         ),
-        kafka_producer: AIOKafkaProducer = ResolveDependency(AIOKafkaProducer),
+        outbox_repository: OutboxRepositoryMeta = ResolveDependency(
+            OutboxRepositoryMeta
+        ),
     ) -> None:
         self.book_repository = book_repository
         self.borrow_entry_repository = borrow_entry_repository
-        self.kafka_producer = kafka_producer
+        self.outbox_repository = outbox_repository
 
     async def add(self, book: BookModel) -> BookModel:
         try:
-            inserted_book = BookModel.model_validate(
-                self.book_repository.save(
-                    BookSchema(
-                        id=book.id,
-                        title=book.title.lower(),
-                        publisher=book.publisher.lower(),
-                        category=book.category.lower(),
-                    )
+            inserted_book = await self.book_repository.save(
+                BookModel(
+                    id=book.id,
+                    title=book.title.lower(),
+                    publisher=book.publisher.lower(),
+                    category=book.category.lower(),
                 )
             )
-            await self.kafka_producer.send_and_wait(
-                KAFKA_ADD_BOOK_TOPIC, [inserted_book.model_dump()]
+            await self.outbox_repository.save(
+                OutboxEventModel(
+                    topic=KAFKA_ADD_BOOK_TOPIC,
+                    key=inserted_book.title,
+                    payload=[inserted_book.model_dump(mode="json")],
+                )
             )
         except IntegrityError as e:
-            self.rollback()
-            if isinstance(e.orig, UniqueViolation):
+            await self.rollback()
+            if getattr(e.orig, "pgcode", None) == UNIQUE_VIOLATION:
                 error_msg = f"Book with title {book.title} already exists"
                 self._logger.error(error_msg)
                 raise ConflictException(error_msg)
@@ -69,14 +77,14 @@ class BookService(BookServiceMeta):
                 raise Exception(e.orig)
         except Exception as e:
             self._logger.error(f"Failed to save book {book.title} due to: {e}")
-            self.rollback()
+            await self.rollback()
             raise Exception(e)
 
         return inserted_book
 
-    def get_by_id(self, id: int) -> BookModel:
+    async def get_by_id(self, id: int) -> BookModel:
         try:
-            book = self.book_repository.get_by_id(id)
+            book = await self.book_repository.get_by_id(id)
         except Exception as e:
             self._logger.error(f"Failed to find book with id {id} due to: {e}")
             raise Exception(e)
@@ -86,9 +94,9 @@ class BookService(BookServiceMeta):
 
         return book
 
-    def get_by_title(self, title: str) -> BookModel:
+    async def get_by_title(self, title: str) -> BookModel:
         try:
-            book = self.book_repository.get_by_title(title)
+            book = await self.book_repository.get_by_title(title)
         except Exception as e:
             self._logger.error(f"Failed to find book with title {title} due to: {e}")
             raise Exception(e)
@@ -98,9 +106,9 @@ class BookService(BookServiceMeta):
 
         return book
 
-    def get_all_due(self) -> List[BorrowEntryModel]:
+    async def get_all_due(self) -> List[BorrowEntryModel]:
         try:
-            borrow_entries = self.borrow_entry_repository.get_all_due()
+            borrow_entries = await self.borrow_entry_repository.get_all_due()
         except Exception as e:
             self._logger.error(f"Failed to find any due books because: {e}")
             raise Exception(e)
@@ -112,74 +120,176 @@ class BookService(BookServiceMeta):
 
     async def return_book(self, borrow_id: int) -> BookModel:
         try:
-            borrow_entry = self.borrow_entry_repository.update_return_status(borrow_id)
+            borrow_entry = await self.borrow_entry_repository.update_return_status(borrow_id)
         except Exception as e:
             self._logger.error(
                 f"Failed to return borrow entry with id {borrow_id} due to: {e}"
             )
-            self.rollback()
+            await self.rollback()
             raise Exception(e)
 
         if borrow_entry is None:
             raise NotFoundException("No such entry found")
 
         try:
-            book = self.book_repository.get_by_id(borrow_entry.book_id)
+            book = await self.book_repository.get_by_id(borrow_entry.book_id)
         except Exception as e:
             self._logger.error(
                 f"Failed to return borrow entry with id {borrow_id} due to: {e}"
             )
-            self.rollback()
+            await self.rollback()
             raise Exception(e)
 
         if book is None:
             raise NotFoundException("No such book found")
 
-        await self.kafka_producer.send_and_wait(KAFKA_RETURN_BOOK_TOPIC, [book.title])
+        try:
+            await self.outbox_repository.save(
+                OutboxEventModel(
+                    topic=KAFKA_RETURN_BOOK_TOPIC, key=book.title, payload=[book.title]
+                )
+            )
+        except Exception as e:
+            self._logger.error(
+                f"Failed to return borrow entry with id {borrow_id} due to: {e}"
+            )
+            await self.rollback()
+            raise Exception(e)
+
         return book
 
-    def borrow_book(
+    async def return_all_due(self, shards: int = 1, shard: int = 0) -> List[str]:
+        try:
+            titles = await self.borrow_entry_repository.return_all_due(shards, shard)
+            # Keyed by title like every other book event, so they stay in order
+            # with the borrows and returns of the same book
+            await self.outbox_repository.save_all(
+                [
+                    OutboxEventModel(
+                        topic=KAFKA_RETURN_BOOK_TOPIC, key=title, payload=[title]
+                    )
+                    for title in titles
+                ]
+            )
+        except Exception as e:
+            self._logger.error(f"Failed to return due books due to: {e}")
+            await self.rollback()
+            raise Exception(e)
+
+        return titles
+
+    async def borrow_book(
         self, title: str, user_id: int, borrow_duration_days: int
     ) -> BookModel:
         try:
-            book = self.book_repository.get_by_title(title)
+            book = await self.book_repository.get_by_title(title)
         except Exception as e:
             self._logger.error(f"Failed to borrow book with title {title} due to: {e}")
-            self.rollback()
+            await self.rollback()
             raise Exception(e)
 
         if book is None:
             raise NotFoundException("Book not found")
 
         try:
-            unreturned_entry = self.borrow_entry_repository.get_unreturned_entry_by_book_id(book.id)
-        except Exception as e:
-            self._logger.error(f"Failed when checking borrow entry for {title} due to {e}")
-            self.rollback()
-            raise Exception(e)
-        
-        if unreturned_entry is not None:
-            raise ConflictException("Book Already borrowed")
-
-        try:
-            self.borrow_entry_repository.save(
-                BorrowEntrySchema(
+            borrow_entry = await self.borrow_entry_repository.save(
+                BorrowEntryModel(
                     book_id=book.id,
                     user_id=user_id,
+                    date_borrowed=date.today(),
                     return_date=date.today() + timedelta(days=borrow_duration_days),
                 )
             )
         except Exception as e:
             self._logger.error(f"Failed to insert borrow entry for {title} due to {e}")
-            self.rollback()
+            await self.rollback()
             raise Exception(e)
 
+        # The open-entry unique index rejected the insert
+        if borrow_entry is None:
+            raise ConflictException("Book Already borrowed")
+
         return book
 
-    def get_all(self) -> List[BookModel]:
+    async def borrow_books(
+        self, borrow_requests: List[BorrowRequestModel]
+    ) -> List[BorrowResultModel]:
+        """
+        Borrows many books at once with one lookup for the titles, one for the
+        open entries and one insert. Requests that cannot be honoured are
+        reported on their result instead of failing the rest.
+        """
+        results = [
+            BorrowResultModel(book_title=request.book_title, user_id=request.user_id)
+            for request in borrow_requests
+        ]
+        if not borrow_requests:
+            return results
+
+        try:
+            books = await self.book_repository.get_all_by_titles(
+                list({request.book_title for request in borrow_requests})
+            )
+            book_ids = {book.title: book.id for book in books}
+            borrowed_book_ids = set(
+                await self.borrow_entry_repository.get_unreturned_book_ids(
+                    list(book_ids.values())
+                )
+            )
+        except Exception as e:
+            self._logger.error(f"Failed to check books for borrowing due to: {e}")
+            await self.rollback()
+            raise Exception(e)
+
+        pending: dict[int, BorrowResultModel] = {}
+        new_entries: List[BorrowEntryModel] = []
+        for request, result in zip(borrow_requests, results):
+            book_id = book_ids.get(request.book_title)
+            if book_id is None:
+                result.error = "Book not found"
+            elif book_id in borrowed_book_ids or book_id in pending:
+                result.error = "Book Already borrowed"
+            else:
+                pending[book_id] = result
+                new_entries.append(
+                    BorrowEntryModel(
+                        book_id=book_id,
+                        user_id=request.user_id,
+                        date_borrowed=date.today(),
+                        return_date=date.today()
+                        + timedelta(days=request.borrow_duration_days),
+                    )
+                )
+
+        if not new_entries:
+            return results
+
+        try:
+            borrow_entries = await self.borrow_entry_repository.save_all(new_entries)
+        except Exception as e:
+            self._logger.error(f"Failed to insert borrow entries due to {e}")
+            await self.rollback()
+            raise Exception(e)
+
+        for borrow_entry in borrow_entries:
+            pending.pop(borrow_entry.book_id).borrow_entry = borrow_entry
+
+        # Whatever is left was borrowed concurrently and rejected by the open-entry index
+        for result in pending.values():
+            result.error = "Book Already borrowed"
+
+        return results
+
+    async def get_all(self, limit: int, cursor: str | None = None) -> PageModel[BookModel]:
         self._logger.info("Getting all")
+        after_id = decode_cursor(cursor)
         try:
-            books = self.book_repository.get_all()
+            books = await single_flight.do(
+                ("BookService.get_all", limit, after_id),
+                lambda session: self.book_repository.with_session(session).get_all(
+                    limit + 1, after_id
+                ),
+            )
         except Exception as e:
             self._logger.error(f"Failed to find any books due to: {e}")
             raise Exception(e)
@@ -187,12 +297,20 @@ class BookService(BookServiceMeta):
         if books is None:
             raise NotFoundException("No Books found")
 
-        return books
+        return build_page(books, limit)
 
-    def get_all_borrowed(self) -> List[BorrowedBookModel]:
+    async def get_all_borrowed(
+        self, limit: int, cursor: str | None = None
+    ) -> PageModel[BorrowedBookModel]:
         self._logger.info("Getting all borrowed")
+        after_id = decode_cursor(cursor)
         try:
-            books = self.book_repository.get_all_borrowed()
+            books = await single_flight.do(
+                ("BookService.get_all_borrowed", limit, after_id),
+                lambda session: self.book_repository.with_session(
+                    session
+                ).get_all_borrowed(limit + 1, after_id),
+            )
         except Exception as e:
             self._logger.error(f"Failed to find any borrowed books due to: {e}")
             raise Exception(e)
@@ -200,38 +318,59 @@ class BookService(BookServiceMeta):
         if books is None:
             raise NotFoundException("No Borrowed Books found")
 
-        return books
+        return build_page(books, limit)
+
+    async def stream_all(self) -> AsyncIterator[BookModel]:
+        try:
+            async for book in self.book_repository.stream_all():
+                yield book
+        except Exception as e:
+            self._logger.error(f"Failed to stream books due to: {e}")
+            raise Exception(e)
+
+    async def stream_all_borrowed(self) -> AsyncIterator[BorrowedBookModel]:
+        try:
+            async for book in self.book_repository.stream_all_borrowed():
+                yield book
+        except Exception as e:
+            self._logger.error(f"Failed to stream borrowed books due to: {e}")
+            raise Exception(e)
 
     async def remove_book(self, id: int) -> BookModel:
         try:
-            unreturned_entry = self.borrow_entry_repository.get_unreturned_entry_by_book_id(id)
+            unreturned_entry = await self.borrow_entry_repository.get_unreturned_entry_by_book_id(id)
         except Exception as e:
             self._logger.error(f"Failed when checking for borrow entry for book with id {id} due to {e}")
-            self.rollback()
+            await self.rollback()
             raise Exception(e)
         
         if unreturned_entry is not None:
             raise ConflictException("Cannot remove book that has not been returned")
         
         try:
-            removed_book = self.book_repository.remove(id)
+            removed_book = await self.book_repository.remove(id)
         except Exception as e:
             self._logger.error(f"Failed to remove book with id {id} due to: {e}")
-            self.rollback()
+            await self.rollback()
             raise Exception(e)
 
         if removed_book is None:
             raise NotFoundException("Book not found")
 
-        await self.kafka_producer.send_and_wait(
-            KAFKA_REMOVE_BOOK_TOPIC, [removed_book.title]
-        )
+        try:
+            await self.outbox_repository.save(
+                OutboxEventModel(
+                    topic=KAFKA_REMOVE_BOOK_TOPIC,
+                    key=removed_book.title,
+                    payload=[removed_book.title],
+                )
+            )
+        except Exception as e:
+            self._logger.error(f"Failed to remove book with id {id} due to: {e}")
+            await self.rollback()
+            raise Exception(e)
 
         return removed_book
 
-    def rollback(self) -> None:
-        self.book_repository.rollback()
-        
-    def close(self) -> None:
-        self.book_repository.close()
-        self.borrow_entry_repository.close()
+    async def rollback(self) -> None:
+        await self.book_repository.rollback()
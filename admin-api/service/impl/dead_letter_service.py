@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import List
+from aiokafka import AIOKafkaProducer, ConsumerRecord
+
+from models.dead_letter_model import DeadLetterModel
+from service.meta.dead_letter_service_meta import DeadLetterServiceMeta
+from utils.constants import ERROR_HEADER
+from utils.dead_letter_utility import read_dead_letters
+from utils.dependecy_resolver import ResolveDependency
+from utils.logger_utility import getlogger
+from utils.retry_utility import get_attempts, get_header, get_original_topic
+
+
+class DeadLetterService(DeadLetterServiceMeta):
+
+    _logger = getlogger(name="DeadLetterService")
+
+    def __init__(
+        self,
+        kafka_producer: AIOKafkaProducer = ResolveDependency(AIOKafkaProducer),
+    ) -> None:
+        self.kafka_producer = kafka_producer
+
+    async def get_all(self, limit: int) -> List[DeadLetterModel]:
+        try:
+            messages = await read_dead_letters(limit, producer=self.kafka_producer)
+        except Exception as e:
+            self._logger.error(f"Failed to read dead letters due to: {e}")
+            raise Exception(e)
+        return [self.to_dead_letter_model(message) for message in messages]
+
+    async def replay_all(self, limit: int) -> List[DeadLetterModel]:
+        try:
+            messages = await read_dead_letters(
+                limit, replay=True, producer=self.kafka_producer
+            )
+        except Exception as e:
+            self._logger.error(f"Failed to replay dead letters due to: {e}")
+            raise Exception(e)
+        self._logger.info(f"Replayed {len(messages)} dead letters")
+        return [self.to_dead_letter_model(message) for message in messages]
+
+    def to_dead_letter_model(self, message: ConsumerRecord) -> DeadLetterModel:
+        return DeadLetterModel(
+            topic=get_original_topic(message),
+            partition=message.partition,
+            offset=message.offset,
+            key=message.key.decode() if message.key is not None else None,
+            attempts=get_attempts(message),
+            error=get_header(message, ERROR_HEADER),
+            failed_at=datetime.fromtimestamp(message.timestamp / 1000),
+            value=message.value.decode(errors="replace"),
+        )
@@ -1,17 +1,19 @@
 import re
-from typing import List
-from psycopg2.errors import UniqueViolation
+from typing import AsyncIterator, List
+from psycopg2.errorcodes import UNIQUE_VIOLATION
 from sqlalchemy.exc import IntegrityError
 
 from database.repository.meta.user_repository_meta import UserRepositoryMeta
-from database.schema.user_schema import UserSchema
 from models.user_books_model import UserBooksModel
+from models.page_model import PageModel
 from models.user_model import UserModel
 from models.user_update_model import UserUpdateModel
 from service.meta.user_service_meta import UserServiceMeta
 from utils.custom_exceptions import BadRequestException, NotFoundException, ConflictException
 from utils.dependecy_resolver import ResolveDependency
 from utils.logger_utility import getlogger
+from utils.pagination_utility import build_page, decode_cursor
+from utils.single_flight_utility import single_flight
 
 
 class UserService(UserServiceMeta):
@@ -24,21 +26,22 @@ class UserService(UserServiceMeta):
     ) -> None:
         self.repository = user_repository
 
-    def add(self, user: UserModel) -> UserModel:
+    async def add(self, user: UserModel) -> UserModel:
         if not self.validate_email(user.email):
             raise BadRequestException("Invalid email supplied")
         
         try:
-            return self.repository.save(
-                UserSchema(
+            return await self.repository.save(
+                UserModel(
                     email=user.email,
                     firstname=user.firstname,
                     lastname=user.lastname,
+                    joined_on=user.joined_on,
                 )
             )
         except IntegrityError as e:
-            self.rollback()
-            if isinstance(e.orig, UniqueViolation):
+            await self.rollback()
+            if getattr(e.orig, "pgcode", None) == UNIQUE_VIOLATION:
                 error_msg = f"User with email {user.email} already exists"
                 self._logger.error(error_msg)
                 raise ConflictException(error_msg)
@@ -47,12 +50,40 @@ class UserService(UserServiceMeta):
                 raise Exception(e.orig)
         except Exception as e:
             self._logger.error(f"Failed to save user {user.email} due to: {e}")
-            self.rollback()
+            await self.rollback()
             raise Exception(e)
 
-    def get_by_id(self, id: int) -> UserModel:
+    async def add_all(self, users: List[UserModel]) -> List[UserModel]:
+        valid_users = []
+        for user in users:
+            if self.validate_email(user.email):
+                valid_users.append(user)
+            else:
+                self._logger.error(f"Skipping user with invalid email {user.email}")
+
+        if not valid_users:
+            return []
+
+        try:
+            return await self.repository.save_all(
+                [
+                    UserModel(
+                        email=user.email,
+                        firstname=user.firstname,
+                        lastname=user.lastname,
+                        joined_on=user.joined_on,
+                    )
+                    for user in valid_users
+                ]
+            )
+        except Exception as e:
+            self._logger.error(f"Failed to save {len(valid_users)} users due to: {e}")
+            await self.rollback()
+            raise Exception(e)
+
+    async def get_by_id(self, id: int) -> UserModel:
         try:
-            user = self.repository.get_by_id(id)
+            user = await self.repository.get_by_id(id)
         except Exception as e:
             self._logger.error(f"Failed to find user with id {id} due to: {e}")
             raise Exception(e)
@@ -62,9 +93,9 @@ class UserService(UserServiceMeta):
 
         return user
 
-    def get_by_email(self, email: str) -> UserModel:
+    async def get_by_email(self, email: str) -> UserModel:
         try:
-            user = self.repository.get_by_email(email)
+            user = await self.repository.get_by_email(email)
         except Exception as e:
             self._logger.error(f"Failed to find user with email {email} due to: {e}")
             raise Exception(e)
@@ -74,9 +105,24 @@ class UserService(UserServiceMeta):
 
         return user
 
-    def get_all_users(self) -> List[UserModel]:
+    async def get_all_by_emails(self, emails: List[str]) -> List[UserModel]:
+        try:
+            return await self.repository.get_all_by_emails(emails)
+        except Exception as e:
+            self._logger.error(f"Failed to find users by email due to: {e}")
+            raise Exception(e)
+
+    async def get_all_users(
+        self, limit: int, cursor: str | None = None
+    ) -> PageModel[UserModel]:
+        after_id = decode_cursor(cursor)
         try:
-            users = self.repository.get_all()
+            users = await single_flight.do(
+                ("UserService.get_all_users", limit, after_id),
+                lambda session: self.repository.with_session(session).get_all(
+                    limit + 1, after_id
+                ),
+            )
         except Exception as e:
             self._logger.error(f"Failed to find users due to: {e}")
             raise Exception(e)
@@ -84,11 +130,16 @@ class UserService(UserServiceMeta):
         if users is None:
             raise NotFoundException("No users found")
 
-        return users
+        return build_page(users, limit)
 
-    def get_all_users_books_including_returned(self) -> List[UserBooksModel]:
+    async def get_all_users_books_including_returned(
+        self, limit: int, cursor: str | None = None, user_id: int | None = None
+    ) -> PageModel[UserBooksModel]:
+        after_id = decode_cursor(cursor)
         try:
-            users = self.repository.get_all_books_including_returned()
+            users = await self.repository.get_all_books_including_returned(
+                limit + 1, after_id, user_id
+            )
         except Exception as e:
             self._logger.error(f"Failed to find users with borrowed books due to: {e}")
             raise Exception(e)
@@ -96,11 +147,16 @@ class UserService(UserServiceMeta):
         if users is None:
             raise NotFoundException("No users with borrowed books found")
 
-        return users
+        return build_page(users, limit)
 
-    def get_all_users_currently_borrowed_books(self) -> List[UserBooksModel]:
+    async def get_all_users_currently_borrowed_books(
+        self, limit: int, cursor: str | None = None, user_id: int | None = None
+    ) -> PageModel[UserBooksModel]:
+        after_id = decode_cursor(cursor)
         try:
-            users = self.repository.get_all_users_with_currently_borrowed_books()
+            users = await self.repository.get_all_users_with_currently_borrowed_books(
+                limit + 1, after_id, user_id
+            )
         except Exception as e:
             self._logger.error(f"Failed to find users with borrowed books due to: {e}")
             raise Exception(e)
@@ -108,14 +164,26 @@ class UserService(UserServiceMeta):
         if users is None:
             raise NotFoundException("No users with borrowed books found")
 
-        return users
+        return build_page(users, limit)
 
-    def update(self, id: int, user_update: UserUpdateModel) -> UserModel:
+    async def stream_users_with_books(
+        self, include_returned: bool = True, user_id: int | None = None
+    ) -> AsyncIterator[UserBooksModel]:
         try:
-            user = self.repository.update(id, user_update)
+            async for user_books in self.repository.stream_users_with_books(
+                include_returned, user_id
+            ):
+                yield user_books
+        except Exception as e:
+            self._logger.error(f"Failed to stream users with borrowed books due to: {e}")
+            raise Exception(e)
+
+    async def update(self, id: int, user_update: UserUpdateModel) -> UserModel:
+        try:
+            user = await self.repository.update(id, user_update)
         except Exception as e:
             self._logger.error(f"Failed to update user with id {id} due to: {e}")
-            self.rollback()
+            await self.rollback()
             raise Exception(e)
 
         if user is None:
@@ -127,8 +195,5 @@ class UserService(UserServiceMeta):
         email_regex = re.compile(r"[^@]+@[^@]+\.[^@]+")
         return email_regex.match(email)
 
-    def rollback(self) -> None:
-        self.repository.rollback()
-        
-    def close(self) -> None:
-        self.repository.close()
+    async def rollback(self) -> None:
+        await self.repository.rollback()
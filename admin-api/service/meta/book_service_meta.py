@@ -1,53 +1,72 @@
 from abc import abstractmethod, ABC
-from typing import List
+from typing import AsyncIterator, List
 from models.book_model import BookModel
 from models.borrow_entry_model import BorrowEntryModel
+from models.borrow_request_model import BorrowRequestModel
+from models.borrow_result_model import BorrowResultModel
+from models.borrowed_book_model import BorrowedBookModel
+from models.page_model import PageModel
 
 
 class BookServiceMeta(ABC):
     @abstractmethod
-    def add(self, book: BookModel) -> BookModel:
+    async def add(self, book: BookModel) -> BookModel:
         pass
 
     @abstractmethod
-    def get_by_id(self, id: int) -> BookModel:
+    async def get_by_id(self, id: int) -> BookModel:
         pass
 
     @abstractmethod
-    def get_by_title(self, id: int) -> BookModel:
+    async def get_by_title(self, id: int) -> BookModel:
         pass
 
     @abstractmethod
-    def return_book(self, borrow_id: int) -> BookModel:
+    async def return_book(self, borrow_id: int) -> BookModel:
         pass
 
     @abstractmethod
-    def get_all(self) -> List[BookModel]:
+    async def return_all_due(self, shards: int = 1, shard: int = 0) -> List[str]:
         pass
 
     @abstractmethod
-    def get_all_borrowed(self) -> List[BorrowEntryModel]:
+    async def get_all(self, limit: int, cursor: str | None = None) -> PageModel[BookModel]:
         pass
 
     @abstractmethod
-    def get_all_due(self) -> List[BorrowEntryModel]:
+    async def get_all_borrowed(
+        self, limit: int, cursor: str | None = None
+    ) -> PageModel[BorrowedBookModel]:
         pass
 
     @abstractmethod
-    def remove_book(self, id: int) -> BookModel:
+    async def get_all_due(self) -> List[BorrowEntryModel]:
         pass
 
     @abstractmethod
-    def borrow_book(
+    def stream_all(self) -> AsyncIterator[BookModel]:
+        pass
+
+    @abstractmethod
+    def stream_all_borrowed(self) -> AsyncIterator[BorrowedBookModel]:
+        pass
+
+    @abstractmethod
+    async def remove_book(self, id: int) -> BookModel:
+        pass
+
+    @abstractmethod
+    async def borrow_book(
         self, title: str, user_id: int, borrow_duration_days: int
     ) -> BookModel:
         pass
 
     @abstractmethod
-    def rollback(self) -> None:
+    async def borrow_books(
+        self, borrow_requests: List[BorrowRequestModel]
+    ) -> List[BorrowResultModel]:
         pass
-    
+
     @abstractmethod
-    def close(self) -> None:
+    async def rollback(self) -> None:
         pass
-
@@ -0,0 +1,14 @@
+from abc import abstractmethod, ABC
+from typing import List
+
+from models.dead_letter_model import DeadLetterModel
+
+
+class DeadLetterServiceMeta(ABC):
+    @abstractmethod
+    async def get_all(self, limit: int) -> List[DeadLetterModel]:
+        pass
+
+    @abstractmethod
+    async def replay_all(self, limit: int) -> List[DeadLetterModel]:
+        pass
@@ -1,47 +1,64 @@
 from abc import abstractmethod, ABC
-from typing import List
+from typing import AsyncIterator, List
 from models.user_books_model import UserBooksModel
+from models.page_model import PageModel
 from models.user_model import UserModel
 from models.user_update_model import UserUpdateModel
 
 
 class UserServiceMeta(ABC):
     @abstractmethod
-    def add(self, user: UserModel) -> UserModel:
+    async def add(self, user: UserModel) -> UserModel:
         pass
 
     @abstractmethod
-    def get_by_id(self, id: int) -> UserModel:
+    async def add_all(self, users: List[UserModel]) -> List[UserModel]:
         pass
 
     @abstractmethod
-    def get_by_email(self, email: str) -> UserModel:
+    async def get_by_id(self, id: int) -> UserModel:
         pass
 
     @abstractmethod
-    def get_all_users(self) -> List[UserModel]:
+    async def get_by_email(self, email: str) -> UserModel:
         pass
 
     @abstractmethod
-    def get_all_users_books_including_returned(self) -> List[UserBooksModel]:
+    async def get_all_by_emails(self, emails: List[str]) -> List[UserModel]:
         pass
 
     @abstractmethod
-    def get_all_users_currently_borrowed_books(self) -> List[UserBooksModel]:
+    async def get_all_users(
+        self, limit: int, cursor: str | None = None
+    ) -> PageModel[UserModel]:
         pass
 
     @abstractmethod
-    def update(self, id: int, user_update: UserUpdateModel) -> UserModel:
+    async def get_all_users_books_including_returned(
+        self, limit: int, cursor: str | None = None, user_id: int | None = None
+    ) -> PageModel[UserBooksModel]:
         pass
 
     @abstractmethod
-    def validate_email(self, email: str):
+    async def get_all_users_currently_borrowed_books(
+        self, limit: int, cursor: str | None = None, user_id: int | None = None
+    ) -> PageModel[UserBooksModel]:
         pass
 
     @abstractmethod
-    def rollback(self) -> None:
+    def stream_users_with_books(
+        self, include_returned: bool = True, user_id: int | None = None
+    ) -> AsyncIterator[UserBooksModel]:
         pass
 
     @abstractmethod
-    def close(self) -> None:
-        pass
\ No newline at end of file
+    async def update(self, id: int, user_update: UserUpdateModel) -> UserModel:
+        pass
+
+    @abstractmethod
+    def validate_email(self, email: str):
+        pass
+
+    @abstractmethod
+    async def rollback(self) -> None:
+        pass
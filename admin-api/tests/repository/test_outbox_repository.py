@@ -0,0 +1,51 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.repository.impl.outbox_repository import OutboxRepository
+from models.outbox_event_model import OutboxEventModel
+
+
+class TestOutboxRepository(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.mock_db: AsyncSession = MagicMock(spec=AsyncSession)
+        self.mock_db.execute = AsyncMock()
+        self.outbox_repository = OutboxRepository(db=self.mock_db)
+
+    @patch("database.repository.impl.outbox_repository.OUTBOX_INSERT_CHUNK_SIZE", 2)
+    async def test_save_all_inserts_in_chunks(self):
+        events = [
+            OutboxEventModel(topic="return-book", key=f"Book {i}", payload=[f"Book {i}"])
+            for i in range(5)
+        ]
+
+        await self.outbox_repository.save_all(events)
+
+        inserted_keys = [
+            [
+                value
+                for name, value in call.args[0].compile().params.items()
+                if name.startswith("key")
+            ]
+            for call in self.mock_db.execute.await_args_list
+        ]
+        self.assertEqual(
+            [["Book 0", "Book 1"], ["Book 2", "Book 3"], ["Book 4"]], inserted_keys
+        )
+
+    async def test_save_all_without_events_inserts_nothing(self):
+        await self.outbox_repository.save_all([])
+
+        self.mock_db.execute.assert_not_awaited()
+
+    async def test_get_pending_locks_the_oldest_events_in_id_order(self):
+        self.mock_db.execute.return_value = MagicMock()
+        self.mock_db.execute.return_value.all.return_value = []
+
+        await self.outbox_repository.get_pending(10)
+
+        statement = str(self.mock_db.execute.await_args.args[0])
+        self.assertIn("ORDER BY outbox_events.id", statement)
+        self.assertIn("FOR UPDATE", statement)
@@ -1,19 +1,20 @@
+import asyncio
 from datetime import date, timedelta
 import unittest
-from unittest.mock import MagicMock, AsyncMock
-
-from aiokafka import AIOKafkaProducer
+from unittest.mock import MagicMock
 
 from database.repository.meta.borrow_entry_repository_meta import (
     BorrowEntryRepositoryMeta,
 )
+from database.repository.meta.outbox_repository_meta import OutboxRepositoryMeta
 
 from models.borrow_entry_model import BorrowEntryModel
+from models.borrow_request_model import BorrowRequestModel
 from models.borrowed_book_model import BorrowedBookModel
 from service.impl.book_service import BookService
 from database.repository.meta.book_repository_meta import BookRepositoryMeta
 from models.book_model import BookModel
-from utils.custom_exceptions import ConflictException, NotFoundException
+from utils.custom_exceptions import BadRequestException, ConflictException, NotFoundException
 
 
 class TestBookService(unittest.IsolatedAsyncioTestCase):
@@ -50,110 +51,232 @@ class TestBookService(unittest.IsolatedAsyncioTestCase):
         self.mock_borrow_entry_repository: BorrowEntryRepositoryMeta = MagicMock(
             spec=BorrowEntryRepositoryMeta
         )
-        self.mock_kafka_producer: AIOKafkaProducer = AsyncMock(spec=AIOKafkaProducer)
+        self.mock_outbox_repository: OutboxRepositoryMeta = MagicMock(
+            spec=OutboxRepositoryMeta
+        )
+
+        # Coalesced reads run on a session of their own
+        self.mock_book_repository.with_session.return_value = self.mock_book_repository
 
         self.book_service = BookService(
             self.mock_book_repository,
             self.mock_borrow_entry_repository,
-            self.mock_kafka_producer,
+            self.mock_outbox_repository,
         )
 
     async def test_add_book_returns_book(self):
         book_to_add = self.mock_book
         self.mock_book_repository.save.return_value = book_to_add
-        self.mock_kafka_producer.send_and_wait.return_value = None
 
         result = await self.book_service.add(book_to_add)
 
         self.assertEqual(book_to_add, result)
+        self.mock_outbox_repository.save.assert_called_once()
 
     async def test_remove_book_returns_book(self):
         book_to_remove = self.mock_book
+        self.mock_borrow_entry_repository.get_unreturned_entry_by_book_id.return_value = (
+            None
+        )
         self.mock_book_repository.remove.return_value = book_to_remove
-        self.mock_kafka_producer.send_and_wait.return_value = None
 
         result = await self.book_service.remove_book(book_to_remove.id)
 
         self.assertEqual(book_to_remove, result)
 
     async def test_remove_invalid_book_raises_not_found_exception(self):
+        self.mock_borrow_entry_repository.get_unreturned_entry_by_book_id.return_value = (
+            None
+        )
         self.mock_book_repository.remove.return_value = None
-        self.mock_kafka_producer.send_and_wait.return_value = None
 
         with self.assertRaises(NotFoundException):
             await self.book_service.remove_book(2)
 
-    def test_find_book_by_id_returns_book(self):
+    async def test_find_book_by_id_returns_book(self):
         book = self.mock_book
         self.mock_book_repository.get_by_id.return_value = book
 
-        result = self.book_service.get_by_id(book.id)
+        result = await self.book_service.get_by_id(book.id)
 
         self.assertEqual(book, result)
 
-    def test_find_book_by_title_returns_book(self):
+    async def test_find_book_by_title_returns_book(self):
         book = self.mock_book
         self.mock_book_repository.get_by_title.return_value = book
 
-        result = self.book_service.get_by_title(book.title)
+        result = await self.book_service.get_by_title(book.title)
 
         self.assertEqual(book, result)
 
-    def test_find_all_books_returns_list_of_books(self):
+    async def test_find_all_books_returns_list_of_books(self):
         book = self.mock_book
         self.mock_book_repository.get_all.return_value = [book]
 
-        result = self.book_service.get_all()
+        result = await self.book_service.get_all(10)
+
+        self.assertEqual([book], result.items)
+        self.assertIsNone(result.next_cursor)
+
+    async def test_find_all_books_with_more_rows_returns_next_cursor(self):
+        first_book = self.mock_book
+        second_book = self.mock_book.model_copy(update={"id": 2})
+        self.mock_book_repository.get_all.return_value = [first_book, second_book]
+
+        page = await self.book_service.get_all(1)
+        await self.book_service.get_all(1, page.next_cursor)
 
-        self.assertEqual([book], result)
+        self.assertEqual([first_book], page.items)
+        self.mock_book_repository.get_all.assert_called_with(2, first_book.id)
 
-    def test_find_borrowed_books_returns_list_of_borrowed_books(self):
+    async def test_find_all_books_with_invalid_cursor_raises_bad_request_exception(self):
+        with self.assertRaises(BadRequestException):
+            await self.book_service.get_all(10, "not-a-cursor")
+
+    async def test_find_borrowed_books_returns_list_of_borrowed_books(self):
         borrowed_book = self.mock_borrowed_book
         self.mock_book_repository.get_all_borrowed.return_value = [borrowed_book]
 
-        result = self.book_service.get_all_borrowed()
+        result = await self.book_service.get_all_borrowed(10)
+
+        self.assertEqual([borrowed_book], result.items)
+
+    async def test_concurrent_find_borrowed_books_share_one_query(self):
+        borrowed_book = self.mock_borrowed_book
+
+        async def get_all_borrowed(limit, after_id):
+            await asyncio.sleep(0)
+            return [borrowed_book]
+
+        self.mock_book_repository.get_all_borrowed.side_effect = get_all_borrowed
+
+        results = await asyncio.gather(
+            *(self.book_service.get_all_borrowed(10) for _ in range(5))
+        )
+
+        self.assertEqual([[borrowed_book]] * 5, [result.items for result in results])
+        self.mock_book_repository.get_all_borrowed.assert_called_once_with(11, 0)
+
+    async def test_cancelled_first_caller_does_not_fail_the_others(self):
+        book = self.mock_book
+        released = asyncio.Event()
+
+        async def get_all(limit, after_id):
+            await released.wait()
+            return [book]
+
+        self.mock_book_repository.get_all.side_effect = get_all
+
+        first = asyncio.create_task(self.book_service.get_all(10))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(self.book_service.get_all(10))
+        await asyncio.sleep(0)
+        first.cancel()
+        released.set()
+
+        self.assertEqual([book], (await second).items)
+        self.mock_book_repository.get_all.assert_called_once_with(11, 0)
+
+    async def test_concurrent_find_all_books_share_failure(self):
+        async def get_all(limit, after_id):
+            await asyncio.sleep(0)
+            raise RuntimeError("connection lost")
+
+        self.mock_book_repository.get_all.side_effect = get_all
+
+        results = await asyncio.gather(
+            *(self.book_service.get_all(10) for _ in range(3)), return_exceptions=True
+        )
 
-        self.assertEqual([borrowed_book], result)
+        self.assertTrue(all(isinstance(result, Exception) for result in results))
+        self.mock_book_repository.get_all.assert_called_once()
 
-    def test_book_not_found_raises_not_found_exception(self):
+    async def test_book_not_found_raises_not_found_exception(self):
         self.mock_book_repository.get_by_id.return_value = None
 
         with self.assertRaises(NotFoundException):
-            self.book_service.get_by_id(2)
+            await self.book_service.get_by_id(2)
 
-    def test_borrow_book_calls_borrow_entry_save(self):
+    async def test_borrow_book_calls_borrow_entry_save(self):
         book = self.mock_book
         self.mock_book_repository.get_by_title.return_value = book
-        self.mock_borrow_entry_repository.get_unreturned_entry_by_book_id.return_value = (
-            None
-        )
+        self.mock_borrow_entry_repository.save.return_value = self.mock_borrow_entry
 
-        self.book_service.borrow_book(book.title, 1, 1)
+        await self.book_service.borrow_book(book.title, 1, 1)
 
         self.mock_borrow_entry_repository.save.assert_called_once()
 
-    def test_borrow_book_with_existing_unreturned_entry_raises_conflict_exception(self):
+    async def test_borrow_book_with_existing_unreturned_entry_raises_conflict_exception(self):
         book = self.mock_book
-        borrow_entry = self.mock_borrow_entry
         self.mock_book_repository.get_by_title.return_value = book
-        self.mock_borrow_entry_repository.get_unreturned_entry_by_book_id.return_value = (
-            borrow_entry
-        )
+        self.mock_borrow_entry_repository.save.return_value = None
 
         with self.assertRaises(ConflictException):
-            self.book_service.borrow_book(book.title, 1, 1)
+            await self.book_service.borrow_book(book.title, 1, 1)
 
-    def test_borrow_invalid_book_raises_not_found_exception(self):
+    async def test_borrow_invalid_book_raises_not_found_exception(self):
         self.mock_book_repository.get_by_title.return_value = None
-        self.mock_kafka_producer.send_and_wait.return_value = None
 
         with self.assertRaises(NotFoundException):
-            self.book_service.borrow_book("Test book", 1, 1)
+            await self.book_service.borrow_book("Test book", 1, 1)
+
+    async def test_borrow_books_saves_all_entries_at_once(self):
+        book = self.mock_book
+        other_book = BookModel(
+            id=2, title="Other Book", publisher="Publisher", category="Category"
+        )
+        self.mock_book_repository.get_all_by_titles.return_value = [book, other_book]
+        self.mock_borrow_entry_repository.get_unreturned_book_ids.return_value = []
+        self.mock_borrow_entry_repository.save_all.return_value = [
+            self.mock_borrow_entry,
+            self.mock_borrow_entry.model_copy(update={"id": 2, "book_id": 2}),
+        ]
+
+        results = await self.book_service.borrow_books(
+            [
+                BorrowRequestModel(book_title=book.title, user_id=1, borrow_duration_days=1),
+                BorrowRequestModel(book_title=other_book.title, user_id=1, borrow_duration_days=1),
+            ]
+        )
+
+        self.mock_borrow_entry_repository.save_all.assert_called_once()
+        self.assertEqual(2, len(self.mock_borrow_entry_repository.save_all.call_args.args[0]))
+        self.assertTrue(all(result.error is None for result in results))
+
+    async def test_borrow_books_reports_missing_and_borrowed_books(self):
+        book = self.mock_book
+        self.mock_book_repository.get_all_by_titles.return_value = [book]
+        self.mock_borrow_entry_repository.get_unreturned_book_ids.return_value = [book.id]
+
+        results = await self.book_service.borrow_books(
+            [
+                BorrowRequestModel(book_title=book.title, user_id=1, borrow_duration_days=1),
+                BorrowRequestModel(book_title="Missing Book", user_id=1, borrow_duration_days=1),
+            ]
+        )
+
+        self.assertEqual(["Book Already borrowed", "Book not found"], [result.error for result in results])
+        self.mock_borrow_entry_repository.save_all.assert_not_called()
+
+    async def test_borrow_books_reports_entries_rejected_on_insert(self):
+        book = self.mock_book
+        self.mock_book_repository.get_all_by_titles.return_value = [book]
+        self.mock_borrow_entry_repository.get_unreturned_book_ids.return_value = []
+        self.mock_borrow_entry_repository.save_all.return_value = []
+
+        results = await self.book_service.borrow_books(
+            [
+                BorrowRequestModel(book_title=book.title, user_id=1, borrow_duration_days=1),
+                BorrowRequestModel(book_title=book.title, user_id=2, borrow_duration_days=1),
+            ]
+        )
+
+        self.assertEqual(1, len(self.mock_borrow_entry_repository.save_all.call_args.args[0]))
+        self.assertEqual(["Book Already borrowed", "Book Already borrowed"], [result.error for result in results])
 
     async def test_return_invalid_book_raises_not_found_exception(self):
         self.mock_book_repository.get_by_id.return_value = None
         self.mock_borrow_entry_repository.update_return_status.return_value = None
-        self.mock_kafka_producer.send_and_wait.return_value = None
 
         with self.assertRaises(NotFoundException):
             await self.book_service.return_book(2)
@@ -166,12 +289,38 @@ class TestBookService(unittest.IsolatedAsyncioTestCase):
         self.mock_borrow_entry_repository.update_return_status.return_value = (
             borrow_entry
         )
-        self.mock_kafka_producer.send_and_wait.return_value = None
 
         await self.book_service.return_book(1)
 
         self.mock_borrow_entry_repository.update_return_status.assert_called_once()
 
-    def test_rollback_calls_repository_rollback(self):
-        self.book_service.rollback()
+    async def test_return_all_due_saves_an_event_keyed_by_each_title(self):
+        titles = ["Book 1", "Book 2"]
+        self.mock_borrow_entry_repository.return_all_due.return_value = titles
+
+        result = await self.book_service.return_all_due()
+
+        self.assertEqual(titles, result)
+        self.mock_outbox_repository.save_all.assert_awaited_once()
+        events = self.mock_outbox_repository.save_all.await_args.args[0]
+        self.assertEqual(titles, [event.key for event in events])
+        self.assertEqual([[title] for title in titles], [event.payload for event in events])
+
+    async def test_return_all_due_returns_only_the_given_shard(self):
+        self.mock_borrow_entry_repository.return_all_due.return_value = []
+
+        await self.book_service.return_all_due(3, 1)
+
+        self.mock_borrow_entry_repository.return_all_due.assert_awaited_once_with(3, 1)
+
+    async def test_return_all_due_with_nothing_due_publishes_nothing(self):
+        self.mock_borrow_entry_repository.return_all_due.return_value = []
+
+        await self.book_service.return_all_due()
+
+        self.mock_outbox_repository.save.assert_not_called()
+        self.assertFalse(self.mock_outbox_repository.save_all.await_args.args[0])
+
+    async def test_rollback_calls_repository_rollback(self):
+        await self.book_service.rollback()
         self.mock_book_repository.rollback.assert_called_once()
@@ -1,3 +1,4 @@
+import asyncio
 import unittest
 from unittest.mock import MagicMock
 from datetime import date, datetime, timedelta
@@ -43,17 +44,38 @@ class TestUserService(unittest.IsolatedAsyncioTestCase):
         )
 
         self.mock_repository: UserRepositoryMeta = MagicMock(spec=UserRepositoryMeta)
+        # Coalesced reads run on a session of their own
+        self.mock_repository.with_session.return_value = self.mock_repository
         self.user_service = UserService(self.mock_repository)
 
-    def test_add_user_returns_user(self):
+    async def test_add_user_returns_user(self):
         user_to_add = self.mock_user
         self.mock_repository.save.return_value = user_to_add
 
-        result = self.user_service.add(user_to_add)
+        result = await self.user_service.add(user_to_add)
 
         self.assertEqual(user_to_add, result)
 
-    def test_add_user_with_invalid_email_raises_bad_request_exception(self):
+    async def test_add_all_users_skips_invalid_emails(self):
+        user = self.mock_user
+        invalid_user = user.model_copy(update={"email": "not-an-email"})
+        self.mock_repository.save_all.return_value = [user]
+
+        result = await self.user_service.add_all([user, invalid_user])
+
+        self.assertEqual([user], result)
+        saved_users = self.mock_repository.save_all.call_args.args[0]
+        self.assertEqual([user.email], [saved.email for saved in saved_users])
+
+    async def test_add_all_users_with_no_valid_users_skips_repository(self):
+        invalid_user = self.mock_user.model_copy(update={"email": "not-an-email"})
+
+        result = await self.user_service.add_all([invalid_user])
+
+        self.assertEqual([], result)
+        self.mock_repository.save_all.assert_not_called()
+
+    async def test_add_user_with_invalid_email_raises_bad_request_exception(self):
         user_to_add = UserModel(
             id=1,
             email="bad_email",
@@ -63,71 +85,112 @@ class TestUserService(unittest.IsolatedAsyncioTestCase):
         )
 
         with self.assertRaises(BadRequestException):
-            self.user_service.add(user_to_add)
+            await self.user_service.add(user_to_add)
 
-    def test_find_user_by_id_returns_user(self):
+    async def test_find_user_by_id_returns_user(self):
         user = self.mock_user
         self.mock_repository.get_by_id.return_value = user
 
-        result = self.user_service.get_by_id(user.id)
+        result = await self.user_service.get_by_id(user.id)
 
         self.assertEqual(user, result)
 
-    def test_find_invalid_user_by_id_raises_not_found_exception(self):
+    async def test_find_invalid_user_by_id_raises_not_found_exception(self):
         self.mock_repository.get_by_id.return_value = None
 
         with self.assertRaises(NotFoundException):
-            self.user_service.get_by_id(2)
+            await self.user_service.get_by_id(2)
 
-    def test_find_user_by_email_returns_user(self):
+    async def test_find_user_by_email_returns_user(self):
         user = self.mock_user
         self.mock_repository.get_by_email.return_value = user
 
-        result = self.user_service.get_by_email(user.email)
+        result = await self.user_service.get_by_email(user.email)
 
         self.assertEqual(user, result)
 
-    def test_find_invalid_user_by_id_raises_not_found_exception(self):
+    async def test_find_invalid_user_by_id_raises_not_found_exception(self):
         self.mock_repository.get_by_email.return_value = None
 
         with self.assertRaises(NotFoundException):
-            self.user_service.get_by_email(2)
+            await self.user_service.get_by_email(2)
 
-    def test_find_all_users_returns_list_of_users(self):
+    async def test_find_users_by_emails_returns_list_of_users(self):
         user = self.mock_user
-        self.mock_repository.get_all.return_value = [user]
+        self.mock_repository.get_all_by_emails.return_value = [user]
 
-        result = self.user_service.get_all_users()
+        result = await self.user_service.get_all_by_emails([user.email])
 
         self.assertEqual([user], result)
+        self.mock_repository.get_all_by_emails.assert_called_once_with([user.email])
+
+    async def test_find_all_users_returns_list_of_users(self):
+        user = self.mock_user
+        self.mock_repository.get_all.return_value = [user]
+
+        result = await self.user_service.get_all_users(10)
+
+        self.assertEqual([user], result.items)
+
+    async def test_concurrent_find_all_users_share_one_query(self):
+        user = self.mock_user
+
+        async def get_all(limit, after_id):
+            await asyncio.sleep(0)
+            return [user]
+
+        self.mock_repository.get_all.side_effect = get_all
+
+        results = await asyncio.gather(
+            self.user_service.get_all_users(10), self.user_service.get_all_users(10)
+        )
+        await self.user_service.get_all_users(10)
+
+        self.assertEqual([[user], [user]], [result.items for result in results])
+        # The call made once the first completed runs its own query
+        self.assertEqual(2, self.mock_repository.get_all.call_count)
 
-    def test_find_all_users_books_currently_borrowed_returns_list_of_users_books(self):
+    async def test_find_all_users_books_currently_borrowed_returns_list_of_users_books(self):
         user_books = self.mock_user_books
         self.mock_repository.get_all_users_with_currently_borrowed_books.return_value = [
             user_books
         ]
 
-        result = self.user_service.get_all_users_currently_borrowed_books()
+        result = await self.user_service.get_all_users_currently_borrowed_books(10)
 
-        self.assertEqual([user_books], result)
+        self.assertEqual([user_books], result.items)
         
-    def test_find_all_users_books_including_returned_book_returns_list_of_users_books(self):
+    async def test_find_all_users_books_including_returned_book_returns_list_of_users_books(self):
         user_books = self.mock_user_books
         self.mock_repository.get_all_books_including_returned.return_value = [
             user_books
         ]
 
-        result = self.user_service.get_all_users_books_including_returned()
+        result = await self.user_service.get_all_users_books_including_returned(10)
 
-        self.assertEqual([user_books], result)
+        self.assertEqual([user_books], result.items)
+
+    async def test_find_users_books_for_single_user_passes_user_filter(self):
+        user_books = self.mock_user_books
+        self.mock_repository.get_all_books_including_returned.return_value = [
+            user_books
+        ]
+
+        await self.user_service.get_all_users_books_including_returned(
+            10, user_id=user_books.id
+        )
+
+        self.mock_repository.get_all_books_including_returned.assert_called_with(
+            11, 0, user_books.id
+        )
 
-    def test_find_invalid_user_by_id_raises_not_found_exception(self):
+    async def test_find_invalid_user_by_id_raises_not_found_exception(self):
         self.mock_repository.get_by_id.return_value = None
 
         with self.assertRaises(NotFoundException):
-            self.user_service.get_by_id(2)
+            await self.user_service.get_by_id(2)
 
-    def test_update_user_calls_update_method_with_update_model(self):
+    async def test_update_user_calls_update_method_with_update_model(self):
         user = self.mock_user
         self.mock_repository.update.return_value = user
 
@@ -135,11 +198,11 @@ class TestUserService(unittest.IsolatedAsyncioTestCase):
             email="newemail@example.com", firstname="Jane", lastname="Doe"
         )
 
-        self.user_service.update(user.id, update_model)
+        await self.user_service.update(user.id, update_model)
 
         self.mock_repository.update.assert_called_with(user.id, update_model)
 
-    def test_update_invalid_user_raises_not_found_exception(self):
+    async def test_update_invalid_user_raises_not_found_exception(self):
         self.mock_repository.update.return_value = None
 
         update_model = UserUpdateModel(
@@ -147,8 +210,8 @@ class TestUserService(unittest.IsolatedAsyncioTestCase):
         )
 
         with self.assertRaises(NotFoundException):
-            self.user_service.update(2, update_model)
+            await self.user_service.update(2, update_model)
 
-    def test_rollback_calls_repository_rollback(self):
-        self.user_service.rollback()
+    async def test_rollback_calls_repository_rollback(self):
+        await self.user_service.rollback()
         self.mock_repository.rollback.assert_called_once()
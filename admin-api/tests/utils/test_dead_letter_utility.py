@@ -0,0 +1,105 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from aiokafka import AIOKafkaConsumer, AIOKafkaProducer, TopicPartition
+
+from tests.utils import make_message
+from utils.constants import ORIGINAL_TOPIC_HEADER
+from utils.dead_letter_utility import DEAD_LETTER_TOPICS, read_dead_letters
+
+
+class TestReadDeadLetters(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.topic = DEAD_LETTER_TOPICS[0]
+        self.tp = TopicPartition(self.topic, 0)
+        self.messages = [
+            make_message(
+                f"value {offset}".encode(),
+                key=b"key",
+                topic=self.topic,
+                offset=offset,
+                headers=[(ORIGINAL_TOPIC_HEADER, b"test-topic")],
+            )
+            for offset in (3, 4)
+        ]
+        self.positions = {}
+
+        self.mock_producer: AIOKafkaProducer = MagicMock(spec=AIOKafkaProducer)
+        self.mock_producer.partitions_for = AsyncMock(return_value={0})
+        self.mock_producer.send = AsyncMock(side_effect=self.send)
+        self.sent = []
+
+        self.mock_consumer: AIOKafkaConsumer = MagicMock(spec=AIOKafkaConsumer)
+        self.mock_consumer.end_offsets = AsyncMock(
+            side_effect=lambda partitions: {
+                tp: 5 if tp == self.tp else 0 for tp in partitions
+            }
+        )
+        self.mock_consumer.position = AsyncMock(
+            side_effect=lambda tp: self.positions.get(tp, 3 if tp == self.tp else 0)
+        )
+        self.mock_consumer.getmany = AsyncMock(side_effect=self.getmany)
+        patcher = patch(
+            "utils.dead_letter_utility.AIOKafkaConsumer",
+            return_value=self.mock_consumer,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def getmany(self, tp, timeout_ms, max_records):
+        self.positions[tp] = 5
+        return {tp: self.messages[:max_records]}
+
+    async def send(self, topic, value, key=None):
+        delivery = asyncio.get_running_loop().create_future()
+        self.sent.append((topic, value, key, delivery))
+        return delivery
+
+    async def test_read_returns_dead_letters_without_committing(self):
+        messages = await read_dead_letters(10, producer=self.mock_producer)
+
+        self.assertEqual(self.messages, messages)
+        self.mock_producer.send.assert_not_called()
+        self.mock_consumer.commit.assert_not_called()
+        self.mock_consumer.stop.assert_awaited_once()
+
+    async def test_read_stops_at_the_limit(self):
+        messages = await read_dead_letters(1, producer=self.mock_producer)
+
+        self.assertEqual(self.messages[:1], messages)
+
+    async def test_replay_republishes_and_then_commits_the_group_offset(self):
+        replay = asyncio.create_task(
+            read_dead_letters(10, replay=True, producer=self.mock_producer)
+        )
+        while len(self.sent) < 2:
+            await asyncio.sleep(0)
+
+        self.assertEqual(
+            [("test-topic", b"value 3", b"key"), ("test-topic", b"value 4", b"key")],
+            [sent[:3] for sent in self.sent],
+        )
+        self.mock_consumer.commit.assert_not_called()
+
+        for *_, delivery in self.sent:
+            delivery.set_result(None)
+        await replay
+
+        self.mock_consumer.commit.assert_awaited_once_with({self.tp: 5})
+
+    async def test_failed_replay_commits_nothing(self):
+        replay = asyncio.create_task(
+            read_dead_letters(10, replay=True, producer=self.mock_producer)
+        )
+        while len(self.sent) < 2:
+            await asyncio.sleep(0)
+
+        self.sent[0][3].set_result(None)
+        self.sent[1][3].set_exception(Exception("broker unavailable"))
+        with self.assertRaises(Exception):
+            await replay
+
+        self.mock_consumer.commit.assert_not_called()
+        self.mock_consumer.stop.assert_awaited_once()
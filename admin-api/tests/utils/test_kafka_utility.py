@@ -0,0 +1,272 @@
+import asyncio
+import json
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from aiokafka import AIOKafkaConsumer, TopicPartition
+from pydantic import ValidationError
+
+from models.borrow_details_model import BorrowDetailsModel
+from models.event_envelope_model import EventEnvelopeModel
+from models.frontend_event_model import (
+    BookBorrowedEventModel,
+    UserCreatedEventModel,
+    UserUpdatedEventModel,
+)
+from models.user_model import UserModel
+from models.user_update_model import UserUpdateModel
+from tests.utils import make_message
+from utils.constants import (
+    BOOK_BORROWED_EVENT,
+    EVENT_SCHEMA_VERSION,
+    USER_CREATED_EVENT,
+    USER_UPDATED_EVENT,
+)
+from utils.kafka_utility import (
+    group_messages,
+    handle_concurrently,
+    kafka_deseriaizer,
+    kafka_seriaizer,
+)
+from utils.lifespan_utility import consume_front_end_updates, handle_front_end_updates
+
+
+def frontend_events() -> list:
+    return [
+        UserCreatedEventModel(
+            type=USER_CREATED_EVENT,
+            payload=[
+                UserModel(
+                    email="user@example.com",
+                    firstname="John",
+                    lastname="Doe",
+                    joined_on=datetime.now(),
+                )
+            ],
+        ),
+        UserUpdatedEventModel(
+            type=USER_UPDATED_EVENT,
+            payload=[UserUpdateModel(email="user@example.com", firstname="Jane")],
+        ),
+        BookBorrowedEventModel(
+            type=BOOK_BORROWED_EVENT,
+            payload=[
+                BorrowDetailsModel(
+                    book_title="Test Book",
+                    user_email="user@example.com",
+                    borrow_duration_days=7,
+                )
+            ],
+        ),
+    ]
+
+
+class TestEventEnvelope(unittest.TestCase):
+
+    def test_every_event_type_round_trips(self):
+        for event in frontend_events():
+            with self.subTest(event.type):
+                decoded = kafka_deseriaizer(kafka_seriaizer(event))
+
+                self.assertIsInstance(decoded, type(event))
+                self.assertEqual(event, decoded)
+
+    def test_envelope_is_decoded_to_the_payload_model_of_its_type(self):
+        value = kafka_seriaizer(
+            EventEnvelopeModel(
+                type=BOOK_BORROWED_EVENT,
+                payload=[
+                    {
+                        "book_title": "Test Book",
+                        "user_email": "user@example.com",
+                        "borrow_duration_days": 7,
+                    }
+                ],
+            )
+        )
+
+        event = kafka_deseriaizer(value)
+
+        self.assertIsInstance(event, BookBorrowedEventModel)
+        self.assertIsInstance(event.payload[0], BorrowDetailsModel)
+        self.assertEqual("Test Book", event.payload[0].book_title)
+
+    def test_unknown_event_type_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            kafka_deseriaizer(
+                kafka_seriaizer(EventEnvelopeModel(type="book.unknown", payload=[]))
+            )
+
+    def test_newer_schema_version_is_rejected(self):
+        value = kafka_seriaizer(
+            EventEnvelopeModel(
+                type=USER_UPDATED_EVENT,
+                schema_version=EVENT_SCHEMA_VERSION + 1,
+                payload=[],
+            )
+        )
+
+        with self.assertRaises(ValueError):
+            kafka_deseriaizer(value)
+
+    def test_forwarded_bytes_are_sent_as_received(self):
+        self.assertEqual(b"not json", kafka_seriaizer(b"not json"))
+
+
+class TestHandleFrontEndUpdates(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.mock_dead_letter = AsyncMock()
+        self.mock_handle_front_end_update = AsyncMock()
+        for target, value in [
+            ("utils.lifespan_utility.dead_letter", self.mock_dead_letter),
+            ("utils.lifespan_utility.handle_front_end_update", self.mock_handle_front_end_update),
+        ]:
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_messages_that_cannot_be_applied_are_set_aside(self):
+        event = frontend_events()[1]
+        newer = json.loads(kafka_seriaizer(event))
+        newer["schema_version"] = EVENT_SCHEMA_VERSION + 1
+        undecodable = make_message(b"not json", offset=0)
+        unsupported = make_message(json.dumps(newer).encode(), offset=1)
+        valid = make_message(kafka_seriaizer(event), offset=2)
+
+        await handle_front_end_updates({"tp": [undecodable, unsupported, valid]})
+
+        self.assertEqual(
+            [undecodable, unsupported],
+            [call.args[0] for call in self.mock_dead_letter.await_args_list],
+        )
+        self.mock_handle_front_end_update.assert_awaited_once_with(event)
+
+
+class TestHandleConcurrently(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.first_partition = TopicPartition("test-topic", 0)
+        self.second_partition = TopicPartition("test-topic", 1)
+        self.messages = {
+            self.first_partition: [
+                make_message(b"a1", key=b"a", offset=0),
+                make_message(b"b1", key=b"b", offset=1),
+                make_message(b"a2", key=b"a", offset=2),
+            ],
+            self.second_partition: [
+                make_message(b"c1", key=b"c", partition=1, offset=0),
+            ],
+        }
+
+    def values(self, groups: list) -> list:
+        return [
+            {tp: [message.value for message in batch] for tp, batch in group.items()}
+            for group in groups
+        ]
+
+    def test_groups_by_partition(self):
+        self.assertEqual(
+            [
+                {self.first_partition: [b"a1", b"b1", b"a2"]},
+                {self.second_partition: [b"c1"]},
+            ],
+            self.values(group_messages(self.messages)),
+        )
+
+    def test_groups_by_key_in_order_within_each_key(self):
+        self.assertEqual(
+            [
+                {self.first_partition: [b"a1", b"a2"]},
+                {self.first_partition: [b"b1"]},
+                {self.second_partition: [b"c1"]},
+            ],
+            self.values(group_messages(self.messages, by_key=True)),
+        )
+
+    @patch("utils.kafka_utility.KAFKA_CONSUMER_MAX_CONCURRENCY", 2)
+    async def test_runs_at_most_the_max_concurrency_of_groups_at_once(self):
+        messages = {
+            TopicPartition("test-topic", partition): [make_message(b"value", partition=partition)]
+            for partition in range(5)
+        }
+        running, max_running, handled = 0, 0, []
+
+        async def handler(group: dict) -> None:
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            handled.append(group)
+
+        await handle_concurrently(messages, handler)
+
+        self.assertEqual(2, max_running)
+        self.assertEqual(5, len(handled))
+
+    async def test_first_group_failure_is_raised_once_every_group_has_run(self):
+        handled = []
+
+        async def handler(group: dict) -> None:
+            values = [message.value for batch in group.values() for message in batch]
+            handled.append(values)
+            if b"a1" in values:
+                raise ValueError("a failed")
+            if b"b1" in values:
+                raise KeyError("b failed")
+
+        with self.assertRaises(ValueError):
+            await handle_concurrently(self.messages, handler, by_key=True)
+
+        self.assertEqual([[b"a1", b"a2"], [b"b1"], [b"c1"]], handled)
+
+
+class TestConsumeUpdates(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.tp = TopicPartition("test-topic", 0)
+        self.messages = {
+            self.tp: [
+                make_message(b"value", key=b"key", offset=offset) for offset in (5, 6)
+            ]
+        }
+        self.fetched = asyncio.Event()
+        self.mock_consumer: AIOKafkaConsumer = MagicMock(spec=AIOKafkaConsumer)
+        self.mock_consumer.assignment.return_value = {self.tp}
+        self.mock_consumer.paused.return_value = set()
+        self.mock_consumer.getmany = AsyncMock(side_effect=self.getmany)
+        self.mock_handler = AsyncMock()
+        patcher = patch("utils.lifespan_utility.handle_front_end_updates", self.mock_handler)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def getmany(self, timeout_ms, max_records):
+        if self.fetched.is_set():
+            await asyncio.Event().wait()
+        self.fetched.set()
+        return self.messages
+
+    async def consume_one_fetch(self) -> None:
+        task = asyncio.create_task(consume_front_end_updates(self.mock_consumer))
+        await self.fetched.wait()
+        while not (self.mock_consumer.commit.called or self.mock_consumer.seek.called):
+            await asyncio.sleep(0)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+    async def test_applied_fetch_is_committed(self):
+        await self.consume_one_fetch()
+
+        self.mock_consumer.commit.assert_awaited_once()
+        self.mock_consumer.seek.assert_not_called()
+
+    async def test_failed_fetch_is_rewound_instead_of_committed(self):
+        self.mock_handler.side_effect = Exception("failed")
+
+        await self.consume_one_fetch()
+
+        self.mock_consumer.commit.assert_not_called()
+        self.mock_consumer.seek.assert_called_once_with(self.tp, 5)
@@ -0,0 +1,122 @@
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.repository.meta.processed_event_repository_meta import (
+    ProcessedEventRepositoryMeta,
+)
+from models.event_envelope_model import EventEnvelopeModel
+from models.frontend_event_model import UserCreatedEventModel
+from models.user_model import UserModel
+from utils.constants import USER_CREATED_EVENT
+from utils.lifespan_utility import handle_front_end_update
+from utils.processed_event_utility import claim_events
+
+
+class TestClaimEvents(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.mock_session: AsyncSession = MagicMock(spec=AsyncSession)
+        self.mock_processed_event_repository: ProcessedEventRepositoryMeta = MagicMock(
+            spec=ProcessedEventRepositoryMeta
+        )
+        patcher = patch(
+            "utils.processed_event_utility.ProcessedEventRepository",
+            return_value=self.mock_processed_event_repository,
+        )
+        self.mock_repository_class = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_claim_skips_events_already_processed(self):
+        processed = EventEnvelopeModel(type="test", payload=[])
+        new = EventEnvelopeModel(type="test", payload=[])
+        # Ids already in processed_events are left out of what add_all returns
+        self.mock_processed_event_repository.add_all.return_value = [new.event_id]
+
+        result = await claim_events(self.mock_session, [processed, new])
+
+        self.assertEqual([new], result)
+        self.mock_repository_class.assert_called_once_with(db=self.mock_session)
+        self.mock_processed_event_repository.add_all.assert_awaited_once_with(
+            [processed.event_id, new.event_id]
+        )
+
+    async def test_claim_applies_an_event_repeated_in_a_fetch_once(self):
+        event = EventEnvelopeModel(type="test", payload=[])
+        self.mock_processed_event_repository.add_all.return_value = [event.event_id]
+
+        result = await claim_events(self.mock_session, [event, event.model_copy()])
+
+        self.assertEqual([event], result)
+
+    async def test_claim_without_events_claims_nothing(self):
+        self.assertEqual([], await claim_events(self.mock_session, []))
+        self.mock_processed_event_repository.add_all.assert_not_called()
+
+
+class TestHandleFrontEndUpdate(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.event = UserCreatedEventModel(
+            type=USER_CREATED_EVENT,
+            event_id=uuid4(),
+            payload=[
+                UserModel(
+                    email="user@example.com",
+                    firstname="John",
+                    lastname="Doe",
+                    joined_on=datetime.now(),
+                )
+            ],
+        )
+        self.mock_session: AsyncSession = MagicMock(spec=AsyncSession)
+        self.mock_session.commit = AsyncMock()
+        self.mock_session.rollback = AsyncMock()
+        self.mock_session.close = AsyncMock()
+        self.mock_processed_event_repository: ProcessedEventRepositoryMeta = MagicMock(
+            spec=ProcessedEventRepositoryMeta
+        )
+        self.mock_processed_event_repository.add_all.return_value = [self.event.event_id]
+        self.mock_handle_create_user_message = AsyncMock()
+        for target, value in [
+            ("database.schema.database.create_session", MagicMock(return_value=self.mock_session)),
+            (
+                "utils.processed_event_utility.ProcessedEventRepository",
+                MagicMock(return_value=self.mock_processed_event_repository),
+            ),
+            ("utils.lifespan_utility.handle_create_user_message", self.mock_handle_create_user_message),
+        ]:
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_claim_commits_with_the_applied_event(self):
+        await handle_front_end_update(self.event)
+
+        self.mock_handle_create_user_message.assert_awaited_once_with(
+            self.mock_session, self.event.payload
+        )
+        self.mock_session.commit.assert_awaited_once()
+        self.mock_session.rollback.assert_not_called()
+
+    async def test_claim_rolls_back_with_a_failed_apply(self):
+        self.mock_handle_create_user_message.side_effect = Exception("failed")
+
+        with self.assertRaises(Exception):
+            await handle_front_end_update(self.event)
+
+        self.mock_processed_event_repository.add_all.assert_awaited_once_with(
+            [self.event.event_id]
+        )
+        self.mock_session.rollback.assert_awaited_once()
+        self.mock_session.commit.assert_not_called()
+
+    async def test_processed_event_is_not_applied_again(self):
+        self.mock_processed_event_repository.add_all.return_value = []
+
+        await handle_front_end_update(self.event)
+
+        self.mock_handle_create_user_message.assert_not_called()
@@ -0,0 +1,175 @@
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from aiokafka import AIOKafkaConsumer, AIOKafkaProducer, TopicPartition
+
+from tests.utils import make_message
+from utils.constants import (
+    ERROR_HEADER,
+    ORIGINAL_TOPIC_HEADER,
+    RETRY_AT_HEADER,
+    RETRY_ATTEMPT_HEADER,
+)
+from utils.environment import KAFKA_RETRY_ATTEMPTS, KAFKA_RETRY_BACKOFF_MS
+from utils.flow_control_utility import ConsumerFlowControl
+from utils.kafka_utility import kafka_producer
+from utils.retry_utility import (
+    KeyRetries,
+    resume_partition,
+    retry_later,
+    take_due_messages,
+)
+
+NOW_MS = 1_000_000
+
+
+def retried_message(attempt: int, retry_at: int = 0, offset: int = 0, key: bytes = b"key"):
+    return make_message(
+        b"value",
+        key=key,
+        topic=f"test-topic.retry-{attempt}",
+        offset=offset,
+        headers=[
+            (ORIGINAL_TOPIC_HEADER, b"test-topic"),
+            (RETRY_ATTEMPT_HEADER, str(attempt).encode()),
+            (RETRY_AT_HEADER, str(retry_at).encode()),
+        ],
+    )
+
+
+class TestRetryLater(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.mock_producer: AIOKafkaProducer = MagicMock(spec=AIOKafkaProducer)
+        patcher = patch("utils.retry_utility.now_ms", return_value=NOW_MS)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sent(self):
+        args, kwargs = self.mock_producer.send_and_wait.await_args
+        return args[0], dict(kwargs["headers"])
+
+    async def test_first_failure_goes_to_the_first_retry_topic(self):
+        attempt = await retry_later(
+            make_message(b"value", key=b"key"), Exception("failed"), self.mock_producer
+        )
+
+        topic, headers = self.sent()
+        self.assertEqual(1, attempt)
+        self.assertEqual("test-topic.retry-1", topic)
+        self.assertEqual(b"test-topic", headers[ORIGINAL_TOPIC_HEADER])
+        self.assertEqual(b"1", headers[RETRY_ATTEMPT_HEADER])
+        self.assertEqual(str(NOW_MS + KAFKA_RETRY_BACKOFF_MS).encode(), headers[RETRY_AT_HEADER])
+        self.assertEqual(b"failed", headers[ERROR_HEADER])
+
+    async def test_retried_failure_goes_to_the_next_retry_topic_with_double_backoff(self):
+        attempt = await retry_later(retried_message(1), Exception("failed"), self.mock_producer)
+
+        topic, headers = self.sent()
+        self.assertEqual(2, attempt)
+        self.assertEqual("test-topic.retry-2", topic)
+        self.assertEqual(
+            str(NOW_MS + KAFKA_RETRY_BACKOFF_MS * 2).encode(), headers[RETRY_AT_HEADER]
+        )
+
+    async def test_failure_after_the_last_attempt_is_dead_lettered(self):
+        await retry_later(
+            retried_message(KAFKA_RETRY_ATTEMPTS), Exception("failed"), self.mock_producer
+        )
+
+        topic, headers = self.sent()
+        self.assertEqual("test-topic.dlq", topic)
+        self.assertEqual(str(KAFKA_RETRY_ATTEMPTS).encode(), headers[RETRY_ATTEMPT_HEADER])
+        self.assertNotIn(RETRY_AT_HEADER, headers)
+
+
+class TestKeyRetries(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        patcher = patch.object(kafka_producer, "send_and_wait", new_callable=AsyncMock)
+        self.mock_send_and_wait = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.key_retries = KeyRetries()
+
+    async def test_failed_key_holds_back_its_later_messages(self):
+        failed = retried_message(1, key=b"key")
+        later = retried_message(1, offset=1, key=b"key")
+        other = retried_message(1, offset=2, key=b"other")
+
+        await self.key_retries.retry_later(failed, Exception("failed"))
+
+        self.assertTrue(self.key_retries.has_failed(later))
+        self.assertFalse(self.key_retries.has_failed(other))
+
+        await self.key_retries.retry_behind(later)
+
+        topics = [call.args[0] for call in self.mock_send_and_wait.await_args_list]
+        self.assertEqual(["test-topic.retry-2", "test-topic.retry-2"], topics)
+
+    async def test_later_message_on_a_lower_attempt_follows_the_failed_one(self):
+        await self.key_retries.retry_later(retried_message(2), Exception("failed"))
+
+        await self.key_retries.retry_behind(make_message(b"value", key=b"key"))
+
+        self.assertEqual("test-topic.retry-3", self.mock_send_and_wait.await_args.args[0])
+
+
+class TestTakeDueMessages(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.tp = TopicPartition("test-topic.retry-1", 0)
+        self.mock_consumer: AIOKafkaConsumer = MagicMock(spec=AIOKafkaConsumer)
+        self.mock_consumer.assignment.return_value = {self.tp}
+        self.mock_loop = MagicMock()
+        self.flow_control = ConsumerFlowControl()
+        for target, value in [
+            ("utils.retry_utility.now_ms", MagicMock(return_value=NOW_MS)),
+            ("utils.retry_utility.asyncio.get_running_loop", MagicMock(return_value=self.mock_loop)),
+            ("utils.retry_utility.consumer_flow_control", self.flow_control),
+        ]:
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_due_messages_are_returned(self):
+        messages = {self.tp: [retried_message(1, NOW_MS - 1), retried_message(1, NOW_MS, 1)]}
+
+        self.assertEqual(messages, take_due_messages(self.mock_consumer, messages))
+        self.mock_consumer.pause.assert_not_called()
+
+    def test_partition_is_paused_at_the_first_message_not_due(self):
+        due = retried_message(1, NOW_MS - 1, 5)
+        messages = {self.tp: [due, retried_message(1, NOW_MS + 500, 6), retried_message(1, 0, 7)]}
+
+        self.assertEqual({self.tp: [due]}, take_due_messages(self.mock_consumer, messages))
+        self.mock_consumer.seek.assert_called_once_with(self.tp, 6)
+        self.mock_consumer.pause.assert_called_once_with(self.tp)
+        self.mock_loop.call_later.assert_called_once_with(
+            0.5, resume_partition, self.mock_consumer, self.tp
+        )
+
+    def test_partition_is_resumed_once_due(self):
+        resume_partition(self.mock_consumer, self.tp)
+
+        self.mock_consumer.resume.assert_called_once_with(self.tp)
+
+    def test_partition_given_away_is_not_resumed(self):
+        self.mock_consumer.assignment.return_value = set()
+
+        resume_partition(self.mock_consumer, self.tp)
+
+        self.mock_consumer.resume.assert_not_called()
+
+    def test_partition_stays_paused_while_flow_control_holds_back(self):
+        self.flow_control.resume_at = time.monotonic() + 60
+        self.mock_consumer.paused.return_value = {self.tp}
+
+        resume_partition(self.mock_consumer, self.tp)
+
+        self.mock_consumer.resume.assert_not_called()
+
+        self.flow_control.resume_at = 0.0
+        self.flow_control.update(self.mock_consumer)
+
+        self.mock_consumer.resume.assert_called_once_with(self.tp)
@@ -5,3 +5,36 @@ REQUEST_METHODS = ["GET", "POST", "PUT", "DELETE", "OPTIONS", "HEAD"]
 DOCS_URL = "" if APP_ENVIRONMENT.upper() in ["PRODUCTION", "PROD"] else "/openapi.json"
 DATABASE_LOG_LEVEL = "WARNING" if APP_ENVIRONMENT.upper() in ["PRODUCTION", "PROD"] else "DEBUG"
 
+KAFKA_CONSUMER_ERROR_BACKOFF_SECS = 1
+PROCESSED_EVENT_CLEANUP_INTERVAL_SECS = 3600
+LISTENER_RECONNECT_SECS = 1
+
+# Every committed catalog version is notified on this channel
+CATALOG_VERSION_CHANNEL = "catalog_versions"
+
+# Advisory lock ids of the scheduled jobs, only one instance runs each at a time
+RETURN_DUE_BOOKS_JOB_ID = 1
+PROCESSED_EVENT_CLEANUP_JOB_ID = 2
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 1000
+# Rows per INSERT when saving many outbox events, well under the bind parameter limit
+OUTBOX_INSERT_CHUNK_SIZE = 1000
+
+# Event types carried in the envelope of every Kafka message
+EVENT_SCHEMA_VERSION = 1
+BOOK_ADDED_EVENT = "book.added"
+BOOK_RETURNED_EVENT = "book.returned"
+BOOK_REMOVED_EVENT = "book.removed"
+BOOK_BORROWED_EVENT = "book.borrowed"
+USER_CREATED_EVENT = "user.created"
+USER_UPDATED_EVENT = "user.updated"
+
+# Failed messages are retried on "<topic>.retry-<attempt>" and finally dead-lettered
+# on "<topic>.dlq", with headers recording where they came from and why
+RETRY_TOPIC_SUFFIX = ".retry-"
+DEAD_LETTER_TOPIC_SUFFIX = ".dlq"
+ORIGINAL_TOPIC_HEADER = "original-topic"
+RETRY_ATTEMPT_HEADER = "retry-attempt"
+RETRY_AT_HEADER = "retry-at"
+ERROR_HEADER = "error"
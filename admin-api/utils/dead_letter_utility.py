@@ -0,0 +1,83 @@
+import asyncio
+from typing import List
+from aiokafka import AIOKafkaConsumer, AIOKafkaProducer, ConsumerRecord, TopicPartition
+
+from utils.environment import (
+    KAFKA_BOOTSTRAP_SERVERS,
+    KAFKA_CONSUMER_GROUP_ID,
+    KAFKA_CONSUMER_MAX_WAIT_MS,
+)
+from utils.kafka_utility import (
+    CONSUMED_TOPICS,
+    EVENT_TYPES,
+    dead_letter_topic,
+    kafka_producer,
+)
+from utils.retry_utility import get_original_topic
+
+# Updates that failed in either API, as both share the broker
+DEAD_LETTER_TOPICS = [
+    dead_letter_topic(topic) for topic in (*EVENT_TYPES, *CONSUMED_TOPICS)
+]
+
+
+async def read_dead_letters(
+    limit: int,
+    replay: bool = False,
+    producer: AIOKafkaProducer = kafka_producer,
+) -> List[ConsumerRecord]:
+    """
+    Reads up to limit dead letters, oldest first within each topic, starting
+    after the last ones replayed. When replaying, every message read is
+    published to its original topic again before the read position is
+    committed, so each one is replayed at least once.
+    """
+    partitions = [
+        TopicPartition(topic, partition)
+        for topic in DEAD_LETTER_TOPICS
+        for partition in sorted(await producer.partitions_for(topic))
+    ]
+
+    # Partitions are assigned rather than subscribed to, so reading never waits
+    # on a group rebalance. The group only keeps track of what was replayed
+    consumer = AIOKafkaConsumer(
+        bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS,
+        group_id=f"{KAFKA_CONSUMER_GROUP_ID}-dead-letters",
+        enable_auto_commit=False,
+        auto_offset_reset="earliest",
+    )
+    await consumer.start()
+    try:
+        consumer.assign(partitions)
+        end_offsets = await consumer.end_offsets(partitions)
+
+        messages: List[ConsumerRecord] = []
+        for tp in partitions:
+            while len(messages) < limit and await consumer.position(tp) < end_offsets[tp]:
+                batch = await consumer.getmany(
+                    tp,
+                    timeout_ms=KAFKA_CONSUMER_MAX_WAIT_MS,
+                    max_records=limit - len(messages),
+                )
+                if not batch:
+                    break
+                messages.extend(batch[tp])
+
+        if replay and messages:
+            deliveries = [
+                await producer.send(
+                    get_original_topic(message), message.value, key=message.key
+                )
+                for message in messages
+            ]
+            await asyncio.gather(*deliveries)
+            await consumer.commit(
+                {
+                    TopicPartition(message.topic, message.partition): message.offset + 1
+                    for message in messages
+                }
+            )
+
+        return messages
+    finally:
+        await consumer.stop()
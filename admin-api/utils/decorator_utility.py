@@ -2,7 +2,7 @@ from typing import Callable
 
 from fastapi import HTTPException, status
 
-from utils.custom_exceptions import ConflictException, NotFoundException
+from utils.custom_exceptions import BadRequestException, ConflictException, NotFoundException
 from utils.logger_utility import getlogger
 
 
@@ -11,6 +11,9 @@ def async_controller_exception_handler(controller_func: Callable) -> Callable:
         logger = getlogger(__name__)
         try:
             return await controller_func(*args, **kwargs)
+        except BadRequestException as e:
+            logger.info(e)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         except NotFoundException as e:
             logger.info(e)
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -32,6 +35,9 @@ def controller_exception_handler(controller_func: Callable) -> Callable:
         logger = getlogger(__name__)
         try:
             return controller_func(*args, **kwargs)
+        except BadRequestException as e:
+            logger.info(e)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         except NotFoundException as e:
             logger.info(e)
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
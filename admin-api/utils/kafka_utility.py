@@ -1,31 +1,162 @@
-import json
+import asyncio
+from typing import Awaitable, Callable, List
 from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
+from pydantic import TypeAdapter
 
+from models.event_envelope_model import EventEnvelopeModel
+from models.frontend_event_model import FrontendEventModel
+from utils.constants import (
+    BOOK_ADDED_EVENT,
+    BOOK_REMOVED_EVENT,
+    BOOK_RETURNED_EVENT,
+    DEAD_LETTER_TOPIC_SUFFIX,
+    EVENT_SCHEMA_VERSION,
+    RETRY_TOPIC_SUFFIX,
+)
 from utils.environment import (
+    KAFKA_ADD_BOOK_TOPIC,
     KAFKA_BOOTSTRAP_SERVERS,
+    KAFKA_CONSUMER_GROUP_ID,
+    KAFKA_CONSUMER_MAX_CONCURRENCY,
+    KAFKA_PRODUCER_COMPRESSION_TYPE,
+    KAFKA_PRODUCER_LINGER_MS,
+    KAFKA_RETRY_ATTEMPTS,
     KAFKA_CREATE_USER_TOPIC,
+    KAFKA_REMOVE_BOOK_TOPIC,
+    KAFKA_RETURN_BOOK_TOPIC,
     KAFKA_UPDATE_USER_TOPIC,
     KAFKA_BORROW_BOOK_TOPIC,
 )
 
+# Event type published on each topic
+EVENT_TYPES = {
+    KAFKA_ADD_BOOK_TOPIC: BOOK_ADDED_EVENT,
+    KAFKA_RETURN_BOOK_TOPIC: BOOK_RETURNED_EVENT,
+    KAFKA_REMOVE_BOOK_TOPIC: BOOK_REMOVED_EVENT,
+}
+
+# Built once, as building an adapter compiles its validator and serializer
+event_envelope_adapter = TypeAdapter(EventEnvelopeModel)
+frontend_event_adapter = TypeAdapter(FrontendEventModel)
+
+
+def kafka_seriaizer(value: EventEnvelopeModel | bytes) -> bytes:
+    # Messages being retried or dead-lettered are forwarded as they were received
+    if isinstance(value, bytes):
+        return value
+    return event_envelope_adapter.dump_json(value)
+
+
+def kafka_deseriaizer(value: bytes) -> FrontendEventModel:
+    event = frontend_event_adapter.validate_json(value)
+    if event.schema_version > EVENT_SCHEMA_VERSION:
+        raise ValueError(
+            f"Unsupported schema version {event.schema_version} for {event.type}"
+        )
+    return event
+
+
+def kafka_key_serializer(key: str | bytes | None) -> bytes | None:
+    return key.encode() if isinstance(key, str) else key
+
+
+def retry_topic(topic: str, attempt: int) -> str:
+    return f"{topic}{RETRY_TOPIC_SUFFIX}{attempt}"
+
+
+def dead_letter_topic(topic: str) -> str:
+    return f"{topic}{DEAD_LETTER_TOPIC_SUFFIX}"
+
+
+def rewind_consumer(consumer: AIOKafkaConsumer, messages: dict) -> None:
+    # Fetch the messages again, as their offsets were never committed
+    for tp, message_list in messages.items():
+        consumer.seek(tp, message_list[0].offset)
 
-def kafka_seriaizer(value: list) -> bytes:
-    return json.dumps(value, default=str).encode()
 
+def group_messages(messages: dict, by_key: bool = False) -> List[dict]:
+    """
+    Splits a fetch into groups that are independent of each other, one per
+    partition or one per key within a partition. Every message for a key lands
+    in the same group, in the order it was fetched.
+    """
+    if not by_key:
+        return [{tp: message_list} for tp, message_list in messages.items()]
 
-def kafka_deseriaizer(value: bytes) -> list:
-    return json.loads(value.decode())
+    groups = []
+    for tp, message_list in messages.items():
+        messages_by_key = {}
+        for message in message_list:
+            messages_by_key.setdefault(message.key, []).append(message)
+        groups.extend({tp: key_messages} for key_messages in messages_by_key.values())
+    return groups
+
+
+async def handle_concurrently(
+    messages: dict,
+    handler: Callable[[dict], Awaitable[None]],
+    by_key: bool = False,
+) -> None:
+    """
+    Runs the handler on every group of a fetch, at most
+    KAFKA_CONSUMER_MAX_CONCURRENCY at a time, and raises the first failure once
+    all of them have finished.
+    """
+    semaphore = asyncio.Semaphore(KAFKA_CONSUMER_MAX_CONCURRENCY)
+
+    async def handle_group(group: dict) -> None:
+        async with semaphore:
+            await handler(group)
+
+    results = await asyncio.gather(
+        *(handle_group(group) for group in group_messages(messages, by_key)),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
 
 
 kafka_producer = AIOKafkaProducer(
-    bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS, value_serializer=kafka_seriaizer
+    bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS,
+    value_serializer=kafka_seriaizer,
+    key_serializer=kafka_key_serializer,
+    compression_type=KAFKA_PRODUCER_COMPRESSION_TYPE,
+    linger_ms=KAFKA_PRODUCER_LINGER_MS,
+    enable_idempotence=True,
 )
 
 
-kafka_consumer = AIOKafkaConsumer(
+# Topics holding updates from the frontend
+CONSUMED_TOPICS = [
     KAFKA_CREATE_USER_TOPIC,
     KAFKA_UPDATE_USER_TOPIC,
     KAFKA_BORROW_BOOK_TOPIC,
+]
+
+
+# Values are decoded by the handlers so that one bad message can be set aside
+# without failing the whole fetch. Offsets are committed by the consumer loop
+# once the database transaction for a fetch has committed
+kafka_consumer = AIOKafkaConsumer(
+    *CONSUMED_TOPICS,
+    bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS,
+    group_id=KAFKA_CONSUMER_GROUP_ID,
+    enable_auto_commit=False,
+    auto_offset_reset="earliest",
+)
+
+
+# Failed updates wait out their backoff on the retry topics. These are consumed
+# in a group of their own, so pausing a retry never holds up new updates
+kafka_retry_consumer = AIOKafkaConsumer(
+    *(
+        retry_topic(topic, attempt)
+        for topic in CONSUMED_TOPICS
+        for attempt in range(1, KAFKA_RETRY_ATTEMPTS + 1)
+    ),
     bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS,
-    value_deserializer=kafka_deseriaizer,
+    group_id=f"{KAFKA_CONSUMER_GROUP_ID}-retries",
+    enable_auto_commit=False,
+    auto_offset_reset="earliest",
 )
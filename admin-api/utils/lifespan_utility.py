@@ -1,14 +1,23 @@
-from contextlib import asynccontextmanager
+import asyncio
+import random
+from contextlib import asynccontextmanager, nullcontext, suppress
+from typing import List
 from aiokafka import AIOKafkaConsumer
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
 from fastapi import FastAPI, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.repository.impl.borrow_entry_repository import BorrowEntryRepository
+from database.repository.impl.job_lock_repository import JobLockRepository
+from database.repository.impl.outbox_repository import OutboxRepository
 from models.book_model import BookModel
 from models.borrow_details_model import BorrowDetailsModel
 from models.borrow_entry_model import BorrowEntryModel
+from models.borrow_request_model import BorrowRequestModel
+from models.frontend_event_model import FrontendEventModel
 from models.user_model import UserModel
 from models.user_update_model import UserUpdateModel
 from service.impl.book_service import BookService
@@ -18,40 +27,83 @@ from service.meta.user_service_meta import UserServiceMeta
 from database.repository.impl.book_repository import BookRepository
 from database.repository.impl.user_repository import UserRepository
 from utils.environment import (
-    KAFKA_BORROW_BOOK_TOPIC,
-    KAFKA_CREATE_USER_TOPIC,
-    KAFKA_UPDATE_USER_TOPIC,
-    POLL_FRONTEND_INTERVAL_SECS,
+    KAFKA_CONSUMER_MAX_WAIT_MS,
+    SCHEDULED_JOB_SHARDS,
+    SYNC_ENABLED,
     UPDATE_RETURNED_BOOKS_CRONTAB,
 )
-from database.schema.database import SessionLocal
-from utils.kafka_utility import kafka_consumer, kafka_producer
+from database.schema.database import dispose_engines, unit_of_work
+from utils.constants import (
+    BOOK_BORROWED_EVENT,
+    KAFKA_CONSUMER_ERROR_BACKOFF_SECS,
+    PROCESSED_EVENT_CLEANUP_INTERVAL_SECS,
+    RETURN_DUE_BOOKS_JOB_ID,
+    USER_CREATED_EVENT,
+)
+from utils.kafka_utility import (
+    handle_concurrently,
+    kafka_consumer,
+    kafka_deseriaizer,
+    kafka_producer,
+    kafka_retry_consumer,
+    rewind_consumer,
+)
+from utils.catalog_version_utility import listen_for_catalog_versions
+from utils.flow_control_utility import consumer_flow_control
 from utils.logger_utility import getlogger
+from utils.outbox_utility import relay_outbox_events
+from utils.processed_event_utility import (
+    claim_events,
+    remove_expired_processed_events,
+)
+from utils.retry_utility import KeyRetries, consume_retries, dead_letter
 
 logger = getlogger(__name__)
 
 
 @asynccontextmanager
 async def lifecycle_manager(app: FastAPI):
-    # Start Kafka Producer and Consumer
+    # The producer is also needed to replay dead letters
     await kafka_producer.start()
+
+    # Keep the catalog version the book routes answer conditional requests with
+    listener_task = asyncio.create_task(listen_for_catalog_versions())
+
+    # With sync disabled it runs in a separate worker process, see worker.py
+    async with sync_manager() if SYNC_ENABLED else nullcontext():
+        yield
+
+    listener_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await listener_task
+    await kafka_producer.stop()
+    await dispose_engines()
+
+
+@asynccontextmanager
+async def sync_manager():
+    """
+    Runs everything that keeps the admin in sync with the frontend, the
+    consumers, the outbox relay and the scheduled jobs, until exit. The
+    producer must already be started.
+    """
     await kafka_consumer.start()
+    await kafka_retry_consumer.start()
+
+    # Listen for updates from the front end continuously
+    consumer_task = asyncio.create_task(consume_front_end_updates())
 
-    book_service = get_book_service()
+    # Retry failed updates once their backoff has passed
+    retry_task = asyncio.create_task(
+        consume_retries(handle_front_end_updates, by_key=True)
+    )
+
+    # Publish committed outbox events to the front end
+    relay_task = asyncio.create_task(relay_outbox_events())
 
     # Create Async Background Scheduler
     scheduler = AsyncIOScheduler()
 
-    # Listen for updates from the front end at intervals
-    logger.info(
-        f"Will check for frontend updates every {POLL_FRONTEND_INTERVAL_SECS} seconds"
-    )
-    scheduler.add_job(
-        func=check_front_end_updates,
-        trigger="interval",
-        seconds=POLL_FRONTEND_INTERVAL_SECS,
-    )
-
     logger.info(
         f"Will update for returns using the cron expression: {UPDATE_RETURNED_BOOKS_CRONTAB}"
     )
@@ -59,105 +111,196 @@ async def lifecycle_manager(app: FastAPI):
         func=check_books_for_returns,
         trigger=CronTrigger.from_crontab(UPDATE_RETURNED_BOOKS_CRONTAB),
     )
+    scheduler.add_job(
+        func=remove_expired_processed_events,
+        trigger=IntervalTrigger(seconds=PROCESSED_EVENT_CLEANUP_INTERVAL_SECS),
+    )
 
     # Start Scheduler
     scheduler.start()
 
     yield
 
-    # Shutdown all background activities before application shutdown
+    # Shutdown all background activities before exiting
     scheduler.shutdown()
-    await kafka_producer.stop()
+    for task in (consumer_task, retry_task, relay_task):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
     await kafka_consumer.stop()
+    await kafka_retry_consumer.stop()
 
 
-def get_book_service():
+def get_book_service(session: AsyncSession) -> BookServiceMeta:
     return BookService(
-        book_repository=BookRepository(db=SessionLocal()),
-        borrow_entry_repository=BorrowEntryRepository(db=SessionLocal()),
-        kafka_producer=kafka_producer,
+        book_repository=BookRepository(db=session),
+        borrow_entry_repository=BorrowEntryRepository(db=session),
+        outbox_repository=OutboxRepository(db=session),
     )
 
 
-def get_user_service():
-    return UserService(user_repository=UserRepository(db=SessionLocal()))
+def get_user_service(session: AsyncSession) -> UserServiceMeta:
+    return UserService(user_repository=UserRepository(db=session))
 
 
-def handle_create_user_message(
-    message_value: list,
-    user_service: UserServiceMeta = get_user_service(),
-):
-    for user_entry in message_value:
-        try:
-            user = UserModel.model_validate(user_entry)
-            user_service.add(user)
-            logger.info(f"Added user with {user.email}")
-        except Exception as e:
-            logger.error(f"Failed to add user {user_entry} due to: {e}")
-            user_service.rollback()
-    user_service.close()
+async def handle_create_user_message(
+    session: AsyncSession, users: List[UserModel]
+) -> None:
+    added_users = await get_user_service(session).add_all(users)
+    logger.info(f"Added {len(added_users)} of {len(users)} users")
 
 
-def handle_borrow_book_message(
-    message_value: list,
-    book_service: BookServiceMeta = get_book_service(),
-    user_service: UserServiceMeta = get_user_service(),
+async def handle_borrow_book_message(
+    session: AsyncSession, entries: List[BorrowDetailsModel]
 ) -> None:
-    for borrow_entry in message_value:
-        try:
-            entry = BorrowDetailsModel.model_validate(borrow_entry)
-            user = user_service.get_by_email(entry.user_email)
-            book_service.borrow_book(
-                entry.book_title, user.id, entry.borrow_duration_days
+    """
+    Adds every borrow entry in a message at once. Users and books are looked up
+    for the whole message together. If any entry cannot be added the message
+    fails as a whole so it is retried, as the user it borrows for may be
+    created by an update on another partition that hasn't been applied yet.
+    """
+    if not entries:
+        return
+
+    users = await get_user_service(session).get_all_by_emails(
+        list({entry.user_email for entry in entries})
+    )
+    user_ids = {user.email: user.id for user in users}
+
+    errors: List[str] = []
+    borrow_requests: List[BorrowRequestModel] = []
+    for entry in entries:
+        if entry.user_email not in user_ids:
+            errors.append(f"{entry.book_title}: User {entry.user_email} not found")
+            continue
+        borrow_requests.append(
+            BorrowRequestModel(
+                book_title=entry.book_title,
+                user_id=user_ids[entry.user_email],
+                borrow_duration_days=entry.borrow_duration_days,
             )
-            logger.info(f"Added borrow entry for {entry.book_title}")
-        except Exception as e:
-            logger.error(f"Failed to add borrow entry {borrow_entry} due to: {e}")
-            book_service.rollback()
-    book_service.close()
+        )
 
+    if not errors:
+        results = await get_book_service(session).borrow_books(borrow_requests)
+        errors = [
+            f"{result.book_title}: {result.error}"
+            for result in results
+            if result.error is not None
+        ]
 
-async def check_front_end_updates(
-    consumer: AIOKafkaConsumer = kafka_consumer,
-):
-    logger.info("Checking for updates from the frontend")
-    try:
-        messages = await consumer.getmany(timeout_ms=10000)
+    if errors:
+        raise Exception(f"Failed to add borrow entries due to: {'; '.join(errors)}")
+    logger.info(f"Added {len(borrow_requests)} borrow entries")
 
-        if not messages:
-            logger.info("No front end updates found")
+
+async def handle_front_end_update(event: FrontendEventModel) -> None:
+    """
+    Applies an event in one transaction together with the record that it was
+    processed, skipping it if it was processed before.
+    """
+    async with unit_of_work() as session:
+        if not await claim_events(session, [event]):
             return
 
-        logger.info(f"Found messages: {messages}")
+        if event.type == USER_CREATED_EVENT:
+            await handle_create_user_message(session, event.payload)
+
+        elif event.type == BOOK_BORROWED_EVENT:
+            await handle_borrow_book_message(session, event.payload)
 
-        for tp, message_list in messages.items():
-            for message in message_list:
-                if message.topic == KAFKA_CREATE_USER_TOPIC:
-                    handle_create_user_message(message.value)
+        else:
+            logger.info("No relevant updated information found")
 
-                elif message.topic == KAFKA_BORROW_BOOK_TOPIC:
-                    handle_borrow_book_message(message.value)
 
-                else:
-                    logger.info("No relevant updated information found")
+async def handle_front_end_updates(messages: dict) -> None:
+    """
+    Applies each message in a transaction of its own. Messages that fail are
+    sent to be retried later, along with every later message with the same key
+    so the key stays in order, and ones that cannot be decoded are dead-lettered
+    straight away as retrying won't change them.
+    """
+    key_retries = KeyRetries()
+    for tp, message_list in messages.items():
+        for message in message_list:
+            if key_retries.has_failed(message):
+                await key_retries.retry_behind(message)
+                continue
 
-    except Exception as e:
-        logger.error(f"Failed to listen for book updates due to: {e}")
-    finally:
-        logger.info("Done Checking for book updates")
+            try:
+                event = kafka_deseriaizer(message.value)
+            except Exception as e:
+                logger.error(f"Invalid update on {message.topic} due to: {e}")
+                await dead_letter(message, e)
+                continue
 
+            try:
+                await handle_front_end_update(event)
+            except Exception as e:
+                logger.error(
+                    f"Failed to apply {event.type} event {event.event_id} due to: {e}"
+                )
+                await key_retries.retry_later(message, e)
 
-async def check_books_for_returns(book_service: BookServiceMeta = get_book_service()):
+
+async def consume_front_end_updates(
+    consumer: AIOKafkaConsumer = kafka_consumer,
+) -> None:
+    """
+    Fetches and handles frontend updates until cancelled. Each fetch returns as
+    soon as any messages are available, waiting at most KAFKA_CONSUMER_MAX_WAIT_MS
+    and returning at most KAFKA_CONSUMER_MAX_BATCH_SIZE messages.
+    """
+    logger.info("Listening for updates from the frontend")
+    while True:
+        messages = {}
+        try:
+            consumer_flow_control.update(consumer)
+            messages = await consumer.getmany(
+                timeout_ms=KAFKA_CONSUMER_MAX_WAIT_MS,
+                max_records=consumer_flow_control.max_records(consumer),
+            )
+            if not messages:
+                continue
+
+            count = sum(len(batch) for batch in messages.values())
+            logger.info(f"Found {count} frontend updates")
+            async with consumer_flow_control.applying(consumer, count):
+                # Messages with different keys don't depend on each other
+                await handle_concurrently(messages, handle_front_end_updates, by_key=True)
+
+            # Offsets are only committed once the updates are in the database
+            await consumer.commit()
+        except Exception as e:
+            logger.error(f"Failed to process frontend updates due to: {e}")
+            rewind_consumer(consumer, messages)
+            await asyncio.sleep(KAFKA_CONSUMER_ERROR_BACKOFF_SECS)
+
+
+async def check_books_for_returns():
+    """
+    Returns the due books in SCHEDULED_JOB_SHARDS shards split by entry id. Each
+    shard is returned in its own transaction by whichever instance locks it
+    first, and every instance starts from a random shard so that several of
+    them share the work.
+    """
     logger.info("Checking for books due for returns")
-    try:
-        due_borrow_entries = book_service.get_all_due()
-    except Exception as e:
-        logger.error(f"Failed to retrieve due books because: {e}")
-        book_service.close()
-        return
-    for entry in due_borrow_entries:
+    first_shard = random.randrange(SCHEDULED_JOB_SHARDS)
+    returned = 0
+    for offset in range(SCHEDULED_JOB_SHARDS):
+        shard = (first_shard + offset) % SCHEDULED_JOB_SHARDS
         try:
-            await book_service.return_book(entry.id)
+            async with unit_of_work() as session:
+                if not await JobLockRepository(db=session).try_acquire(
+                    RETURN_DUE_BOOKS_JOB_ID, shard
+                ):
+                    logger.info(f"Returns of shard {shard} are run by another instance")
+                    continue
+                returned_titles = await get_book_service(session).return_all_due(
+                    SCHEDULED_JOB_SHARDS, shard
+                )
         except Exception as e:
-            logger.error(f"Failed to return due entry with id {entry.id} because: {e}")
-    book_service.close()
+            logger.error(f"Failed to return due books of shard {shard} because: {e}")
+            continue
+        returned += len(returned_titles)
+    logger.info(f"Returned {returned} due books")
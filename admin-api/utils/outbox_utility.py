@@ -0,0 +1,67 @@
+import asyncio
+from aiokafka import AIOKafkaProducer
+
+from database.repository.impl.outbox_repository import OutboxRepository
+from database.schema.database import unit_of_work
+from models.event_envelope_model import EventEnvelopeModel
+from utils.constants import KAFKA_CONSUMER_ERROR_BACKOFF_SECS
+from utils.environment import OUTBOX_RELAY_BATCH_SIZE, OUTBOX_RELAY_INTERVAL_MS
+from utils.kafka_utility import EVENT_TYPES, kafka_producer
+from utils.logger_utility import getlogger
+
+logger = getlogger(__name__)
+
+
+async def publish_outbox_events(producer: AIOKafkaProducer = kafka_producer) -> int:
+    """
+    Publishes the oldest pending outbox events and deletes them once the broker
+    has acknowledged every one. If anything fails the events stay in the outbox
+    and are published again, so delivery is at least once.
+    """
+    async with unit_of_work() as session:
+        outbox_repository = OutboxRepository(db=session)
+        events = await outbox_repository.get_pending(OUTBOX_RELAY_BATCH_SIZE)
+        if not events:
+            return 0
+
+        # Queue the whole batch before waiting so the producer can pack it into
+        # as few requests as possible
+        deliveries = [
+            await producer.send(
+                event.topic,
+                EventEnvelopeModel(
+                    type=EVENT_TYPES[event.topic],
+                    event_id=event.event_id,
+                    produced_at=event.created_at,
+                    payload=event.payload,
+                ),
+                key=event.key,
+            )
+            for event in events
+        ]
+        await asyncio.gather(*deliveries)
+
+        await outbox_repository.remove_all([event.id for event in events])
+
+    return len(events)
+
+
+async def relay_outbox_events(producer: AIOKafkaProducer = kafka_producer) -> None:
+    """
+    Publishes outbox events until cancelled. Full batches are followed by
+    another immediately, otherwise the outbox is checked again after
+    OUTBOX_RELAY_INTERVAL_MS.
+    """
+    logger.info("Relaying outbox events")
+    while True:
+        try:
+            published = await publish_outbox_events(producer)
+        except Exception as e:
+            logger.error(f"Failed to publish outbox events due to: {e}")
+            await asyncio.sleep(KAFKA_CONSUMER_ERROR_BACKOFF_SECS)
+            continue
+
+        if published:
+            logger.info(f"Published {published} outbox events")
+        if published < OUTBOX_RELAY_BATCH_SIZE:
+            await asyncio.sleep(OUTBOX_RELAY_INTERVAL_MS / 1000)
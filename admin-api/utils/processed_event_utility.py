@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.repository.impl.job_lock_repository import JobLockRepository
+from database.repository.impl.processed_event_repository import (
+    ProcessedEventRepository,
+)
+from database.schema.database import unit_of_work
+from models.event_envelope_model import EventEnvelopeModel
+from utils.constants import PROCESSED_EVENT_CLEANUP_JOB_ID
+from utils.environment import PROCESSED_EVENT_TTL_HOURS
+from utils.logger_utility import getlogger
+
+logger = getlogger(__name__)
+
+
+async def claim_events(
+    session: AsyncSession, events: List[EventEnvelopeModel]
+) -> List[EventEnvelopeModel]:
+    """
+    Records the events as processed within the session's transaction and returns
+    only the ones that haven't been processed before. The record is rolled back
+    with the transaction if applying the events fails.
+    """
+    if not events:
+        return []
+
+    claimed_ids = set(
+        await ProcessedEventRepository(db=session).add_all(
+            [event.event_id for event in events]
+        )
+    )
+    new_events = []
+    for event in events:
+        # discard so an event repeated within the same fetch is applied once
+        if event.event_id in claimed_ids:
+            claimed_ids.discard(event.event_id)
+            new_events.append(event)
+
+    if len(new_events) < len(events):
+        logger.info(
+            f"Skipping {len(events) - len(new_events)} already processed events"
+        )
+    return new_events
+
+
+async def remove_expired_processed_events() -> None:
+    processed_before = datetime.now() - timedelta(hours=PROCESSED_EVENT_TTL_HOURS)
+    try:
+        async with unit_of_work() as session:
+            if not await JobLockRepository(db=session).try_acquire(
+                PROCESSED_EVENT_CLEANUP_JOB_ID
+            ):
+                logger.info("Expired processed events are being removed by another instance")
+                return
+            removed = await ProcessedEventRepository(db=session).remove_older_than(
+                processed_before
+            )
+        logger.info(f"Removed {removed} expired processed events")
+    except Exception as e:
+        logger.error(f"Failed to remove expired processed events due to: {e}")
@@ -0,0 +1,44 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.schema.database import unit_of_work
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical reads. The first call for a key runs the
+    query and every call made with the same key while it is in flight waits
+    for and shares its result, or its exception, instead of running it again.
+    The next call after it completes runs the query afresh.
+
+    The query runs on a session of its own rather than on the session of the
+    request that started it, which may end while others still wait for it.
+    """
+
+    def __init__(self) -> None:
+        self.calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(
+        self, key: Hashable, query: Callable[[AsyncSession], Awaitable[T]]
+    ) -> T:
+        call = self.calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(self.run(key, query))
+            self.calls[key] = call
+        # A caller that is cancelled doesn't cancel the query for the others
+        return await asyncio.shield(call)
+
+    async def run(
+        self, key: Hashable, query: Callable[[AsyncSession], Awaitable[Any]]
+    ) -> Any:
+        try:
+            async with unit_of_work() as session:
+                return await query(session)
+        finally:
+            self.calls.pop(key, None)
+
+
+single_flight = SingleFlight()
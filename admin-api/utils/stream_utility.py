@@ -0,0 +1,21 @@
+from typing import AsyncIterator
+
+from pydantic import BaseModel
+
+from utils.constants import STREAM_BATCH_SIZE
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def to_ndjson(
+    models: AsyncIterator[BaseModel], batch_size: int = STREAM_BATCH_SIZE
+) -> AsyncIterator[str]:
+    """Serializes models as newline delimited JSON, sending one chunk per batch."""
+    lines = []
+    async for model in models:
+        lines.append(model.model_dump_json())
+        if len(lines) >= batch_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
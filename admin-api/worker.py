@@ -0,0 +1,35 @@
+import asyncio
+import signal
+
+
+async def run_worker() -> None:
+    """
+    Runs only the sync of this API, without the web app, until SIGINT or
+    SIGTERM. Start the web app with SYNC_ENABLED=FALSE alongside it.
+    """
+    # The Kafka clients are created on import and need a running event loop
+    from database.schema.database import dispose_engines
+    from utils.kafka_utility import kafka_producer
+    from utils.lifespan_utility import sync_manager
+    from utils.logger_utility import getlogger
+
+    logger = getlogger("worker")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    await kafka_producer.start()
+    try:
+        async with sync_manager():
+            logger.info("Sync worker started")
+            await stop.wait()
+    finally:
+        await kafka_producer.stop()
+        await dispose_engines()
+    logger.info("Sync worker stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
@@ -1,4 +1,6 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import ARRAY, String, any_, bindparam, delete, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from database.repository.meta.book_repository_meta import BookRepositoryMeta
 from database.schema.book_schema import BookSchema
@@ -12,50 +14,119 @@ class BookRepository(BookRepositoryMeta):
 
     _logger = getlogger(name="BookRepository")
 
-    def __init__(self, db: Session = ResolveDependency(Session)) -> None:
+    def __init__(self, db: AsyncSession = ResolveDependency(AsyncSession)) -> None:
         self.db = db
 
-    def save(self, book: BookSchema) -> BookModel:
-        self.db.add(book)
-        self.db.commit()
-        self.db.refresh(book)
-        return self.db.query(BookSchema).filter(BookSchema.title == book.title).first()
+    async def save(self, book: BookModel) -> BookModel:
+        result = await self.db.execute(
+            insert(BookSchema)
+            .values(book.model_dump(exclude_none=True))
+            .returning(*BookSchema.__table__.columns)
+        )
+        return BookModel.model_validate(result.one())
 
-    def get_by_id(self, id: int) -> BookModel | None:
-        return (
-            self.db.query(BookSchema)
-            .filter(BookSchema.id == id, BookSchema.is_borrowed == False)
-            .first()
+    async def save_all(self, books: List[BookModel]) -> List[BookModel]:
+        # Titles that already exist are skipped, so redelivered messages are harmless
+        result = await self.db.execute(
+            pg_insert(BookSchema)
+            .values([book.model_dump(exclude_none=True) for book in books])
+            .on_conflict_do_nothing(index_elements=[BookSchema.title])
+            .returning(*BookSchema.__table__.columns)
+        )
+        return [BookModel.model_validate(row) for row in result.all()]
+
+    async def get_by_id(self, id: int) -> BookModel | None:
+        return await self.db.scalar(
+            select(BookSchema).where(BookSchema.id == id, BookSchema.is_borrowed == False)
         )
 
-    def get_by_title(self, title: str) -> BookModel:
-        return self.db.query(BookSchema).filter(BookSchema.title == title).first()
+    async def exists(self, id: int) -> bool:
+        return await self.db.scalar(
+            select(select(BookSchema.id).where(BookSchema.id == id).exists())
+        )
+
+    async def get_by_title(self, title: str) -> BookModel:
+        return await self.db.scalar(select(BookSchema).where(BookSchema.title == title))
 
-    def update_is_borrowed(self, id: int, is_borrowed: bool) -> BookModel:
-        self.db.query(BookSchema).filter(BookSchema.id == id).update(
-            {"is_borrowed": is_borrowed}
+    async def update_is_borrowed(self, id: int, is_borrowed: bool) -> BookModel | None:
+        result = await self.db.execute(
+            update(BookSchema)
+            .where(BookSchema.id == id)
+            .values(is_borrowed=is_borrowed)
+            .returning(*BookSchema.__table__.columns)
+            .execution_options(synchronize_session=False)
         )
-        self.db.commit()
-        return self.db.query(BookSchema).filter(BookSchema.id == id).first()
+        row = result.one_or_none()
+        return BookModel.model_validate(row) if row is not None else None
 
-    def get_all(self) -> List[BookModel]:
-        return self.db.query(BookSchema).filter(BookSchema.is_borrowed == False).all()
+    async def update_is_borrowed_by_titles(
+        self, titles: List[str], is_borrowed: bool
+    ) -> List[BookModel]:
+        result = await self.db.execute(
+            update(BookSchema)
+            .where(BookSchema.title == any_(bindparam("titles", titles, type_=ARRAY(String))))
+            .values(is_borrowed=is_borrowed)
+            .returning(*BookSchema.__table__.columns)
+            .execution_options(synchronize_session=False)
+        )
+        return [BookModel.model_validate(row) for row in result.all()]
 
-    def search_books(self, filters: BookFilterModel) -> List[BookModel]:
-        filter_list = [getattr(BookSchema, "is_borrowed") == False]
+    async def mark_borrowed(self, id: int) -> BookModel | None:
+        # Compare-and-set: only the request that flips the flag gets a row back
+        result = await self.db.execute(
+            update(BookSchema)
+            .where(BookSchema.id == id, BookSchema.is_borrowed == False)
+            .values(is_borrowed=True)
+            .returning(*BookSchema.__table__.columns)
+            .execution_options(synchronize_session=False)
+        )
+        row = result.one_or_none()
+        return BookModel.model_validate(row) if row is not None else None
+
+    async def get_all(self, limit: int, after_id: int = 0) -> List[BookModel]:
+        return (
+            await self.db.scalars(
+                select(BookSchema)
+                .where(BookSchema.is_borrowed == False, BookSchema.id > after_id)
+                .order_by(BookSchema.id)
+                .limit(limit)
+            )
+        ).all()
+
+    async def search_books(
+        self, filters: BookFilterModel, limit: int, after_id: int = 0
+    ) -> List[BookModel]:
+        filter_list = [getattr(BookSchema, "is_borrowed") == False, BookSchema.id > after_id]
         for key, value in filters.model_dump(exclude_none=True).items():
             filter_list.append(getattr(BookSchema, key).contains(value))
 
-        return self.db.query(BookSchema).filter(*filter_list).all()
+        return (
+            await self.db.scalars(
+                select(BookSchema).where(*filter_list).order_by(BookSchema.id).limit(limit)
+            )
+        ).all()
 
-    def remove(self, id: int) -> BookModel:
-        book = self.db.query(BookSchema).filter(BookSchema.id == id).first()
-        self.db.query(BookSchema).filter(BookSchema.id == id).delete()
-        self.db.commit()
-        return book
+    async def remove(self, id: int) -> BookModel | None:
+        result = await self.db.execute(
+            delete(BookSchema)
+            .where(BookSchema.id == id)
+            .returning(*BookSchema.__table__.columns)
+            .execution_options(synchronize_session=False)
+        )
+        row = result.one_or_none()
+        return BookModel.model_validate(row) if row is not None else None
+
+    async def remove_by_titles(self, titles: List[str]) -> List[BookModel]:
+        result = await self.db.execute(
+            delete(BookSchema)
+            .where(BookSchema.title == any_(bindparam("titles", titles, type_=ARRAY(String))))
+            .returning(*BookSchema.__table__.columns)
+            .execution_options(synchronize_session=False)
+        )
+        return [BookModel.model_validate(row) for row in result.all()]
 
-    def rollback(self) -> None:
-        self.db.rollback()
+    async def rollback(self) -> None:
+        await self.db.rollback()
 
-    def close(self) -> None:
-        self.db.close()
\ No newline at end of file
+    def with_session(self, db: AsyncSession) -> "BookRepository":
+        return BookRepository(db=db)
@@ -0,0 +1,114 @@
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.repository.impl.book_repository import BookRepository
+from database.repository.meta.book_repository_meta import BookRepositoryMeta
+from models.book_filter_model import BookFilterModel
+from models.book_model import BookModel
+from utils.cache_utility import EVICTED_BOOK_IDS, book_cache, notify_changed_books
+from utils.dependecy_resolver import ResolveDependency
+
+
+class CachedBookRepository(BookRepositoryMeta):
+    """
+    Serves catalog reads from the process-wide book cache, reading through to
+    the database on a miss. Every write evicts the books it changed, once
+    straight away and again when the transaction ends, and notifies the other
+    processes to evict them once it commits.
+    """
+
+    def __init__(self, db: AsyncSession = ResolveDependency(AsyncSession)) -> None:
+        self.db = db
+        self.repository = BookRepository(db=db)
+
+    async def evict(self, books: List[BookModel]) -> List[BookModel]:
+        ids = [book.id for book in books]
+        if ids:
+            book_cache.evict_books(ids)
+            self.db.info.setdefault(EVICTED_BOOK_IDS, set()).update(ids)
+            await notify_changed_books(self.db, ids)
+        return books
+
+    async def evict_one(self, book: BookModel | None) -> BookModel | None:
+        if book is not None:
+            await self.evict([book])
+        return book
+
+    async def save(self, book: BookModel) -> BookModel:
+        return await self.evict_one(await self.repository.save(book))
+
+    async def save_all(self, books: List[BookModel]) -> List[BookModel]:
+        return await self.evict(await self.repository.save_all(books))
+
+    async def get_by_id(self, id: int) -> BookModel | None:
+        found, book = book_cache.get(("book", id))
+        if not found:
+            generation = book_cache.generation
+            book = await self.repository.get_by_id(id)
+            if book is not None:
+                book = BookModel.model_validate(book)
+            book_cache.set_book(id, book, generation)
+        return book
+
+    async def exists(self, id: int) -> bool:
+        return await self.repository.exists(id)
+
+    async def get_by_title(self, title: str) -> BookModel:
+        return await self.repository.get_by_title(title)
+
+    async def update_is_borrowed(self, id: int, is_borrowed: bool) -> BookModel | None:
+        return await self.evict_one(
+            await self.repository.update_is_borrowed(id, is_borrowed)
+        )
+
+    async def update_is_borrowed_by_titles(
+        self, titles: List[str], is_borrowed: bool
+    ) -> List[BookModel]:
+        return await self.evict(
+            await self.repository.update_is_borrowed_by_titles(titles, is_borrowed)
+        )
+
+    async def mark_borrowed(self, id: int) -> BookModel | None:
+        return await self.evict_one(await self.repository.mark_borrowed(id))
+
+    async def get_all(self, limit: int, after_id: int = 0) -> List[BookModel]:
+        key = ("all", limit, after_id)
+        found, books = book_cache.get(key)
+        if not found:
+            generation = book_cache.generation
+            books = [
+                BookModel.model_validate(book)
+                for book in await self.repository.get_all(limit, after_id)
+            ]
+            book_cache.set_page(key, books, limit, after_id, generation)
+        return books
+
+    async def search_books(
+        self, filters: BookFilterModel, limit: int, after_id: int = 0
+    ) -> List[BookModel]:
+        key = (
+            "search",
+            tuple(sorted(filters.model_dump(exclude_none=True).items())),
+            limit,
+            after_id,
+        )
+        found, books = book_cache.get(key)
+        if not found:
+            generation = book_cache.generation
+            books = [
+                BookModel.model_validate(book)
+                for book in await self.repository.search_books(filters, limit, after_id)
+            ]
+            book_cache.set_page(key, books, limit, after_id, generation)
+        return books
+
+    async def remove(self, id: int) -> BookModel | None:
+        return await self.evict_one(await self.repository.remove(id))
+
+    async def remove_by_titles(self, titles: List[str]) -> List[BookModel]:
+        return await self.evict(await self.repository.remove_by_titles(titles))
+
+    async def rollback(self) -> None:
+        await self.repository.rollback()
+
+    def with_session(self, db: AsyncSession) -> "CachedBookRepository":
+        return CachedBookRepository(db=db)
@@ -0,0 +1,17 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.repository.meta.job_lock_repository_meta import JobLockRepositoryMeta
+from utils.dependecy_resolver import ResolveDependency
+
+
+class JobLockRepository(JobLockRepositoryMeta):
+
+    def __init__(self, db: AsyncSession = ResolveDependency(AsyncSession)) -> None:
+        self.db = db
+
+    async def try_acquire(self, job_id: int, shard: int = 0) -> bool:
+        # Released when the transaction ends, so an instance that dies while
+        # running a job never holds it up for the others
+        return await self.db.scalar(
+            select(func.pg_try_advisory_xact_lock(job_id, shard))
+        )
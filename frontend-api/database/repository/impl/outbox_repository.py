@@ -0,0 +1,40 @@
+from typing import List
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.repository.meta.outbox_repository_meta import OutboxRepositoryMeta
+from database.schema.outbox_event_schema import OutboxEventSchema
+from models.outbox_event_model import OutboxEventModel
+from utils.dependecy_resolver import ResolveDependency
+
+
+class OutboxRepository(OutboxRepositoryMeta):
+
+    def __init__(self, db: AsyncSession = ResolveDependency(AsyncSession)) -> None:
+        self.db = db
+
+    async def save(self, event: OutboxEventModel) -> None:
+        await self.db.execute(
+            insert(OutboxEventSchema).values(event.model_dump(exclude_none=True))
+        )
+
+    async def get_pending(self, limit: int) -> List[OutboxEventModel]:
+        # In id order, which is commit order only for events of the same key.
+        # The rows stay locked until the relaying transaction ends, so a second
+        # relay waits instead of publishing the same events out of order
+        result = await self.db.execute(
+            select(*OutboxEventSchema.__table__.columns)
+            .order_by(OutboxEventSchema.id)
+            .limit(limit)
+            .with_for_update()
+        )
+        return [OutboxEventModel.model_validate(row) for row in result.all()]
+
+    async def remove_all(self, ids: List[int]) -> None:
+        await self.db.execute(
+            delete(OutboxEventSchema)
+            .where(OutboxEventSchema.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+
+    async def rollback(self) -> None:
+        await self.db.rollback()
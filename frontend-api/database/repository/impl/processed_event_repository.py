@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import List
+from uuid import UUID
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.repository.meta.processed_event_repository_meta import (
+    ProcessedEventRepositoryMeta,
+)
+from database.schema.processed_event_schema import ProcessedEventSchema
+from utils.dependecy_resolver import ResolveDependency
+
+
+class ProcessedEventRepository(ProcessedEventRepositoryMeta):
+
+    def __init__(self, db: AsyncSession = ResolveDependency(AsyncSession)) -> None:
+        self.db = db
+
+    async def add_all(self, event_ids: List[UUID]) -> List[UUID]:
+        # Only ids that weren't recorded before come back
+        result = await self.db.execute(
+            insert(ProcessedEventSchema)
+            .values([{"event_id": event_id} for event_id in event_ids])
+            .on_conflict_do_nothing(index_elements=[ProcessedEventSchema.event_id])
+            .returning(ProcessedEventSchema.event_id)
+        )
+        return result.scalars().all()
+
+    async def remove_older_than(self, processed_before: datetime) -> int:
+        result = await self.db.execute(
+            delete(ProcessedEventSchema)
+            .where(ProcessedEventSchema.processed_at < processed_before)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    async def rollback(self) -> None:
+        await self.db.rollback()
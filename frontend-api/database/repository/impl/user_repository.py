@@ -1,4 +1,5 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from database.repository.meta.user_repository_meta import UserRepositoryMeta
 from database.schema.user_schema import UserSchema
 from models.user_model import UserModel
@@ -11,30 +12,33 @@ class UserRepository(UserRepositoryMeta):
 
     _logger = getlogger(name="UserRepository")
 
-    def __init__(self, db: Session = ResolveDependency(Session)) -> None:
+    def __init__(self, db: AsyncSession = ResolveDependency(AsyncSession)) -> None:
         self.db = db
 
-    def save(self, user: UserSchema) -> UserModel:
-        self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
-        return self.db.query(UserSchema).filter(UserSchema.email == user.email).first()
+    async def save(self, user: UserModel) -> UserModel:
+        result = await self.db.execute(
+            insert(UserSchema)
+            .values(user.model_dump(exclude_none=True))
+            .returning(*UserSchema.__table__.columns)
+        )
+        return UserModel.model_validate(result.one())
 
-    def get_by_id(self, id: int) -> UserModel:
-        return self.db.query(UserSchema).filter(UserSchema.id == id).first()
+    async def get_by_id(self, id: int) -> UserModel:
+        return await self.db.scalar(select(UserSchema).where(UserSchema.id == id))
     
-    def get_by_email(self, email: str) -> UserModel:
-        return self.db.query(UserSchema).filter(UserSchema.email == email).first()
-
-    def update(self, id: int, user_update: UserUpdateModel) -> UserModel:
-        self.db.query(UserSchema).filter(UserSchema.id == id).update(
-            user_update.model_dump(exclude_none=True)
+    async def get_by_email(self, email: str) -> UserModel:
+        return await self.db.scalar(select(UserSchema).where(UserSchema.email == email))
+
+    async def update(self, id: int, user_update: UserUpdateModel) -> UserModel | None:
+        result = await self.db.execute(
+            update(UserSchema)
+            .where(UserSchema.id == id)
+            .values(user_update.model_dump(exclude_none=True))
+            .returning(*UserSchema.__table__.columns)
+            .execution_options(synchronize_session=False)
         )
-        self.db.commit()
-        return self.db.query(UserSchema).filter(UserSchema.id == id).first()
-
-    def rollback(self) -> None:
-        self.db.rollback()
+        row = result.one_or_none()
+        return UserModel.model_validate(row) if row is not None else None
 
-    def close(self) -> None:
-        self.db.close()
\ No newline at end of file
+    async def rollback(self) -> None:
+        await self.db.rollback()
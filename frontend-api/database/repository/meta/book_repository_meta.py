@@ -1,43 +1,68 @@
 from abc import abstractmethod, ABC
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from database.schema.book_schema import BookSchema
 from models.book_filter_model import BookFilterModel
 from models.book_model import BookModel
 
 
 class BookRepositoryMeta(ABC):
     @abstractmethod
-    def save(self, book: BookSchema) -> BookModel:
+    async def save(self, book: BookModel) -> BookModel:
         pass
 
     @abstractmethod
-    def get_by_id(self, id: int) -> BookModel:
+    async def save_all(self, books: List[BookModel]) -> List[BookModel]:
+        pass
+
+    @abstractmethod
+    async def get_by_id(self, id: int) -> BookModel:
         pass
     
     @abstractmethod
-    def get_by_title(self, title: str) -> BookModel:
+    async def exists(self, id: int) -> bool:
         pass
 
     @abstractmethod
-    def update_is_borrowed(self, id: int, is_borrowed: bool) -> BookModel:
+    async def get_by_title(self, title: str) -> BookModel:
         pass
 
     @abstractmethod
-    def get_all(self) -> List[BookModel]:
+    async def update_is_borrowed(self, id: int, is_borrowed: bool) -> BookModel | None:
         pass
 
     @abstractmethod
-    def search_books(self, filters: BookFilterModel) -> List[BookModel]:
+    async def update_is_borrowed_by_titles(
+        self, titles: List[str], is_borrowed: bool
+    ) -> List[BookModel]:
         pass
 
     @abstractmethod
-    def remove(self, id: int) -> BookModel:
+    async def mark_borrowed(self, id: int) -> BookModel | None:
         pass
 
     @abstractmethod
-    def rollback(self) -> None:
+    async def get_all(self, limit: int, after_id: int = 0) -> List[BookModel]:
         pass
-    
+
+    @abstractmethod
+    async def search_books(
+        self, filters: BookFilterModel, limit: int, after_id: int = 0
+    ) -> List[BookModel]:
+        pass
+
+    @abstractmethod
+    async def remove(self, id: int) -> BookModel | None:
+        pass
+
+    @abstractmethod
+    async def remove_by_titles(self, titles: List[str]) -> List[BookModel]:
+        pass
+
     @abstractmethod
-    def close(self) -> None:
-        pass
\ No newline at end of file
+    async def rollback(self) -> None:
+        pass
+
+    @abstractmethod
+    def with_session(self, db: AsyncSession) -> "BookRepositoryMeta":
+        """Returns a repository of the same kind working on another session."""
+        pass
@@ -0,0 +1,7 @@
+from abc import abstractmethod, ABC
+
+
+class JobLockRepositoryMeta(ABC):
+    @abstractmethod
+    async def try_acquire(self, job_id: int, shard: int = 0) -> bool:
+        pass
@@ -0,0 +1,21 @@
+from abc import abstractmethod, ABC
+from typing import List
+from models.outbox_event_model import OutboxEventModel
+
+
+class OutboxRepositoryMeta(ABC):
+    @abstractmethod
+    async def save(self, event: OutboxEventModel) -> None:
+        pass
+
+    @abstractmethod
+    async def get_pending(self, limit: int) -> List[OutboxEventModel]:
+        pass
+
+    @abstractmethod
+    async def remove_all(self, ids: List[int]) -> None:
+        pass
+
+    @abstractmethod
+    async def rollback(self) -> None:
+        pass
@@ -0,0 +1,18 @@
+from abc import abstractmethod, ABC
+from datetime import datetime
+from typing import List
+from uuid import UUID
+
+
+class ProcessedEventRepositoryMeta(ABC):
+    @abstractmethod
+    async def add_all(self, event_ids: List[UUID]) -> List[UUID]:
+        pass
+
+    @abstractmethod
+    async def remove_older_than(self, processed_before: datetime) -> int:
+        pass
+
+    @abstractmethod
+    async def rollback(self) -> None:
+        pass
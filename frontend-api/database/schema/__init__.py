@@ -1,3 +1,6 @@
 from database.schema.database import Base
 from database.schema.book_schema import BookSchema
-from database.schema.user_schema import UserSchema
\ No newline at end of file
+from database.schema.user_schema import UserSchema
+from database.schema.outbox_event_schema import OutboxEventSchema
+from database.schema.processed_event_schema import ProcessedEventSchema
+from database.schema.catalog_version_schema import catalog_version_sequence
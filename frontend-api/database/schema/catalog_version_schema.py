@@ -0,0 +1,6 @@
+from sqlalchemy import Sequence
+
+from database.schema.database import Base
+
+# Every transaction that changes the catalog draws its version from this sequence
+catalog_version_sequence = Sequence("catalog_version_seq", metadata=Base.metadata)
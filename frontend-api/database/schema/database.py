@@ -1,9 +1,14 @@
-from sqlalchemy import create_engine, URL
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 
 from utils.constants import DATABASE_LOG_LEVEL
-from utils.environment import DATABASE_URL
+from utils.environment import DATABASE_ASYNC_ENGINE, DATABASE_URL
 
 from utils.logger_utility import getlogger
 
@@ -12,4 +17,103 @@ databse_logger = getlogger(name="sqlalchemy.engine.Engine", log_level=DATABASE_L
 
 engine = create_engine(DATABASE_URL, logging_name="AppDatabase", pool_recycle=3600)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+if DATABASE_ASYNC_ENGINE:
+    async_engine = create_async_engine(
+        make_url(DATABASE_URL).set(drivername="postgresql+asyncpg"),
+        logging_name="AppDatabase",
+        pool_recycle=3600,
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+
+
+class ThreadPoolSession:
+    """
+    Exposes a blocking psycopg2 Session through the awaitable subset of the
+    AsyncSession API used by the repositories, running every database call
+    in the threadpool so it never blocks the event loop.
+    """
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    @property
+    def info(self) -> dict:
+        return self.session.info
+
+    def add(self, instance: Any) -> None:
+        self.session.add(instance)
+
+    async def execute(self, statement: Any, params: Any = None) -> Any:
+        return await run_in_threadpool(self.session.execute, statement, params)
+
+    async def scalar(self, statement: Any, params: Any = None) -> Any:
+        return await run_in_threadpool(self.session.scalar, statement, params)
+
+    async def scalars(self, statement: Any, params: Any = None) -> Any:
+        return await run_in_threadpool(self.session.scalars, statement, params)
+
+    async def stream(self, statement: Any, params: Any = None) -> AsyncIterator[Any]:
+        result = await run_in_threadpool(self.session.execute, statement, params)
+        return _iterate_partitions(result)
+
+    async def stream_scalars(
+        self, statement: Any, params: Any = None
+    ) -> AsyncIterator[Any]:
+        result = await run_in_threadpool(self.session.scalars, statement, params)
+        return _iterate_partitions(result)
+
+    async def flush(self) -> None:
+        await run_in_threadpool(self.session.flush)
+
+    async def refresh(self, instance: Any) -> None:
+        await run_in_threadpool(self.session.refresh, instance)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.session.rollback)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.session.close)
+
+
+async def _iterate_partitions(result: Any) -> AsyncIterator[Any]:
+    # Fetch one yield_per batch of the server-side cursor per threadpool hop
+    async for partition in iterate_in_threadpool(result.partitions()):
+        for row in partition:
+            yield row
+
+
+def create_session() -> AsyncSession:
+    if DATABASE_ASYNC_ENGINE:
+        return AsyncSessionLocal()
+    return ThreadPoolSession(SessionLocal(expire_on_commit=False))
+
+
+@asynccontextmanager
+async def unit_of_work() -> AsyncIterator[AsyncSession]:
+    """
+    Provides a single session for a unit of work, committing once when the
+    block completes, rolling back if it raises and always releasing the
+    connection back to the pool.
+    """
+    session = create_session()
+    try:
+        yield session
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+async def dispose_engines() -> None:
+    if DATABASE_ASYNC_ENGINE:
+        await async_engine.dispose()
+    engine.dispose()
@@ -0,0 +1,27 @@
+from uuid import uuid4
+from sqlalchemy import BigInteger, Column, DateTime, String, func, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+from database.schema.database import Base
+
+
+class OutboxEventSchema(Base):
+    __tablename__ = "outbox_events"
+
+    # Relayed in id order. Ids are drawn at insert, not at commit, but the writes
+    # behind events for the same key lock the same row, so those ids still
+    # follow the order their transactions committed in
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    # Kept across republishes so consumers can drop duplicates
+    event_id = Column(
+        UUID(as_uuid=True),
+        nullable=False,
+        default=uuid4,
+        server_default=text("gen_random_uuid()"),
+    )
+    topic = Column(String, nullable=False)
+    key = Column(String, nullable=True)
+    payload = Column(JSONB, nullable=False)
+    # Set by the database so every host stamps events with the same clock, and
+    # sent on as the envelope's produced_at
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,13 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+
+from database.schema.database import Base
+
+
+class ProcessedEventSchema(Base):
+    __tablename__ = "processed_events"
+
+    event_id = Column(UUID(as_uuid=True), primary_key=True)
+    # Rows older than PROCESSED_EVENT_TTL_HOURS are cleaned up
+    processed_at = Column(DateTime, nullable=False, default=datetime.now, index=True)
@@ -11,4 +11,4 @@ class UserSchema(Base):
     email = Column(String, unique=True, nullable=False)
     firstname = Column(String, nullable=False)
     lastname = Column(String, nullable=False)
-    joined_on = Column(DateTime, nullable=False, default=datetime.now())
+    joined_on = Column(DateTime, nullable=False, default=datetime.now)
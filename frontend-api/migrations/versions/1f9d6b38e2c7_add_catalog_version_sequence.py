@@ -0,0 +1,26 @@
+"""Add Catalog Version Sequence
+
+Revision ID: 1f9d6b38e2c7
+Revises: e84b2c6d9f03
+Create Date: 2026-10-18 06:12:31.408215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1f9d6b38e2c7'
+down_revision: Union[str, None] = 'e84b2c6d9f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence('catalog_version_seq')))
+
+
+def downgrade() -> None:
+    op.execute(sa.schema.DropSequence(sa.Sequence('catalog_version_seq')))
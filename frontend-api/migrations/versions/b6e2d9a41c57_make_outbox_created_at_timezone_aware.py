@@ -0,0 +1,27 @@
+"""Make Outbox Created At Timezone Aware
+
+Revision ID: b6e2d9a41c57
+Revises: 1f9d6b38e2c7
+Create Date: 2026-10-18 07:02:18.574120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e2d9a41c57'
+down_revision: Union[str, None] = '1f9d6b38e2c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Times already in the outbox are taken to be in the session's time zone
+    op.alter_column('outbox_events', 'created_at', type_=sa.DateTime(timezone=True), server_default=sa.text('now()'), existing_nullable=False)
+
+
+def downgrade() -> None:
+    op.alter_column('outbox_events', 'created_at', type_=sa.DateTime(), server_default=None, existing_nullable=False)
@@ -0,0 +1,28 @@
+from typing import Annotated, List, Literal, Union
+from pydantic import Field
+
+from models.book_model import BookModel
+from models.event_envelope_model import EventEnvelopeModel
+from utils.constants import BOOK_ADDED_EVENT, BOOK_REMOVED_EVENT, BOOK_RETURNED_EVENT
+
+
+class BookAddedEventModel(EventEnvelopeModel):
+    type: Literal[BOOK_ADDED_EVENT]
+    payload: List[BookModel]
+
+
+class BookReturnedEventModel(EventEnvelopeModel):
+    type: Literal[BOOK_RETURNED_EVENT]
+    payload: List[str]
+
+
+class BookRemovedEventModel(EventEnvelopeModel):
+    type: Literal[BOOK_REMOVED_EVENT]
+    payload: List[str]
+
+
+# Events published by the admin, told apart by their type
+AdminEventModel = Annotated[
+    Union[BookAddedEventModel, BookReturnedEventModel, BookRemovedEventModel],
+    Field(discriminator="type"),
+]
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class CacheStatusModel(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    time: datetime
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class ConsumerStatusModel(BaseModel):
+    status: str
+    # Left out when the sync runs in a separate worker
+    in_flight: int | None = None
+    apply_latency_ms: float | None = None
+    paused_partitions: int | None = None
+    time: datetime
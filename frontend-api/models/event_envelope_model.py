@@ -0,0 +1,13 @@
+from datetime import datetime, timezone
+from uuid import UUID, uuid4
+from pydantic import BaseModel, Field
+
+from utils.constants import EVENT_SCHEMA_VERSION
+
+
+class EventEnvelopeModel(BaseModel):
+    type: str
+    schema_version: int = EVENT_SCHEMA_VERSION
+    event_id: UUID = Field(default_factory=uuid4)
+    produced_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    payload: list
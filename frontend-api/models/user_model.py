@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 class UserModel(BaseModel):
@@ -6,7 +6,7 @@ class UserModel(BaseModel):
   email: str
   firstname: str
   lastname: str
-  joined_on: datetime = datetime.now()
+  joined_on: datetime = Field(default_factory=datetime.now)
   
   class Config:
         from_attributes = True
\ No newline at end of file
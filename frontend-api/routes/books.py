@@ -1,35 +1,43 @@
-from typing import List
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 
 from controllers.book_controller import BookController
 from models.borrow_details_model import BorrowDetailsModel
 from models.book_model import BookModel
+from models.page_model import PageModel
+from utils.catalog_version_utility import check_catalog_version
+from utils.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 books_route = APIRouter(tags=["Book Routes"], prefix="/books")
 
 
-@books_route.get("/")
+@books_route.get("/", dependencies=[Depends(check_catalog_version)])
 async def get_all_books(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
     controller: BookController = Depends(BookController),
-) -> List[BookModel]:
-    return controller.get_all()
+) -> PageModel[BookModel]:
+    return await controller.get_all(limit, cursor)
 
 
-@books_route.get("/search")
+@books_route.get("/search", dependencies=[Depends(check_catalog_version)])
 async def search_books(
     category: str | None = None,
     publisher: str | None = None,
     title: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
     controller: BookController = Depends(BookController),
-) -> List[BookModel]:
-    return controller.search_books(category=category, publisher=publisher, title=title)
+) -> PageModel[BookModel]:
+    return await controller.search_books(
+        category=category, publisher=publisher, title=title, limit=limit, cursor=cursor
+    )
 
 
-@books_route.get("/{id}")
+@books_route.get("/{id}", dependencies=[Depends(check_catalog_version)])
 async def get_book_by_id(
     id: int, controller: BookController = Depends(BookController)
 ) -> BookModel:
-    return controller.get_by_id(id)
+    return await controller.get_by_id(id)
 
 
 @books_route.post("/{id}/borrow")
@@ -1,7 +1,12 @@
 from datetime import datetime
 from fastapi import APIRouter
 
+from models.cache_status_model import CacheStatusModel
+from models.consumer_status_model import ConsumerStatusModel
 from models.health_status_model import HealthStatusModel
+from utils.cache_utility import book_cache
+from utils.environment import SYNC_ENABLED
+from utils.flow_control_utility import consumer_flow_control
 
 health_route = APIRouter(tags=["Health Routes"], prefix="/health")
 
@@ -9,3 +14,16 @@ health_route = APIRouter(tags=["Health Routes"], prefix="/health")
 @health_route.get("/status")
 async def get_health() -> HealthStatusModel:
     return HealthStatusModel(status="UP", time=datetime.now())
+
+
+@health_route.get("/consumer")
+async def get_consumer_status() -> ConsumerStatusModel:
+    # The consumers of this process never run, see worker.py
+    if not SYNC_ENABLED:
+        return ConsumerStatusModel(status="DISABLED", time=datetime.now())
+    return consumer_flow_control.get_status()
+
+
+@health_route.get("/cache")
+async def get_cache_status() -> CacheStatusModel:
+    return book_cache.get_status()
@@ -18,4 +18,4 @@ async def add_user(
 async def get_user_by_id(
     id: int, controller: UserController = Depends(UserController)
 ) -> UserModel:
-    return controller.get_user_by_id(id)
+    return await controller.get_user_by_id(id)
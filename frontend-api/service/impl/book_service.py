@@ -1,15 +1,16 @@
 from typing import List
 
-from aiokafka import AIOKafkaProducer
-from psycopg2.errors import UniqueViolation
+from psycopg2.errorcodes import UNIQUE_VIOLATION
 from sqlalchemy.exc import IntegrityError
 
 from database.repository.meta.book_repository_meta import BookRepositoryMeta
-from database.schema.book_schema import BookSchema
+from database.repository.meta.outbox_repository_meta import OutboxRepositoryMeta
 from models.book_borrow_model import BookBorrowModel
 from models.borrow_details_model import BorrowDetailsModel
 from models.book_filter_model import BookFilterModel
 from models.book_model import BookModel
+from models.outbox_event_model import OutboxEventModel
+from models.page_model import PageModel
 from models.user_model import UserModel
 from service.meta.book_service_meta import BookServiceMeta
 from service.meta.user_service_meta import UserServiceMeta
@@ -20,6 +21,8 @@ from utils.custom_exceptions import (
 )
 from utils.dependecy_resolver import ResolveDependency
 from utils.logger_utility import getlogger
+from utils.pagination_utility import build_page, decode_cursor
+from utils.single_flight_utility import single_flight
 
 # from utils.kafka_utility import kafka_seriaizer
 
@@ -30,15 +33,17 @@ class BookService(BookServiceMeta):
     def __init__(
         self,
         book_repository: BookRepositoryMeta = ResolveDependency(BookRepositoryMeta),
-        kafka_producer: AIOKafkaProducer = ResolveDependency(AIOKafkaProducer),
+        outbox_repository: OutboxRepositoryMeta = ResolveDependency(
+            OutboxRepositoryMeta
+        ),
     ) -> None:
         self.repository = book_repository
-        self.kafka_producer = kafka_producer
+        self.outbox_repository = outbox_repository
 
-    def add(self, book: BookModel) -> BookModel:
+    async def add(self, book: BookModel) -> BookModel:
         try:
-            return self.repository.save(
-                BookSchema(
+            return await self.repository.save(
+                BookModel(
                     id=book.id,
                     title=book.title.lower(),
                     publisher=book.publisher.lower(),
@@ -46,8 +51,8 @@ class BookService(BookServiceMeta):
                 )
             )
         except IntegrityError as e:
-            self.rollback()
-            if isinstance(e.orig, UniqueViolation):
+            await self.rollback()
+            if getattr(e.orig, "pgcode", None) == UNIQUE_VIOLATION:
                 error_msg = f"Book with title {book.title} already exists"
                 self._logger.error(error_msg)
                 raise ConflictException(error_msg)
@@ -56,12 +61,33 @@ class BookService(BookServiceMeta):
                 raise Exception(e.orig)
         except Exception as e:
             self._logger.error(f"Failed to save book {book.title} due to: {e}")
-            self.rollback()
+            await self.rollback()
             raise Exception(e)
 
-    def get_by_id(self, id: int) -> BookModel:
+    async def add_all(self, books: List[BookModel]) -> List[BookModel]:
+        if not books:
+            return []
+
+        try:
+            return await self.repository.save_all(
+                [
+                    BookModel(
+                        id=book.id,
+                        title=book.title.lower(),
+                        publisher=book.publisher.lower(),
+                        category=book.category.lower(),
+                    )
+                    for book in books
+                ]
+            )
+        except Exception as e:
+            self._logger.error(f"Failed to save {len(books)} books due to: {e}")
+            await self.rollback()
+            raise Exception(e)
+
+    async def get_by_id(self, id: int) -> BookModel:
         try:
-            book = self.repository.get_by_id(id)
+            book = await self.repository.get_by_id(id)
         except Exception as e:
             self._logger.error(f"Failed to find book with id {id} due to: {e}")
             raise Exception(e)
@@ -71,9 +97,9 @@ class BookService(BookServiceMeta):
 
         return book
 
-    def get_by_title(self, title: str) -> BookModel:
+    async def get_by_title(self, title: str) -> BookModel:
         try:
-            book = self.repository.get_by_title(title)
+            book = await self.repository.get_by_title(title)
         except Exception as e:
             self._logger.error(f"Failed to find book with title {title} due to: {e}")
             raise Exception(e)
@@ -83,12 +109,12 @@ class BookService(BookServiceMeta):
 
         return book
 
-    def return_book(self, id: int) -> BookModel:
+    async def return_book(self, id: int) -> BookModel:
         try:
-            book = self.repository.update_is_borrowed(id, False)
+            book = await self.repository.update_is_borrowed(id, False)
         except Exception as e:
             self._logger.error(f"Failed to return book with id {id} due to: {e}")
-            self.rollback()
+            await self.rollback()
             raise Exception(e)
 
         if book is None:
@@ -96,45 +122,65 @@ class BookService(BookServiceMeta):
 
         return book
 
+    async def return_books(self, titles: List[str]) -> List[BookModel]:
+        if not titles:
+            return []
+
+        try:
+            return await self.repository.update_is_borrowed_by_titles(titles, False)
+        except Exception as e:
+            self._logger.error(f"Failed to return {len(titles)} books due to: {e}")
+            await self.rollback()
+            raise Exception(e)
+
     async def borrow_book(
         self, id: int, user_email: str, borrow_duration_days: int
     ) -> BookModel:
 
         try:
-            existing_book = self.repository.get_by_id(id)
+            book = await self.repository.mark_borrowed(id)
+            book_exists = book is not None or await self.repository.exists(id)
         except Exception as e:
             self._logger.error(f"Failed to borrow book with id {id} due to: {e}")
-            self.rollback()
+            await self.rollback()
             raise Exception(e)
 
-        if existing_book is None:
-            raise NotFoundException("Book not found")
-
-        if existing_book.is_borrowed:
+        # Nothing was updated: either the book doesn't exist or someone else holds it
+        if book is None:
+            if not book_exists:
+                raise NotFoundException("Book not found")
             raise ConflictException("Book has already been borrowed")
 
         try:
-            book = self.repository.update_is_borrowed(id, True)
-            
             # Send message to admin service to borrow book
             message = [
                 BookBorrowModel(
                     book_title=book.title,
                     user_email=user_email,
                     borrow_duration_days=borrow_duration_days,
-                ).model_dump()
+                ).model_dump(mode="json")
             ]
-            await self.kafka_producer.send_and_wait(KAFKA_BORROW_BOOK_TOPIC, message)
+            await self.outbox_repository.save(
+                OutboxEventModel(
+                    topic=KAFKA_BORROW_BOOK_TOPIC, key=book.title, payload=message
+                )
+            )
         except Exception as e:
             self._logger.error(f"Failed to borrow book with id {id} due to: {e}")
-            self.rollback()
+            await self.rollback()
             raise Exception(e)
 
         return book
 
-    def get_all(self) -> List[BookModel]:
+    async def get_all(self, limit: int, cursor: str | None = None) -> PageModel[BookModel]:
+        after_id = decode_cursor(cursor)
         try:
-            books = self.repository.get_all()
+            books = await single_flight.do(
+                ("BookService.get_all", limit, after_id),
+                lambda session: self.repository.with_session(session).get_all(
+                    limit + 1, after_id
+                ),
+            )
         except Exception as e:
             self._logger.error(f"Failed to find any books due to: {e}")
             raise Exception(e)
@@ -142,11 +188,24 @@ class BookService(BookServiceMeta):
         if books is None:
             raise NotFoundException("No Books found")
 
-        return books
+        return build_page(books, limit)
 
-    def search_books(self, filters: BookFilterModel) -> List[BookModel]:
+    async def search_books(
+        self, filters: BookFilterModel, limit: int, cursor: str | None = None
+    ) -> PageModel[BookModel]:
+        after_id = decode_cursor(cursor)
         try:
-            books = self.repository.search_books(filters)
+            books = await single_flight.do(
+                (
+                    "BookService.search_books",
+                    tuple(sorted(filters.model_dump(exclude_none=True).items())),
+                    limit,
+                    after_id,
+                ),
+                lambda session: self.repository.with_session(session).search_books(
+                    filters, limit + 1, after_id
+                ),
+            )
         except Exception as e:
             self._logger.error(f"Failed to find any books due to: {e}")
             raise Exception(e)
@@ -154,14 +213,14 @@ class BookService(BookServiceMeta):
         if books is None:
             raise NotFoundException("No Books found matching criteria")
 
-        return books
+        return build_page(books, limit)
 
-    def remove_book(self, id: int) -> BookModel:
+    async def remove_book(self, id: int) -> BookModel:
         try:
-            removed_book = self.repository.remove(id)
+            removed_book = await self.repository.remove(id)
         except Exception as e:
             self._logger.error(f"Failed to remove book with id {id} due to: {e}")
-            self.rollback()
+            await self.rollback()
             raise Exception(e)
 
         if removed_book is None:
@@ -169,8 +228,16 @@ class BookService(BookServiceMeta):
 
         return removed_book
 
-    def rollback(self) -> None:
-        self.repository.rollback()
+    async def remove_books(self, titles: List[str]) -> List[BookModel]:
+        if not titles:
+            return []
+
+        try:
+            return await self.repository.remove_by_titles(titles)
+        except Exception as e:
+            self._logger.error(f"Failed to remove {len(titles)} books due to: {e}")
+            await self.rollback()
+            raise Exception(e)
 
-    def close(self) -> None:
-        self.repository.close()
\ No newline at end of file
+    async def rollback(self) -> None:
+        await self.repository.rollback()
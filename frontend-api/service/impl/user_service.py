@@ -1,11 +1,11 @@
-from aiokafka import AIOKafkaProducer
-from psycopg2.errors import UniqueViolation
+from psycopg2.errorcodes import UNIQUE_VIOLATION
 from sqlalchemy.exc import IntegrityError
 import re
 
 from database.repository.impl.user_repository import UserRepository
+from database.repository.meta.outbox_repository_meta import OutboxRepositoryMeta
 from database.repository.meta.user_repository_meta import UserRepositoryMeta
-from database.schema.user_schema import UserSchema
+from models.outbox_event_model import OutboxEventModel
 from models.user_model import UserModel
 from models.user_update_model import UserUpdateModel
 from service.meta.user_service_meta import UserServiceMeta
@@ -22,10 +22,12 @@ class UserService(UserServiceMeta):
     def __init__(
         self,
         user_repository: UserRepositoryMeta = ResolveDependency(UserRepositoryMeta),
-        kafka_producer: AIOKafkaProducer = ResolveDependency(AIOKafkaProducer),
+        outbox_repository: OutboxRepositoryMeta = ResolveDependency(
+            OutboxRepositoryMeta
+        ),
     ) -> None:
         self.repository = user_repository
-        self.kafka_producer = kafka_producer
+        self.outbox_repository = outbox_repository
 
     async def add(self, user: UserModel) -> UserModel:
         
@@ -33,25 +35,27 @@ class UserService(UserServiceMeta):
             raise BadRequestException("Invalid Email Supplied")
         
         try:
-            saved_user = UserModel.model_validate(
-                self.repository.save(
-                    UserSchema(
-                        email=user.email,
-                        firstname=user.firstname,
-                        lastname=user.lastname,
-                    )
+            saved_user = await self.repository.save(
+                UserModel(
+                    email=user.email,
+                    firstname=user.firstname,
+                    lastname=user.lastname,
                 )
             )
 
             # Send user info to the admin api on creation
-            await self.kafka_producer.send_and_wait(
-                KAFKA_CREATE_USER_TOPIC, [saved_user.model_dump()]
+            await self.outbox_repository.save(
+                OutboxEventModel(
+                    topic=KAFKA_CREATE_USER_TOPIC,
+                    key=saved_user.email,
+                    payload=[saved_user.model_dump(mode="json")],
+                )
             )
 
             return saved_user
         except IntegrityError as e:
-            self.rollback()
-            if isinstance(e.orig, UniqueViolation):
+            await self.rollback()
+            if getattr(e.orig, "pgcode", None) == UNIQUE_VIOLATION:
                 error_msg = f"User with email {user.email} already exists"
                 self._logger.error(error_msg)
                 raise ConflictException(error_msg)
@@ -60,12 +64,12 @@ class UserService(UserServiceMeta):
                 raise Exception(e.orig)
         except Exception as e:
             self._logger.error(f"Failed to save user {user.email} due to: {e}")
-            self.rollback()
+            await self.rollback()
             raise Exception(e)
 
-    def get_by_id(self, id: int) -> UserModel:
+    async def get_by_id(self, id: int) -> UserModel:
         try:
-            user = self.repository.get_by_id(id)
+            user = await self.repository.get_by_id(id)
         except Exception as e:
             self._logger.error(f"Failed to find user with id {id} due to: {e}")
             raise Exception(e)
@@ -81,25 +85,34 @@ class UserService(UserServiceMeta):
             raise BadRequestException("Invalid Email Supplied")
         
         try:
-            user = self.repository.update(id, user_update)
+            user = await self.repository.update(id, user_update)
         except Exception as e:
             self._logger.error(f"Failed to update user with id {id} due to: {e}")
-            self.rollback()
+            await self.rollback()
             raise Exception(e)
 
         if user is None:
             raise NotFoundException("User not found")
 
-        # Send user info to the admin api on creation
-        await self.kafka_producer.send_and_wait(
-            KAFKA_UPDATE_USER_TOPIC, [user_update.model_dump()]
-        )
+        try:
+            # Send user info to the admin api on update
+            await self.outbox_repository.save(
+                OutboxEventModel(
+                    topic=KAFKA_UPDATE_USER_TOPIC,
+                    key=user.email,
+                    payload=[user_update.model_dump(mode="json")],
+                )
+            )
+        except Exception as e:
+            self._logger.error(f"Failed to update user with id {id} due to: {e}")
+            await self.rollback()
+            raise Exception(e)
 
         return user
 
-    def get_by_email(self, email: str) -> UserModel:
+    async def get_by_email(self, email: str) -> UserModel:
         try:
-            user = self.repository.get_by_email(email)
+            user = await self.repository.get_by_email(email)
         except Exception as e:
             self._logger.error(f"Failed to find user with email {email} due to: {e}")
             raise Exception(e)
@@ -113,8 +126,5 @@ class UserService(UserServiceMeta):
         email_regex = re.compile(r"[^@]+@[^@]+\.[^@]+")
         return email_regex.match(email)
     
-    def rollback(self) -> None:
-        self.repository.rollback()
-
-    def close(self) -> None:
-        self.repository.close()
\ No newline at end of file
+    async def rollback(self) -> None:
+        await self.repository.rollback()
@@ -3,45 +3,56 @@ from typing import List
 from models.book_borrow_model import BookBorrowModel
 from models.book_filter_model import BookFilterModel
 from models.book_model import BookModel
+from models.page_model import PageModel
 
 
 class BookServiceMeta(ABC):
     @abstractmethod
-    def add(self, book: BookModel) -> BookModel:
+    async def add(self, book: BookModel) -> BookModel:
         pass
 
     @abstractmethod
-    def get_by_id(self, id: int) -> BookModel:
+    async def add_all(self, books: List[BookModel]) -> List[BookModel]:
+        pass
+
+    @abstractmethod
+    async def get_by_id(self, id: int) -> BookModel:
         pass
     
     @abstractmethod
-    def get_by_title(self, title: str) -> BookModel:
+    async def get_by_title(self, title: str) -> BookModel:
         pass
 
     @abstractmethod
-    def return_book(self, id: int) -> BookModel:
+    async def return_book(self, id: int) -> BookModel:
         pass
 
     @abstractmethod
-    def get_all(self) -> List[BookModel]:
+    async def return_books(self, titles: List[str]) -> List[BookModel]:
         pass
 
     @abstractmethod
-    def search_books(self, filters: BookFilterModel) -> List[BookModel]:
+    async def get_all(self, limit: int, cursor: str | None = None) -> PageModel[BookModel]:
         pass
 
     @abstractmethod
-    def remove_book(self, id: int) -> BookModel:
+    async def search_books(
+        self, filters: BookFilterModel, limit: int, cursor: str | None = None
+    ) -> PageModel[BookModel]:
+        pass
+
+    @abstractmethod
+    async def remove_book(self, id: int) -> BookModel:
         pass
     
     @abstractmethod
-    def borrow_book(self, id:int, user_email: str, borrow_duration_days: int) -> BookModel:
+    async def remove_books(self, titles: List[str]) -> List[BookModel]:
         pass
 
     @abstractmethod
-    def rollback(self) -> None:
+    async def borrow_book(self, id:int, user_email: str, borrow_duration_days: int) -> BookModel:
         pass
-    
+
     @abstractmethod
-    def close(self) -> None:
-        pass
\ No newline at end of file
+    async def rollback(self) -> None:
+        pass
@@ -5,19 +5,19 @@ from models.user_update_model import UserUpdateModel
 
 class UserServiceMeta(ABC):
     @abstractmethod
-    def add(self, user: UserModel) -> UserModel:
+    async def add(self, user: UserModel) -> UserModel:
         pass
 
     @abstractmethod
-    def get_by_id(self, id: int) -> UserModel:
+    async def get_by_id(self, id: int) -> UserModel:
         pass
     
     @abstractmethod
-    def get_by_email(self, email: str) -> UserModel:
+    async def get_by_email(self, email: str) -> UserModel:
         pass
 
     @abstractmethod
-    def update(self, id: int, user_update: UserUpdateModel) -> UserModel:
+    async def update(self, id: int, user_update: UserUpdateModel) -> UserModel:
         pass
     
     @abstractmethod
@@ -25,9 +25,5 @@ class UserServiceMeta(ABC):
         pass
     
     @abstractmethod
-    def rollback(self) -> None:
+    async def rollback(self) -> None:
         pass
-    
-    @abstractmethod
-    def close(self) -> None:
-        pass
\ No newline at end of file
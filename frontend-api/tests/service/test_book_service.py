@@ -1,13 +1,14 @@
+import asyncio
 import unittest
-from unittest.mock import MagicMock, AsyncMock
+from unittest.mock import MagicMock
 
-from aiokafka import AIOKafkaProducer
 
 from models.book_filter_model import BookFilterModel
 from service.impl.book_service import BookService
 from database.repository.meta.book_repository_meta import BookRepositoryMeta
+from database.repository.meta.outbox_repository_meta import OutboxRepositoryMeta
 from models.book_model import BookModel
-from utils.custom_exceptions import NotFoundException
+from utils.custom_exceptions import ConflictException, NotFoundException
 
 
 class TestBookService(unittest.IsolatedAsyncioTestCase):
@@ -24,97 +25,173 @@ class TestBookService(unittest.IsolatedAsyncioTestCase):
         self.mock_user_email = "user@example.com"
 
         self.mock_repository: BookRepositoryMeta = MagicMock(spec=BookRepositoryMeta)
-        self.mock_kafka_producer: AIOKafkaProducer = AsyncMock(spec=AIOKafkaProducer)
+        # Coalesced reads run on a session of their own
+        self.mock_repository.with_session.return_value = self.mock_repository
+        self.mock_outbox_repository: OutboxRepositoryMeta = MagicMock(
+            spec=OutboxRepositoryMeta
+        )
 
-        self.book_service = BookService(self.mock_repository, self.mock_kafka_producer)
+        self.book_service = BookService(self.mock_repository, self.mock_outbox_repository)
 
-    def test_add_book_returns_book(self):
+    async def test_add_book_returns_book(self):
         book_to_add = self.mock_book
         self.mock_repository.save.return_value = book_to_add
 
-        result = self.book_service.add(book_to_add)
+        result = await self.book_service.add(book_to_add)
 
         self.assertEqual(book_to_add, result)
 
-    def test_remove_book_returns_book(self):
+    async def test_add_all_saves_lowercased_books(self):
+        book = self.mock_book
+        self.mock_repository.save_all.return_value = [book]
+
+        result = await self.book_service.add_all([book])
+
+        saved_books = self.mock_repository.save_all.call_args.args[0]
+        self.assertEqual([book.title.lower()], [b.title for b in saved_books])
+        self.assertEqual([book], result)
+
+    async def test_add_all_with_no_books_skips_repository(self):
+        result = await self.book_service.add_all([])
+
+        self.mock_repository.save_all.assert_not_called()
+        self.assertEqual([], result)
+
+    async def test_return_books_updates_borrow_flag_by_titles(self):
+        titles = [self.mock_book.title]
+        self.mock_repository.update_is_borrowed_by_titles.return_value = [self.mock_book]
+
+        await self.book_service.return_books(titles)
+
+        self.mock_repository.update_is_borrowed_by_titles.assert_called_with(titles, False)
+
+    async def test_remove_books_removes_by_titles(self):
+        titles = [self.mock_book.title]
+        self.mock_repository.remove_by_titles.return_value = [self.mock_book]
+
+        result = await self.book_service.remove_books(titles)
+
+        self.mock_repository.remove_by_titles.assert_called_with(titles)
+        self.assertEqual([self.mock_book], result)
+
+    async def test_remove_book_returns_book(self):
         book_to_remove = self.mock_book
         self.mock_repository.remove.return_value = book_to_remove
 
-        result = self.book_service.remove_book(book_to_remove.id)
+        result = await self.book_service.remove_book(book_to_remove.id)
 
         self.assertEqual(book_to_remove, result)
 
-    def test_find_book_by_id_returns_book(self):
+    async def test_find_book_by_id_returns_book(self):
         book = self.mock_book
         self.mock_repository.get_by_id.return_value = book
 
-        result = self.book_service.get_by_id(book.id)
+        result = await self.book_service.get_by_id(book.id)
 
         self.assertEqual(book, result)
 
-    def test_find_all_books_returns_list_of_books(self):
+    async def test_find_all_books_returns_list_of_books(self):
         book = self.mock_book
         self.mock_repository.get_all.return_value = [book]
 
-        result = self.book_service.get_all()
+        result = await self.book_service.get_all(10)
 
-        self.assertEqual([book], result)
+        self.assertEqual([book], result.items)
+        self.assertIsNone(result.next_cursor)
+
+    async def test_find_all_books_with_more_rows_returns_next_cursor(self):
+        first_book = self.mock_book
+        second_book = self.mock_book.model_copy(update={"id": 2})
+        self.mock_repository.get_all.return_value = [first_book, second_book]
+
+        page = await self.book_service.get_all(1)
+        await self.book_service.get_all(1, page.next_cursor)
 
-    def test_search_books_calls_repository_with_filters(self):
+        self.assertEqual([first_book], page.items)
+        self.mock_repository.get_all.assert_called_with(2, first_book.id)
+
+    async def test_search_books_calls_repository_with_filters(self):
         book = self.mock_book
         filters = BookFilterModel(
             title="Test Title", category="Test Category", publisher="Test Publisher"
         )
-        self.mock_repository.search_books.return_value = book
+        self.mock_repository.search_books.return_value = [book]
+
+        result = await self.book_service.search_books(filters, 10)
+
+        self.mock_repository.search_books.assert_called_with(filters, 11, 0)
+
+    async def test_concurrent_identical_searches_share_one_query(self):
+        book = self.mock_book
+
+        async def search_books(filters, limit, after_id):
+            await asyncio.sleep(0)
+            return [book]
 
-        result = self.book_service.search_books(filters)
+        self.mock_repository.search_books.side_effect = search_books
+
+        await asyncio.gather(
+            self.book_service.search_books(BookFilterModel(title="test"), 10),
+            self.book_service.search_books(BookFilterModel(title="test"), 10),
+            self.book_service.search_books(BookFilterModel(category="test"), 10),
+        )
 
-        self.mock_repository.search_books.assert_called_with(filters)
+        self.assertEqual(2, self.mock_repository.search_books.call_count)
 
-    def test_book_not_found_raises_not_found_exception(self):
+    async def test_book_not_found_raises_not_found_exception(self):
         self.mock_repository.get_by_id.return_value = None
 
         with self.assertRaises(NotFoundException):
-            self.book_service.get_by_id(2)
+            await self.book_service.get_by_id(2)
 
-    def test_return_book_updates_borrow_flag_with_false(self):
+    async def test_return_book_updates_borrow_flag_with_false(self):
         id = 1
         book = self.mock_book
         self.mock_repository.update_is_borrowed.return_value = book
 
-        self.book_service.return_book(id)
+        await self.book_service.return_book(id)
 
         self.mock_repository.update_is_borrowed.assert_called_with(id, False)
 
-    def test_return_invalid_book_raises_not_found_exception(self):
+    async def test_return_invalid_book_raises_not_found_exception(self):
         self.mock_repository.update_is_borrowed.return_value = None
-        self.mock_kafka_producer.send_and_wait.return_value = None
 
         with self.assertRaises(NotFoundException):
-            self.book_service.return_book(2)
+            await self.book_service.return_book(2)
 
     async def test_borrow_book_updates_borrow_flag_with_true(self):
         id = 1
         book = self.mock_book
         borrow_duration_days = self.mock_borrow_duration_days
         user_email = self.mock_user_email
-        self.mock_repository.get_by_id.return_value = book
-        self.mock_repository.update_is_borrowed.return_value = book
-        self.mock_kafka_producer.send_and_wait.return_value = None
+        self.mock_repository.mark_borrowed.return_value = book
 
         await self.book_service.borrow_book(id, user_email, borrow_duration_days)
 
-        self.mock_repository.update_is_borrowed.assert_called_with(id, True)
+        self.mock_repository.mark_borrowed.assert_called_with(id)
+        self.mock_repository.exists.assert_not_called()
+        self.mock_outbox_repository.save.assert_called_once()
 
     async def test_borrow_invalid_book_raises_not_found_exception(self):
         borrow_duration_days = self.mock_borrow_duration_days
         user_email = self.mock_user_email
-        self.mock_repository.get_by_id.return_value = None
-        self.mock_kafka_producer.send_and_wait.return_value = None
+        self.mock_repository.mark_borrowed.return_value = None
+        self.mock_repository.exists.return_value = False
 
         with self.assertRaises(NotFoundException):
             await self.book_service.borrow_book(2, user_email, borrow_duration_days)
 
-    def test_rollback_calls_repository_rollback(self):
-        self.book_service.rollback()
+    async def test_borrow_already_borrowed_book_raises_conflict_exception(self):
+        borrow_duration_days = self.mock_borrow_duration_days
+        user_email = self.mock_user_email
+        self.mock_repository.mark_borrowed.return_value = None
+        self.mock_repository.exists.return_value = True
+
+        with self.assertRaises(ConflictException):
+            await self.book_service.borrow_book(1, user_email, borrow_duration_days)
+
+        self.mock_outbox_repository.save.assert_not_called()
+
+    async def test_rollback_calls_repository_rollback(self):
+        await self.book_service.rollback()
         self.mock_repository.rollback.assert_called_once()
@@ -0,0 +1,36 @@
+import asyncio
+from typing import List, Tuple
+
+from aiokafka import ConsumerRecord
+
+
+async def import_kafka_utility() -> None:
+    import utils.kafka_utility  # noqa: F401
+
+
+# The Kafka clients are created when kafka_utility is imported, which aiokafka
+# only allows within a running event loop. Tests replace them with mocks
+asyncio.run(import_kafka_utility())
+
+
+def make_message(
+    value: bytes,
+    key: bytes | None = None,
+    topic: str = "test-topic",
+    partition: int = 0,
+    offset: int = 0,
+    headers: List[Tuple[str, bytes]] | None = None,
+) -> ConsumerRecord:
+    return ConsumerRecord(
+        topic=topic,
+        partition=partition,
+        offset=offset,
+        timestamp=0,
+        timestamp_type=0,
+        key=key,
+        value=value,
+        checksum=None,
+        serialized_key_size=len(key or b""),
+        serialized_value_size=len(value),
+        headers=headers or [],
+    )
@@ -0,0 +1,76 @@
+import unittest
+
+from models.book_model import BookModel
+from utils.cache_utility import BookCache
+
+
+class TestBookCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.books = [
+            BookModel(
+                id=id,
+                title=f"Test Book {id}",
+                publisher="Test Publisher",
+                category="Test Category",
+                is_borrowed=False,
+            )
+            for id in range(1, 7)
+        ]
+        self.cache = BookCache(max_size=3)
+
+    def test_get_counts_hits_and_misses(self):
+        self.cache.set_book(1, self.books[0], self.cache.generation)
+
+        self.assertEqual((True, self.books[0]), self.cache.get(("book", 1)))
+        self.assertEqual((False, None), self.cache.get(("book", 2)))
+        self.assertEqual(1, self.cache.get_status().hits)
+        self.assertEqual(1, self.cache.get_status().misses)
+
+    def test_set_beyond_max_size_evicts_least_recently_used(self):
+        for book in self.books[:3]:
+            self.cache.set_book(book.id, book, self.cache.generation)
+        self.cache.get(("book", 1))
+
+        self.cache.set_book(4, self.books[3], self.cache.generation)
+
+        self.assertTrue(self.cache.get(("book", 1))[0])
+        self.assertFalse(self.cache.get(("book", 2))[0])
+        self.assertEqual(3, self.cache.get_status().size)
+
+    def test_evict_books_evicts_only_pages_covering_the_ids(self):
+        generation = self.cache.generation
+        self.cache.set_page("first", self.books[:2], 2, 0, generation)
+        self.cache.set_page("second", self.books[2:4], 2, 2, generation)
+        self.cache.set_page("last", self.books[4:], 3, 4, generation)
+
+        self.cache.evict_books([3])
+
+        self.assertTrue(self.cache.get("first")[0])
+        self.assertFalse(self.cache.get("second")[0])
+        self.assertTrue(self.cache.get("last")[0])
+
+    def test_evict_books_after_the_last_page_evicts_it(self):
+        self.cache.set_page("last", self.books[4:], 3, 4, self.cache.generation)
+
+        self.cache.evict_books([100])
+
+        self.assertFalse(self.cache.get("last")[0])
+
+    def test_set_after_an_eviction_since_the_read_began_is_skipped(self):
+        generation = self.cache.generation
+        # A write commits and evicts while the read's query is running
+        self.cache.evict_books([1])
+
+        self.cache.set_book(1, self.books[0], generation)
+        self.cache.set_page("first", self.books[:2], 2, 0, generation)
+
+        self.assertFalse(self.cache.get(("book", 1))[0])
+        self.assertFalse(self.cache.get("first")[0])
+
+    def test_set_with_zero_max_size_caches_nothing(self):
+        cache = BookCache(max_size=0)
+
+        cache.set_book(1, self.books[0], cache.generation)
+
+        self.assertFalse(cache.get(("book", 1))[0])
@@ -0,0 +1,110 @@
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from fastapi import HTTPException, Request, Response
+
+from utils.catalog_version_utility import CatalogVersion, check_catalog_version
+
+
+def make_request(if_none_match: str | None = None) -> Request:
+    headers = [] if if_none_match is None else [(b"if-none-match", if_none_match.encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+class TestCatalogVersion(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.modified_at = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        self.version = CatalogVersion()
+        self.version.start_listening()
+
+    def test_get_headers_without_a_version_is_empty(self):
+        self.assertEqual({}, self.version.get_headers())
+
+    def test_get_headers_returns_the_delivered_version(self):
+        self.version.delivered(7, self.modified_at)
+
+        self.assertEqual(
+            {"ETag": 'W/"7"', "Last-Modified": "Tue, 02 Jan 2024 03:04:05 GMT"},
+            self.version.get_headers(),
+        )
+
+    def test_the_last_delivered_version_is_current_even_if_lower(self):
+        self.version.delivered(8, self.modified_at)
+        self.version.delivered(7, self.modified_at)
+
+        self.assertEqual('W/"7"', self.version.get_headers()["ETag"])
+
+    def test_get_headers_is_empty_while_a_commit_is_pending(self):
+        self.version.delivered(7, self.modified_at)
+        self.version.committing(8)
+
+        self.assertEqual({}, self.version.get_headers())
+
+        self.version.delivered(8, self.modified_at)
+
+        self.assertEqual('W/"8"', self.version.get_headers()["ETag"])
+
+    def test_rolled_back_commit_is_no_longer_pending(self):
+        self.version.delivered(7, self.modified_at)
+        self.version.committing(8)
+        self.version.rolled_back(8)
+
+        self.assertEqual('W/"7"', self.version.get_headers()["ETag"])
+
+    def test_commits_are_not_pending_when_not_listening(self):
+        self.version.reset()
+        self.version.committing(8)
+        self.version.start_listening()
+        self.version.delivered(7, self.modified_at)
+
+        self.assertEqual('W/"7"', self.version.get_headers()["ETag"])
+
+    def test_reset_forgets_the_version(self):
+        self.version.delivered(7, self.modified_at)
+        self.version.reset()
+
+        self.assertEqual({}, self.version.get_headers())
+
+
+class TestCheckCatalogVersion(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.version = CatalogVersion()
+        self.version.start_listening()
+        self.version.delivered(7, datetime(2024, 1, 2, tzinfo=timezone.utc))
+        patcher = patch("utils.catalog_version_utility.catalog_version", self.version)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_matching_tag_answers_not_modified(self):
+        for if_none_match in ['W/"7"', '"7"', '"6", W/"7"']:
+            with self.assertRaises(HTTPException) as context:
+                check_catalog_version(make_request(if_none_match), Response())
+
+            self.assertEqual(304, context.exception.status_code)
+            self.assertEqual('W/"7"', context.exception.headers["ETag"])
+
+    def test_other_tag_adds_the_headers(self):
+        response = Response()
+
+        check_catalog_version(make_request('W/"6"'), response)
+
+        self.assertEqual('W/"7"', response.headers["ETag"])
+        self.assertIn("Last-Modified", response.headers)
+
+    def test_wildcard_does_not_answer_not_modified(self):
+        response = Response()
+
+        check_catalog_version(make_request("*"), response)
+
+        self.assertEqual('W/"7"', response.headers["ETag"])
+
+    def test_without_a_version_adds_no_headers(self):
+        self.version.reset()
+        response = Response()
+
+        check_catalog_version(make_request('W/"7"'), response)
+
+        self.assertNotIn("ETag", response.headers)
@@ -0,0 +1,92 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from aiokafka import AIOKafkaConsumer, TopicPartition
+
+from utils.environment import (
+    KAFKA_CONSUMER_LATENCY_BUDGET_MS,
+    KAFKA_CONSUMER_MAX_BATCH_SIZE,
+)
+from utils.flow_control_utility import ConsumerFlowControl
+
+
+class TestConsumerFlowControl(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.first_partition = TopicPartition("test-topic", 0)
+        self.second_partition = TopicPartition("test-topic", 1)
+
+        self.mock_consumer: AIOKafkaConsumer = MagicMock(spec=AIOKafkaConsumer)
+        self.mock_consumer.assignment.return_value = {
+            self.first_partition,
+            self.second_partition,
+        }
+        self.mock_consumer.paused.return_value = set()
+
+        self.flow_control = ConsumerFlowControl()
+        self.clock = patch("utils.flow_control_utility.time.monotonic").start()
+        self.clock.return_value = 100.0
+        self.addCleanup(patch.stopall)
+
+    async def apply(self, count: int, latency_ms: float) -> None:
+        async with self.flow_control.applying(self.mock_consumer, count):
+            self.clock.return_value += latency_ms / 1000
+
+    async def test_fetch_within_budget_keeps_partitions_running(self):
+        await self.apply(10, KAFKA_CONSUMER_LATENCY_BUDGET_MS / 2)
+
+        self.flow_control.update(self.mock_consumer)
+
+        self.mock_consumer.pause.assert_not_called()
+        self.assertEqual(
+            KAFKA_CONSUMER_MAX_BATCH_SIZE,
+            self.flow_control.max_records(self.mock_consumer),
+        )
+
+    async def test_slow_fetch_pauses_partitions_for_as_long_again(self):
+        await self.apply(10, KAFKA_CONSUMER_LATENCY_BUDGET_MS * 2)
+
+        self.flow_control.update(self.mock_consumer)
+
+        self.mock_consumer.pause.assert_called_once()
+        self.assertEqual(
+            {self.first_partition, self.second_partition},
+            set(self.mock_consumer.pause.call_args.args),
+        )
+        self.assertEqual("PAUSED", self.flow_control.get_status().status)
+
+        self.clock.return_value += KAFKA_CONSUMER_LATENCY_BUDGET_MS * 2 / 1000
+        self.flow_control.update(self.mock_consumer)
+
+        self.mock_consumer.resume.assert_called_once()
+        self.assertEqual("RUNNING", self.flow_control.get_status().status)
+
+    async def test_resume_leaves_partitions_paused_elsewhere_paused(self):
+        self.mock_consumer.paused.return_value = {self.second_partition}
+        await self.apply(10, KAFKA_CONSUMER_LATENCY_BUDGET_MS * 2)
+        self.flow_control.update(self.mock_consumer)
+
+        self.clock.return_value += KAFKA_CONSUMER_LATENCY_BUDGET_MS * 2 / 1000
+        self.flow_control.update(self.mock_consumer)
+
+        self.mock_consumer.pause.assert_called_once_with(self.first_partition)
+        self.mock_consumer.resume.assert_called_once_with(self.first_partition)
+
+    async def test_slow_fetch_limits_the_next_fetch_to_the_budget(self):
+        await self.apply(100, KAFKA_CONSUMER_LATENCY_BUDGET_MS * 4)
+
+        self.assertEqual(25, self.flow_control.max_records(self.mock_consumer))
+
+    async def test_slow_fetch_of_another_consumer_pauses_this_one(self):
+        other_consumer: AIOKafkaConsumer = MagicMock(spec=AIOKafkaConsumer)
+        async with self.flow_control.applying(other_consumer, 10):
+            self.clock.return_value += KAFKA_CONSUMER_LATENCY_BUDGET_MS * 2 / 1000
+
+        self.flow_control.update(self.mock_consumer)
+
+        self.mock_consumer.pause.assert_called_once()
+        # Only the consumer that was slow fetches smaller batches
+        self.assertEqual(
+            KAFKA_CONSUMER_MAX_BATCH_SIZE,
+            self.flow_control.max_records(self.mock_consumer),
+        )
@@ -0,0 +1,109 @@
+import asyncio
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from aiokafka import AIOKafkaProducer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.repository.meta.outbox_repository_meta import OutboxRepositoryMeta
+from models.outbox_event_model import OutboxEventModel
+from utils.kafka_utility import EVENT_TYPES
+from utils.outbox_utility import publish_outbox_events
+
+
+class TestPublishOutboxEvents(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        topic = next(iter(EVENT_TYPES))
+        self.events = [
+            OutboxEventModel(
+                id=id,
+                topic=topic,
+                key=f"Book {id}",
+                payload=[f"Book {id}"],
+                created_at=datetime(2024, 1, 2, tzinfo=timezone.utc),
+            )
+            for id in (3, 4, 7)
+        ]
+
+        self.mock_session: AsyncSession = MagicMock(spec=AsyncSession)
+        self.mock_session.commit = AsyncMock()
+        self.mock_session.rollback = AsyncMock()
+        self.mock_session.close = AsyncMock()
+        self.mock_outbox_repository: OutboxRepositoryMeta = MagicMock(
+            spec=OutboxRepositoryMeta
+        )
+        self.mock_outbox_repository.get_pending.return_value = self.events
+
+        self.mock_producer: AIOKafkaProducer = MagicMock(spec=AIOKafkaProducer)
+        self.mock_producer.send = AsyncMock(side_effect=self.send)
+        self.deliveries = []
+
+        for target, value in [
+            ("database.schema.database.create_session", MagicMock(return_value=self.mock_session)),
+            ("utils.outbox_utility.OutboxRepository", MagicMock(return_value=self.mock_outbox_repository)),
+        ]:
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def send(self, topic, value, key=None):
+        delivery = asyncio.get_running_loop().create_future()
+        self.deliveries.append(delivery)
+        return delivery
+
+    async def start_publishing(self) -> asyncio.Task:
+        task = asyncio.create_task(publish_outbox_events(self.mock_producer))
+        while len(self.deliveries) < len(self.events):
+            await asyncio.sleep(0)
+        return task
+
+    async def test_events_are_sent_in_the_order_they_are_pending(self):
+        task = await self.start_publishing()
+        for delivery in self.deliveries:
+            delivery.set_result(None)
+        self.assertEqual(3, await task)
+
+        sent = self.mock_producer.send.await_args_list
+        self.assertEqual(
+            [event.key for event in self.events], [call.kwargs["key"] for call in sent]
+        )
+        envelope = sent[0].args[1]
+        self.assertEqual(EVENT_TYPES[self.events[0].topic], envelope.type)
+        self.assertEqual(self.events[0].event_id, envelope.event_id)
+        self.assertEqual(self.events[0].created_at, envelope.produced_at)
+
+    async def test_events_are_removed_only_once_every_send_is_acknowledged(self):
+        task = await self.start_publishing()
+        self.deliveries[0].set_result(None)
+        self.deliveries[2].set_result(None)
+        await asyncio.sleep(0)
+
+        self.mock_outbox_repository.remove_all.assert_not_called()
+
+        self.deliveries[1].set_result(None)
+        await task
+
+        self.mock_outbox_repository.remove_all.assert_awaited_once_with([3, 4, 7])
+        self.mock_session.commit.assert_awaited_once()
+
+    async def test_events_are_kept_when_a_send_fails(self):
+        task = await self.start_publishing()
+        self.deliveries[0].set_result(None)
+        self.deliveries[1].set_exception(Exception("broker unavailable"))
+        self.deliveries[2].set_result(None)
+
+        with self.assertRaises(Exception):
+            await task
+
+        self.mock_outbox_repository.remove_all.assert_not_called()
+        self.mock_session.rollback.assert_awaited_once()
+        self.mock_session.commit.assert_not_called()
+
+    async def test_empty_outbox_sends_nothing(self):
+        self.mock_outbox_repository.get_pending.return_value = []
+
+        self.assertEqual(0, await publish_outbox_events(self.mock_producer))
+
+        self.mock_producer.send.assert_not_called()
@@ -0,0 +1,139 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.repository.meta.processed_event_repository_meta import (
+    ProcessedEventRepositoryMeta,
+)
+from models.admin_event_model import BookReturnedEventModel
+from models.event_envelope_model import EventEnvelopeModel
+from tests.utils import make_message
+from utils.constants import BOOK_RETURNED_EVENT
+from utils.kafka_utility import kafka_seriaizer
+from utils.lifespan_utility import handle_admin_updates
+from utils.processed_event_utility import claim_events
+
+
+class TestClaimEvents(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.mock_session: AsyncSession = MagicMock(spec=AsyncSession)
+        self.mock_processed_event_repository: ProcessedEventRepositoryMeta = MagicMock(
+            spec=ProcessedEventRepositoryMeta
+        )
+        patcher = patch(
+            "utils.processed_event_utility.ProcessedEventRepository",
+            return_value=self.mock_processed_event_repository,
+        )
+        self.mock_repository_class = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_claim_skips_events_already_processed(self):
+        processed = EventEnvelopeModel(type="test", payload=[])
+        new = EventEnvelopeModel(type="test", payload=[])
+        # Ids already in processed_events are left out of what add_all returns
+        self.mock_processed_event_repository.add_all.return_value = [new.event_id]
+
+        result = await claim_events(self.mock_session, [processed, new])
+
+        self.assertEqual([new], result)
+        self.mock_repository_class.assert_called_once_with(db=self.mock_session)
+        self.mock_processed_event_repository.add_all.assert_awaited_once_with(
+            [processed.event_id, new.event_id]
+        )
+
+    async def test_claim_applies_an_event_repeated_in_a_fetch_once(self):
+        event = EventEnvelopeModel(type="test", payload=[])
+        self.mock_processed_event_repository.add_all.return_value = [event.event_id]
+
+        result = await claim_events(self.mock_session, [event, event.model_copy()])
+
+        self.assertEqual([event], result)
+
+    async def test_claim_without_events_claims_nothing(self):
+        self.assertEqual([], await claim_events(self.mock_session, []))
+        self.mock_processed_event_repository.add_all.assert_not_called()
+
+
+class TestHandleAdminUpdates(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.events = [
+            BookReturnedEventModel(type=BOOK_RETURNED_EVENT, payload=[f"Book {i}"])
+            for i in range(2)
+        ]
+        self.messages = {
+            "tp": [
+                make_message(kafka_seriaizer(event), key=event.payload[0].encode(), offset=i)
+                for i, event in enumerate(self.events)
+            ]
+        }
+
+        self.sessions = []
+        self.claimed_ids = set()
+        self.mock_handle_admin_update = AsyncMock()
+        self.mock_key_retries = MagicMock()
+        self.mock_key_retries.has_failed.return_value = False
+        self.mock_key_retries.retry_later = AsyncMock()
+        for target, value in [
+            ("database.schema.database.create_session", MagicMock(side_effect=self.create_session)),
+            ("utils.processed_event_utility.ProcessedEventRepository", MagicMock(side_effect=self.create_repository)),
+            ("utils.lifespan_utility.get_book_service", MagicMock()),
+            ("utils.lifespan_utility.handle_admin_update", self.mock_handle_admin_update),
+            ("utils.lifespan_utility.KeyRetries", MagicMock(return_value=self.mock_key_retries)),
+        ]:
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def create_session(self) -> AsyncSession:
+        session = MagicMock(spec=AsyncSession)
+        session.info = {"claimed": set()}
+        session.commit = AsyncMock(
+            side_effect=lambda: self.claimed_ids.update(session.info["claimed"])
+        )
+        session.rollback = AsyncMock()
+        session.close = AsyncMock()
+        self.sessions.append(session)
+        return session
+
+    def create_repository(self, db: AsyncSession) -> ProcessedEventRepositoryMeta:
+        # Claims are only kept once the session that made them commits
+        async def add_all(event_ids):
+            new_ids = [id for id in event_ids if id not in self.claimed_ids]
+            db.info["claimed"].update(new_ids)
+            return new_ids
+
+        repository = MagicMock(spec=ProcessedEventRepositoryMeta)
+        repository.add_all = AsyncMock(side_effect=add_all)
+        return repository
+
+    async def test_batch_claims_and_applies_every_event_together(self):
+        await handle_admin_updates(self.messages)
+
+        self.assertEqual(1, len(self.sessions))
+        self.assertEqual(2, self.mock_handle_admin_update.await_count)
+        self.assertEqual({event.event_id for event in self.events}, self.claimed_ids)
+
+    async def test_claims_roll_back_with_a_failed_apply(self):
+        async def handle_admin_update(book_service, event):
+            if event.event_id == self.events[1].event_id:
+                raise Exception("failed")
+
+        self.mock_handle_admin_update.side_effect = handle_admin_update
+
+        await handle_admin_updates(self.messages)
+
+        batch, first, second = self.sessions
+        batch.rollback.assert_awaited_once()
+        batch.commit.assert_not_called()
+        first.commit.assert_awaited_once()
+        second.rollback.assert_awaited_once()
+        # The event rolled back with the batch was claimed again and applied on
+        # its own, and the one that failed on its own is left unclaimed to retry
+        self.assertEqual({self.events[0].event_id}, self.claimed_ids)
+        self.mock_key_retries.retry_later.assert_awaited_once()
+        self.assertEqual(
+            self.messages["tp"][1], self.mock_key_retries.retry_later.await_args.args[0]
+        )
@@ -0,0 +1,180 @@
+import asyncio
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Hashable, Iterable, List, Tuple
+
+import asyncpg
+from sqlalchemy import event, func, make_url, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models.book_model import BookModel
+from models.cache_status_model import CacheStatusModel
+from utils.constants import (
+    BOOK_CHANGES_CHANNEL,
+    LISTENER_RECONNECT_SECS,
+    MAX_NOTIFIED_IDS,
+)
+from utils.environment import CATALOG_CACHE_SIZE, DATABASE_URL
+from utils.logger_utility import getlogger
+
+logger = getlogger(__name__)
+
+# Session.info key of the book ids a session changed, evicted again once it ends
+EVICTED_BOOK_IDS = "evicted_book_ids"
+
+
+class BookCache:
+    """
+    A bounded in-memory cache of catalog reads that evicts the least recently
+    used entry when full. Single books are cached by id and pages of books by
+    query, together with the range of ids the page covers, so a change to a
+    book only evicts that book and the pages it could appear in.
+
+    Every eviction bumps the generation. Reads fill the cache with the
+    generation taken before their query and are skipped if anything was
+    evicted since, as the query may have read the rows from before the change.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self.page_ranges: dict[Hashable, Tuple[int, int | None]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        # Sessions run in the threadpool commit, and so evict, from other threads
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return True, self.entries[key]
+
+    def set_book(self, id: int, book: BookModel | None, generation: int) -> None:
+        self.set(("book", id), book, generation)
+
+    def set_page(
+        self,
+        key: Hashable,
+        books: List[BookModel],
+        limit: int,
+        after_id: int,
+        generation: int,
+    ) -> None:
+        # A full page ends at its last book, the last page covers every id after it
+        last_id = books[-1].id if len(books) == limit else None
+        self.set(key, books, generation, (after_id, last_id))
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        generation: int,
+        page_range: Tuple[int, int | None] | None = None,
+    ) -> None:
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if page_range is not None:
+                self.page_ranges[key] = page_range
+            while len(self.entries) > self.max_size:
+                oldest, _ = self.entries.popitem(last=False)
+                self.page_ranges.pop(oldest, None)
+
+    def evict_books(self, ids: Iterable[int]) -> None:
+        ids = sorted(set(ids))
+        if not ids:
+            return
+        with self.lock:
+            self.generation += 1
+            for id in ids:
+                self.entries.pop(("book", id), None)
+            for key, (after_id, last_id) in list(self.page_ranges.items()):
+                # First changed id after the start of the page
+                index = bisect_right(ids, after_id)
+                if index < len(ids) and (last_id is None or ids[index] <= last_id):
+                    self.entries.pop(key, None)
+                    del self.page_ranges[key]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+            self.page_ranges.clear()
+
+    def get_status(self) -> CacheStatusModel:
+        with self.lock:
+            return CacheStatusModel(
+                size=len(self.entries),
+                max_size=self.max_size,
+                hits=self.hits,
+                misses=self.misses,
+                time=datetime.now(),
+            )
+
+
+book_cache = BookCache(CATALOG_CACHE_SIZE)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def evict_changed_books(session: Session) -> None:
+    # Before a commit other sessions may have cached the old rows again, and
+    # before a rollback this session may have cached rows it never committed
+    book_cache.evict_books(session.info.pop(EVICTED_BOOK_IDS, ()))
+
+
+async def notify_changed_books(session: AsyncSession, ids: List[int]) -> None:
+    """
+    Tells every process listening on BOOK_CHANGES_CHANNEL which books changed.
+    Postgres only delivers the notifications once the session commits, and
+    drops them if it rolls back.
+    """
+    ids = sorted(set(ids))
+    # Notification payloads are limited to 8000 bytes
+    for start in range(0, len(ids), MAX_NOTIFIED_IDS):
+        payload = ",".join(str(id) for id in ids[start : start + MAX_NOTIFIED_IDS])
+        await session.execute(select(func.pg_notify(BOOK_CHANGES_CHANNEL, payload)))
+
+
+def evict_notified_books(
+    connection: asyncpg.Connection, pid: int, channel: str, payload: str
+) -> None:
+    book_cache.evict_books(int(id) for id in payload.split(","))
+
+
+async def listen_for_book_changes() -> None:
+    """
+    Evicts the books other processes change from this process's cache, until
+    cancelled. Listens on a connection of its own for either database engine,
+    reconnecting if it is lost. Notifications sent while not listening are
+    lost, so the cache is cleared whenever listening starts.
+    """
+    url = make_url(DATABASE_URL).set(drivername="postgresql")
+    while True:
+        try:
+            connection = await asyncpg.connect(url.render_as_string(hide_password=False))
+            try:
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(BOOK_CHANGES_CHANNEL, evict_notified_books)
+                book_cache.clear()
+                logger.info("Listening for book changes from other processes")
+                await closed.wait()
+                logger.error("Lost the connection listening for book changes")
+            finally:
+                await connection.close()
+        except Exception as e:
+            logger.error(f"Failed to listen for book changes due to: {e}")
+        await asyncio.sleep(LISTENER_RECONNECT_SECS)
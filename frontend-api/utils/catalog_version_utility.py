@@ -0,0 +1,214 @@
+import asyncio
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, Set
+
+import asyncpg
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import Connection, Engine, Select, event, func, make_url, select
+from sqlalchemy.engine import ExecutionContext
+from sqlalchemy.orm import Session
+
+from database.schema.book_schema import BookSchema
+from database.schema.catalog_version_schema import catalog_version_sequence
+from database.schema.database import unit_of_work
+from utils.constants import CATALOG_VERSION_CHANNEL, LISTENER_RECONNECT_SECS
+from utils.environment import DATABASE_URL
+from utils.logger_utility import getlogger
+
+logger = getlogger(__name__)
+
+# Writes to these tables change what the book routes return
+CATALOG_TABLES = {BookSchema.__tablename__}
+
+# Connection.info key of a transaction that changed the catalog, and Session.info
+# key of the version it committed
+CATALOG_CHANGED = "catalog_changed"
+COMMITTED_CATALOG_VERSION = "committed_catalog_version"
+
+
+class CatalogVersion:
+    """
+    The version of the catalog as it is now, the same in every process.
+    Every transaction that changes the catalog draws a version from a sequence
+    and notifies it, and as Postgres delivers notifications in the order their
+    transactions committed, the last version delivered is the current one, so
+    the book routes can tell whether a client's copy is current without a
+    query. Versions this process committed itself are pending until they are
+    delivered too, and nothing is current until then.
+    """
+
+    def __init__(self) -> None:
+        self.version: int | None = None
+        self.modified_at: datetime | None = None
+        self.listening = False
+        self.pending: Set[int] = set()
+        # Sessions run in the threadpool commit, and so update, from other threads
+        self.lock = threading.Lock()
+
+    def start_listening(self) -> None:
+        with self.lock:
+            self.listening = True
+            # Versions committed before listening started are never delivered
+            self.pending.clear()
+
+    def delivered(self, version: int, modified_at: datetime) -> None:
+        with self.lock:
+            self.version = version
+            self.modified_at = modified_at
+            self.pending.discard(version)
+
+    def committing(self, version: int) -> None:
+        with self.lock:
+            # Without a listener it would never be delivered
+            if self.listening:
+                self.pending.add(version)
+
+    def rolled_back(self, version: int) -> None:
+        with self.lock:
+            self.pending.discard(version)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.version = None
+            self.modified_at = None
+            self.listening = False
+            self.pending.clear()
+
+    def get_headers(self) -> dict:
+        with self.lock:
+            if self.version is None or self.pending:
+                return {}
+            return {
+                "ETag": f'W/"{self.version}"',
+                "Last-Modified": format_datetime(
+                    self.modified_at.astimezone(timezone.utc), usegmt=True
+                ),
+            }
+
+
+catalog_version = CatalogVersion()
+
+
+def check_catalog_version(request: Request, response: Response) -> None:
+    """
+    Adds the ETag and Last-Modified of the current catalog version to the
+    response, and answers 304 straight away when the client sends it back.
+    Runs before the route touches the database.
+    """
+    headers = catalog_version.get_headers()
+    if not headers:
+        return
+
+    if_none_match = request.headers.get("If-None-Match", "")
+    client_tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    # Not "*", which would answer 304 even for a book that doesn't exist
+    if headers["ETag"].removeprefix("W/") in client_tags:
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def track_catalog_changes(
+    connection: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: ExecutionContext,
+    executemany: bool,
+) -> None:
+    # Statements that change no rows, like most runs of the due returns, keep the version
+    if (
+        (context.isinsert or context.isupdate or context.isdelete)
+        and cursor.rowcount
+        and context.compiled.statement.table.name in CATALOG_TABLES
+    ):
+        connection.info[CATALOG_CHANGED] = True
+
+
+@event.listens_for(Engine, "rollback")
+def discard_catalog_changes(connection: Connection) -> None:
+    connection.info.pop(CATALOG_CHANGED, None)
+
+
+def next_catalog_version() -> Select:
+    return select(
+        catalog_version_sequence.next_value().label("version"),
+        func.clock_timestamp().label("modified_at"),
+    )
+
+
+def notify_catalog_version(version: int, modified_at: datetime) -> Select:
+    return select(
+        func.pg_notify(CATALOG_VERSION_CHANNEL, f"{version} {modified_at.isoformat()}")
+    )
+
+
+@event.listens_for(Session, "before_commit")
+def bump_catalog_version(session: Session) -> None:
+    if not session.in_transaction() or not session.connection().info.pop(
+        CATALOG_CHANGED, False
+    ):
+        return
+    # Drawn from a sequence so concurrent commits don't wait on each other
+    row = session.execute(next_catalog_version()).one()
+    session.execute(notify_catalog_version(row.version, row.modified_at))
+    # Pending before the commit, as the notification can be delivered before it returns
+    catalog_version.committing(row.version)
+    session.info[COMMITTED_CATALOG_VERSION] = row.version
+
+
+@event.listens_for(Session, "after_commit")
+def apply_committed_catalog_version(session: Session) -> None:
+    session.info.pop(COMMITTED_CATALOG_VERSION, None)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_committed_catalog_version(session: Session) -> None:
+    version = session.info.pop(COMMITTED_CATALOG_VERSION, None)
+    if version is not None:
+        catalog_version.rolled_back(version)
+
+
+def apply_notified_catalog_version(
+    connection: asyncpg.Connection, pid: int, channel: str, payload: str
+) -> None:
+    version, modified_at = payload.split(" ", 1)
+    catalog_version.delivered(int(version), datetime.fromisoformat(modified_at))
+
+
+async def listen_for_catalog_versions() -> None:
+    """
+    Keeps this process's catalog version current with the versions every
+    process commits, until cancelled. Listens on a connection of its own,
+    reconnecting if it is lost. Whenever listening starts it notifies a new
+    version itself, so there is a current one even if the catalog doesn't
+    change.
+    """
+    url = make_url(DATABASE_URL).set(drivername="postgresql")
+    while True:
+        try:
+            connection = await asyncpg.connect(url.render_as_string(hide_password=False))
+            try:
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(
+                    CATALOG_VERSION_CHANNEL, apply_notified_catalog_version
+                )
+                catalog_version.start_listening()
+                async with unit_of_work() as session:
+                    row = (await session.execute(next_catalog_version())).one()
+                    await session.execute(
+                        notify_catalog_version(row.version, row.modified_at)
+                    )
+                logger.info(f"Listening for catalog versions from version {row.version}")
+                await closed.wait()
+                logger.error("Lost the connection listening for catalog versions")
+            finally:
+                # Don't answer 304 from a version that may be outdated
+                catalog_version.reset()
+                await connection.close()
+        except Exception as e:
+            logger.error(f"Failed to listen for catalog versions due to: {e}")
+        await asyncio.sleep(LISTENER_RECONNECT_SECS)
@@ -1,11 +1,25 @@
-from typing import Type, Any, Callable, TypeVar
+from typing import AsyncIterator, Type, Any, Callable, TypeVar
 from fastapi import Request, Depends as FastApiDepends
+from sqlalchemy.ext.asyncio import AsyncSession
 import functools
 
+from database.schema.database import unit_of_work
+
 T = TypeVar('T')
 
+
+async def get_db_session() -> AsyncIterator[AsyncSession]:
+    async with unit_of_work() as session:
+        yield session
+
+
 def ResolveDependency(_type: Type[T]) -> Any:
-    def resolver(t: Type[T], request: Request) -> Callable[[], T]:
-        return request.app.state.ioc_container.resolve(t)
+    def resolver(
+        t: Type[T],
+        request: Request,
+        db: AsyncSession = FastApiDepends(get_db_session),
+    ) -> Callable[[], T]:
+        # Every dependency resolved within a request shares the request's session
+        return request.app.state.ioc_container.resolve(t, db=db)
 
-    return FastApiDepends(functools.partial(resolver, _type))
\ No newline at end of file
+    return FastApiDepends(functools.partial(resolver, _type))
@@ -4,6 +4,12 @@ from dotenv import load_dotenv
 load_dotenv()
 
 DATABASE_URL = os.environ["DATABASE_URL"]
+DATABASE_ASYNC_ENGINE: bool = (
+    os.environ.get("DATABASE_ASYNC_ENGINE", "TRUE").upper() in ["TRUE", "1", "YES"]
+)
+SYNC_ENABLED: bool = (
+    os.environ.get("SYNC_ENABLED", "TRUE").upper() in ["TRUE", "1", "YES"]
+)
 APP_ENVIRONMENT: str = os.environ.get("APP_ENVIRONMENT", "PRODUCTION")
 KAFKA_BOOTSTRAP_SERVERS: str = os.environ["KAFKA_BOOTSTRAP_SERVERS"]
 KAFKA_BORROW_BOOK_TOPIC: str = os.environ["KAFKA_BORROW_BOOK_TOPIC"]
@@ -12,4 +18,16 @@ KAFKA_REMOVE_BOOK_TOPIC: str = os.environ["KAFKA_REMOVE_BOOK_TOPIC"]
 KAFKA_ADD_BOOK_TOPIC: str = os.environ["KAFKA_ADD_BOOK_TOPIC"]
 KAFKA_CREATE_USER_TOPIC: str = os.environ["KAFKA_CREATE_USER_TOPIC"]
 KAFKA_UPDATE_USER_TOPIC: str = os.environ["KAFKA_UPDATE_USER_TOPIC"]
-POLL_ADMIN_INTERVAL_SECS: int = int(os.environ["POLL_ADMIN_INTERVAL_SECS"])
+KAFKA_CONSUMER_MAX_BATCH_SIZE: int = int(os.environ.get("KAFKA_CONSUMER_MAX_BATCH_SIZE", "500"))
+KAFKA_CONSUMER_MAX_WAIT_MS: int = int(os.environ.get("KAFKA_CONSUMER_MAX_WAIT_MS", "500"))
+KAFKA_CONSUMER_MAX_CONCURRENCY: int = int(os.environ.get("KAFKA_CONSUMER_MAX_CONCURRENCY", "4"))
+KAFKA_CONSUMER_LATENCY_BUDGET_MS: int = int(os.environ.get("KAFKA_CONSUMER_LATENCY_BUDGET_MS", "2000"))
+KAFKA_RETRY_ATTEMPTS: int = int(os.environ.get("KAFKA_RETRY_ATTEMPTS", "3"))
+KAFKA_RETRY_BACKOFF_MS: int = int(os.environ.get("KAFKA_RETRY_BACKOFF_MS", "1000"))
+KAFKA_CONSUMER_GROUP_ID: str = os.environ.get("KAFKA_CONSUMER_GROUP_ID", "library-frontend-api")
+KAFKA_PRODUCER_COMPRESSION_TYPE: str = os.environ.get("KAFKA_PRODUCER_COMPRESSION_TYPE", "gzip")
+KAFKA_PRODUCER_LINGER_MS: int = int(os.environ.get("KAFKA_PRODUCER_LINGER_MS", "10"))
+OUTBOX_RELAY_BATCH_SIZE: int = int(os.environ.get("OUTBOX_RELAY_BATCH_SIZE", "500"))
+OUTBOX_RELAY_INTERVAL_MS: int = int(os.environ.get("OUTBOX_RELAY_INTERVAL_MS", "200"))
+CATALOG_CACHE_SIZE: int = int(os.environ.get("CATALOG_CACHE_SIZE", "10000"))
+PROCESSED_EVENT_TTL_HOURS: int = int(os.environ.get("PROCESSED_EVENT_TTL_HOURS", "168"))
@@ -0,0 +1,107 @@
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Dict, Set
+from aiokafka import AIOKafkaConsumer, TopicPartition
+
+from models.consumer_status_model import ConsumerStatusModel
+from utils.environment import (
+    KAFKA_CONSUMER_LATENCY_BUDGET_MS,
+    KAFKA_CONSUMER_MAX_BATCH_SIZE,
+)
+from utils.logger_utility import getlogger
+
+logger = getlogger(__name__)
+
+
+class ConsumerFlowControl:
+    """
+    Keeps the consumers from fetching faster than the database can apply what
+    they fetch. A consumer applies each fetch before fetching again, so how
+    long that takes is what is limited. Once a fetch takes longer than
+    KAFKA_CONSUMER_LATENCY_BUDGET_MS to apply, the partitions of every
+    consumer stay paused for as long again, leaving the database and the event
+    loop to API requests. After that each consumer fetches no more messages
+    than it last applied within the budget.
+    """
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        # Latency of the last fetch each consumer applied, and its size
+        self.apply_latency_ms: Dict[AIOKafkaConsumer, float] = {}
+        self.apply_count: Dict[AIOKafkaConsumer, int] = {}
+        self.resume_at = 0.0
+        self.paused_partitions: Dict[AIOKafkaConsumer, Set[TopicPartition]] = {}
+
+    def is_over_budget(self) -> bool:
+        return time.monotonic() < self.resume_at
+
+    def max_records(self, consumer: AIOKafkaConsumer) -> int:
+        latency_ms = self.apply_latency_ms.get(consumer, 0.0)
+        if latency_ms <= KAFKA_CONSUMER_LATENCY_BUDGET_MS:
+            return KAFKA_CONSUMER_MAX_BATCH_SIZE
+        within_budget = int(
+            self.apply_count[consumer] * KAFKA_CONSUMER_LATENCY_BUDGET_MS / latency_ms
+        )
+        return max(min(within_budget, KAFKA_CONSUMER_MAX_BATCH_SIZE), 1)
+
+    def update(self, consumer: AIOKafkaConsumer) -> None:
+        """
+        Pauses or resumes the partitions of a consumer, to be called before every
+        fetch. Only partitions paused here are resumed, so partitions paused for
+        any other reason stay paused.
+        """
+        if self.is_over_budget():
+            partitions = consumer.assignment() - consumer.paused()
+            if partitions:
+                consumer.pause(*partitions)
+                self.paused_partitions.setdefault(consumer, set()).update(partitions)
+                logger.warning(
+                    f"Paused {len(partitions)} partitions for {self.resume_at - time.monotonic():.1f}s after a fetch took over {KAFKA_CONSUMER_LATENCY_BUDGET_MS}ms to apply"
+                )
+        elif consumer in self.paused_partitions:
+            # Partitions may have been given to another consumer while paused
+            partitions = self.paused_partitions.pop(consumer) & consumer.assignment()
+            consumer.resume(*partitions)
+            logger.info(f"Resumed {len(partitions)} partitions")
+
+    def resume(self, consumer: AIOKafkaConsumer, *partitions: TopicPartition) -> None:
+        """
+        Resumes partitions paused for any other reason. While the consumers are
+        held back they stay paused instead, and are resumed along with the
+        partitions paused here.
+        """
+        if self.is_over_budget():
+            self.paused_partitions.setdefault(consumer, set()).update(partitions)
+        else:
+            consumer.resume(*partitions)
+
+    @asynccontextmanager
+    async def applying(self, consumer: AIOKafkaConsumer, count: int):
+        self.in_flight += count
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.in_flight -= count
+            latency_ms = (time.monotonic() - started) * 1000
+            self.apply_latency_ms[consumer] = latency_ms
+            self.apply_count[consumer] = count
+            if latency_ms > KAFKA_CONSUMER_LATENCY_BUDGET_MS:
+                self.resume_at = max(self.resume_at, time.monotonic() + latency_ms / 1000)
+
+    def get_status(self) -> ConsumerStatusModel:
+        paused_partitions = sum(
+            len(partitions) for partitions in self.paused_partitions.values()
+        )
+        return ConsumerStatusModel(
+            status="PAUSED" if paused_partitions else "RUNNING",
+            in_flight=self.in_flight,
+            apply_latency_ms=round(max(self.apply_latency_ms.values(), default=0.0), 1),
+            paused_partitions=paused_partitions,
+            time=datetime.now(),
+        )
+
+
+# Shared by the main and retry consumers, so either one's latency pauses both
+consumer_flow_control = ConsumerFlowControl()
@@ -1,134 +1,243 @@
-from contextlib import asynccontextmanager
-from aiokafka import AIOKafkaConsumer
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+import asyncio
+from contextlib import asynccontextmanager, nullcontext, suppress
+from typing import List, Tuple
+from aiokafka import AIOKafkaConsumer, ConsumerRecord
 
 from fastapi import FastAPI, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from models.admin_event_model import AdminEventModel
 from models.book_model import BookModel
 from service.impl.book_service import BookService
 from service.meta.book_service_meta import BookServiceMeta
-from database.repository.impl.book_repository import BookRepository
+from database.repository.impl.cached_book_repository import CachedBookRepository
+from database.repository.impl.outbox_repository import OutboxRepository
 from utils.environment import (
-    KAFKA_ADD_BOOK_TOPIC,
-    KAFKA_REMOVE_BOOK_TOPIC,
-    KAFKA_RETURN_BOOK_TOPIC,
-    POLL_ADMIN_INTERVAL_SECS,
+    KAFKA_CONSUMER_MAX_WAIT_MS,
+    SYNC_ENABLED,
 )
-from database.schema.database import SessionLocal
-from utils.kafka_utility import kafka_consumer, kafka_producer, kafka_deseriaizer
+from database.schema.database import dispose_engines, unit_of_work
+from utils.constants import (
+    BOOK_ADDED_EVENT,
+    BOOK_REMOVED_EVENT,
+    BOOK_RETURNED_EVENT,
+    KAFKA_CONSUMER_ERROR_BACKOFF_SECS,
+    PROCESSED_EVENT_CLEANUP_INTERVAL_SECS,
+)
+from utils.kafka_utility import (
+    handle_concurrently,
+    kafka_consumer,
+    kafka_deseriaizer,
+    kafka_producer,
+    kafka_retry_consumer,
+    rewind_consumer,
+)
+from utils.cache_utility import listen_for_book_changes
+from utils.catalog_version_utility import listen_for_catalog_versions
+from utils.flow_control_utility import consumer_flow_control
 from utils.logger_utility import getlogger
+from utils.outbox_utility import relay_outbox_events
+from utils.processed_event_utility import (
+    claim_events,
+    remove_expired_processed_events,
+)
+from utils.retry_utility import KeyRetries, consume_retries, dead_letter
 
 logger = getlogger(__name__)
 
 
 @asynccontextmanager
 async def lifecycle_manager(app: FastAPI):
-    # Start Kafka Producer and Consumer
     await kafka_producer.start()
+
+    # Evict the books other processes change from the catalog cache, and keep
+    # the catalog version the book routes answer conditional requests with
+    listener_tasks = (
+        asyncio.create_task(listen_for_book_changes()),
+        asyncio.create_task(listen_for_catalog_versions()),
+    )
+
+    # With sync disabled it runs in a separate worker process, see worker.py
+    async with sync_manager() if SYNC_ENABLED else nullcontext():
+        yield
+
+    for task in listener_tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await kafka_producer.stop()
+    await dispose_engines()
+
+
+@asynccontextmanager
+async def sync_manager():
+    """
+    Runs everything that keeps the frontend in sync with the admin, the
+    consumers, the outbox relay and the cleanup of processed events, until
+    exit. The producer must already be started.
+    """
     await kafka_consumer.start()
+    await kafka_retry_consumer.start()
 
-    book_service = get_book_service()
+    # Listen for book updates from the admin continuously
+    consumer_task = asyncio.create_task(consume_admin_updates())
 
-    # Create Async Background Scheduler
-    scheduler = AsyncIOScheduler()
+    # Retry failed book updates once their backoff has passed
+    retry_task = asyncio.create_task(consume_retries(handle_admin_updates))
 
-    # Listen for book updates from the admin at intervals
-    logger.info(f"Will check for admin updates every {POLL_ADMIN_INTERVAL_SECS} seconds")
-    scheduler.add_job(
-        func=check_admin_updates, trigger="interval", seconds=POLL_ADMIN_INTERVAL_SECS
-    )
+    # Publish committed outbox events to the admin
+    relay_task = asyncio.create_task(relay_outbox_events())
 
-    # Start Scheduler
-    scheduler.start()
+    # Forget processed events once they can no longer be redelivered
+    cleanup_task = asyncio.create_task(expire_processed_events())
 
     yield
 
-    # Shutdown all background activities before application shutdown
-    scheduler.shutdown()
-    await kafka_producer.stop()
+    # Shutdown all background activities before exiting
+    for task in (consumer_task, retry_task, relay_task, cleanup_task):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
     await kafka_consumer.stop()
+    await kafka_retry_consumer.stop()
 
 
-def get_book_service():
+def get_book_service(session: AsyncSession) -> BookServiceMeta:
     return BookService(
-        book_repository=BookRepository(db=SessionLocal()),
-        kafka_producer=kafka_producer,
+        # Evicts the cached books each update changes
+        book_repository=CachedBookRepository(db=session),
+        outbox_repository=OutboxRepository(db=session),
     )
 
 
-def handle_add_book_message(
-    message_value: list,
-    book_service: BookServiceMeta = get_book_service(),
+async def handle_add_book_message(
+    book_service: BookServiceMeta, books: List[BookModel]
 ) -> None:
-    for book_message in message_value:
-        try:
-            book = BookModel.model_validate(book_message)
-            book_service.add(book)
-            logger.info(f"Added book with title {book.title}")
-        except Exception as e:
-            logger.error(f"Failed to add book {book_message} due to: {e}")
-            book_service.rollback()
-    book_service.close()
+    added_books = await book_service.add_all(books)
+    logger.info(f"Added {len(added_books)} of {len(books)} books")
 
 
-def handle_return_book_message(
-    message_value: list,
-    book_service: BookServiceMeta = get_book_service(),
+async def handle_return_book_message(
+    book_service: BookServiceMeta, titles: List[str]
 ) -> None:
-    for book_title in message_value:
-        try:
-            book = book_service.get_by_title(book_title)
-            book_service.return_book(book.id)
-            logger.info(f"Returned book with title {book_title}")
-        except Exception as e:
-            logger.error(f"Failed to return book {book_title} due to: {e}")
-            book_service.rollback()
-    book_service.close()
+    returned_books = await book_service.return_books(titles)
+    logger.info(f"Returned {len(returned_books)} of {len(titles)} books")
 
 
-def handle_delete_book_message(
-    message_value: list,
-    book_service: BookServiceMeta = get_book_service(),
+async def handle_delete_book_message(
+    book_service: BookServiceMeta, titles: List[str]
 ) -> None:
-    for book_title in message_value:
-        try:
-            book = book_service.get_by_title(book_title)
-            book_service.remove_book(book.id)
-            logger.info(f"Deleted book {book_title}")
-        except Exception as e:
-            logger.error(f"Failed to delete book {book_title} due to: {e}")
-            book_service.rollback()
-    book_service.close()
+    deleted_books = await book_service.remove_books(titles)
+    logger.info(f"Deleted {len(deleted_books)} of {len(titles)} books")
 
 
-async def check_admin_updates(
-    consumer: AIOKafkaConsumer = kafka_consumer,
-):
-    logger.info("Checking for updated book information")
+async def handle_admin_update(
+    book_service: BookServiceMeta, event: AdminEventModel
+) -> None:
+    if event.type == BOOK_RETURNED_EVENT:
+        await handle_return_book_message(book_service, event.payload)
+
+    elif event.type == BOOK_REMOVED_EVENT:
+        await handle_delete_book_message(book_service, event.payload)
+
+    elif event.type == BOOK_ADDED_EVENT:
+        await handle_add_book_message(book_service, event.payload)
+
+    else:
+        logger.info("No relevant updated information found")
+
+
+async def decode_admin_updates(
+    messages: dict,
+) -> List[Tuple[ConsumerRecord, AdminEventModel]]:
+    """
+    Pairs every message with its decoded event. Messages that cannot be decoded
+    are dead-lettered straight away as retrying won't change them.
+    """
+    updates = []
+    for batch in messages.values():
+        for message in batch:
+            try:
+                updates.append((message, kafka_deseriaizer(message.value)))
+            except Exception as e:
+                logger.error(f"Invalid book update on {message.topic} due to: {e}")
+                await dead_letter(message, e)
+    return updates
+
+
+async def handle_admin_updates(messages: dict) -> None:
+    """
+    Applies a whole fetched batch in one transaction, one set-based statement per
+    message, skipping events that were processed before. If the batch fails it is
+    replayed one message per transaction so a single bad message doesn't hold
+    back the rest, and messages that fail on their own are sent to be retried
+    later, along with every later message with the same key so the key stays
+    in order.
+    """
+    updates = await decode_admin_updates(messages)
+    events = [event for _, event in updates]
     try:
-        messages = await consumer.getmany(timeout_ms=10000)
-
-        if not messages:
-            logger.info("No book updates found")
-            return
+        async with unit_of_work() as session:
+            book_service = get_book_service(session)
+            for event in await claim_events(session, events):
+                await handle_admin_update(book_service, event)
+        return
+    except Exception as e:
+        logger.error(f"Failed to apply {len(events)} book updates together due to: {e}")
 
-        logger.info(f"Found messages: {messages}")
+    key_retries = KeyRetries()
+    for message, event in updates:
+        if key_retries.has_failed(message):
+            await key_retries.retry_behind(message)
+            continue
 
-        for tp, message_list in messages.items():
-            for message in message_list:
-                if message.topic == KAFKA_RETURN_BOOK_TOPIC:
-                    handle_return_book_message(message.value)
+        try:
+            async with unit_of_work() as session:
+                for new_event in await claim_events(session, [event]):
+                    await handle_admin_update(get_book_service(session), new_event)
+        except Exception as e:
+            logger.error(
+                f"Failed to apply {event.type} event {event.event_id} due to: {e}"
+            )
+            await key_retries.retry_later(message, e)
 
-                elif message.topic == KAFKA_REMOVE_BOOK_TOPIC:
-                    handle_delete_book_message(message.value)
 
-                elif message.topic == KAFKA_ADD_BOOK_TOPIC:
-                    handle_add_book_message(message.value)
+async def consume_admin_updates(
+    consumer: AIOKafkaConsumer = kafka_consumer,
+) -> None:
+    """
+    Fetches and handles book updates from the admin until cancelled. Each fetch
+    returns as soon as any messages are available, waiting at most
+    KAFKA_CONSUMER_MAX_WAIT_MS and returning at most KAFKA_CONSUMER_MAX_BATCH_SIZE
+    messages.
+    """
+    logger.info("Listening for book updates from the admin")
+    while True:
+        messages = {}
+        try:
+            consumer_flow_control.update(consumer)
+            messages = await consumer.getmany(
+                timeout_ms=KAFKA_CONSUMER_MAX_WAIT_MS,
+                max_records=consumer_flow_control.max_records(consumer),
+            )
+            if not messages:
+                continue
+
+            count = sum(len(batch) for batch in messages.values())
+            logger.info(f"Found {count} book updates")
+            async with consumer_flow_control.applying(consumer, count):
+                # Each partition is applied in a transaction of its own
+                await handle_concurrently(messages, handle_admin_updates)
+
+            # Offsets are only committed once the updates are in the database
+            await consumer.commit()
+        except Exception as e:
+            logger.error(f"Failed to process book updates due to: {e}")
+            rewind_consumer(consumer, messages)
+            await asyncio.sleep(KAFKA_CONSUMER_ERROR_BACKOFF_SECS)
 
-                else:
-                    logger.info("No relevant updated information found")
 
-    except Exception as e:
-        logger.error(f"Failed to listen for book updates due to: {e}")
-    finally:
-        logger.info("Done Checking for book updates")
+async def expire_processed_events() -> None:
+    while True:
+        await remove_expired_processed_events()
+        await asyncio.sleep(PROCESSED_EVENT_CLEANUP_INTERVAL_SECS)
@@ -0,0 +1,27 @@
+import base64
+import binascii
+from typing import List
+
+from models.page_model import PageModel
+from utils.custom_exceptions import BadRequestException
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode()
+
+
+def decode_cursor(cursor: str | None) -> int:
+    """Returns the id to continue after, 0 (before every serial id) when no cursor is given."""
+    if cursor is None:
+        return 0
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise BadRequestException("Invalid cursor supplied")
+
+
+def build_page(items: List, limit: int) -> PageModel:
+    """Builds a page from a repository result fetched with limit + 1 rows ordered by id."""
+    if len(items) > limit:
+        return PageModel(items=items[:limit], next_cursor=encode_cursor(items[limit - 1].id))
+    return PageModel(items=items)
@@ -0,0 +1,201 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Tuple
+from aiokafka import AIOKafkaConsumer, AIOKafkaProducer, ConsumerRecord, TopicPartition
+
+from utils.constants import (
+    ERROR_HEADER,
+    KAFKA_CONSUMER_ERROR_BACKOFF_SECS,
+    ORIGINAL_TOPIC_HEADER,
+    RETRY_AT_HEADER,
+    RETRY_ATTEMPT_HEADER,
+)
+from utils.environment import (
+    KAFKA_CONSUMER_MAX_WAIT_MS,
+    KAFKA_RETRY_ATTEMPTS,
+    KAFKA_RETRY_BACKOFF_MS,
+)
+from utils.kafka_utility import (
+    dead_letter_topic,
+    handle_concurrently,
+    kafka_producer,
+    kafka_retry_consumer,
+    retry_topic,
+    rewind_consumer,
+)
+from utils.flow_control_utility import consumer_flow_control
+from utils.logger_utility import getlogger
+
+logger = getlogger(__name__)
+
+
+def get_header(message: ConsumerRecord, name: str) -> str | None:
+    for key, value in message.headers or ():
+        if key == name:
+            return value.decode()
+    return None
+
+
+def get_original_topic(message: ConsumerRecord) -> str:
+    return get_header(message, ORIGINAL_TOPIC_HEADER) or message.topic
+
+
+def get_attempts(message: ConsumerRecord) -> int:
+    return int(get_header(message, RETRY_ATTEMPT_HEADER) or 0)
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+async def dead_letter(
+    message: ConsumerRecord,
+    error: Exception,
+    producer: AIOKafkaProducer = kafka_producer,
+) -> None:
+    """
+    Sends a message that cannot be applied to the dead-letter topic of the topic
+    it was first published on, where it stays until it is replayed.
+    """
+    topic = get_original_topic(message)
+    attempts = get_attempts(message)
+    await producer.send_and_wait(
+        dead_letter_topic(topic),
+        message.value,
+        key=message.key,
+        headers=[
+            (ORIGINAL_TOPIC_HEADER, topic.encode()),
+            (RETRY_ATTEMPT_HEADER, str(attempts).encode()),
+            (ERROR_HEADER, str(error).encode()),
+        ],
+    )
+    logger.error(f"Dead-lettered update on {topic} after {attempts} retries")
+
+
+async def retry_later(
+    message: ConsumerRecord,
+    error: Exception,
+    producer: AIOKafkaProducer = kafka_producer,
+    attempt: int | None = None,
+) -> int:
+    """
+    Sends a message that failed to apply to the retry topic for its next
+    attempt, to be handled again once a delay of KAFKA_RETRY_BACKOFF_MS,
+    doubled on every attempt, has passed. After KAFKA_RETRY_ATTEMPTS it is
+    dead-lettered instead. Returns the attempt it was sent for, which can be
+    passed for later messages with the same key to send them to the same topic
+    behind it.
+    """
+    if attempt is None:
+        attempt = get_attempts(message) + 1
+    if attempt > KAFKA_RETRY_ATTEMPTS:
+        await dead_letter(message, error, producer)
+        return attempt
+
+    topic = get_original_topic(message)
+    delay_ms = KAFKA_RETRY_BACKOFF_MS * 2 ** (attempt - 1)
+    await producer.send_and_wait(
+        retry_topic(topic, attempt),
+        message.value,
+        key=message.key,
+        headers=[
+            (ORIGINAL_TOPIC_HEADER, topic.encode()),
+            (RETRY_ATTEMPT_HEADER, str(attempt).encode()),
+            (RETRY_AT_HEADER, str(now_ms() + delay_ms).encode()),
+            (ERROR_HEADER, str(error).encode()),
+        ],
+    )
+    logger.info(
+        f"Retrying update on {topic} in {delay_ms}ms, attempt {attempt} of {KAFKA_RETRY_ATTEMPTS}"
+    )
+    return attempt
+
+
+class KeyRetries:
+    """
+    Keeps the updates of a fetch in order per key once one has been sent to be
+    retried. Every later update with the same key is sent to the same retry
+    topic behind it instead of being applied ahead of it.
+
+    Order is only kept within the fetch. An update for the same key in a later
+    fetch is applied straight away, possibly ahead of the retried one, so
+    handlers must not depend on the order of updates to a key beyond a fetch.
+    """
+
+    def __init__(self) -> None:
+        self.failed: Dict[bytes | None, Tuple[int, Exception]] = {}
+
+    def has_failed(self, message: ConsumerRecord) -> bool:
+        return message.key in self.failed
+
+    async def retry_later(self, message: ConsumerRecord, error: Exception) -> None:
+        attempt = await retry_later(message, error)
+        self.failed[message.key] = (attempt, error)
+
+    async def retry_behind(self, message: ConsumerRecord) -> None:
+        attempt, error = self.failed[message.key]
+        logger.info(f"Holding back update on {message.topic} behind an earlier failed one")
+        await retry_later(message, error, attempt=attempt)
+
+
+def resume_partition(consumer: AIOKafkaConsumer, tp: TopicPartition) -> None:
+    # The partition may have been given to another consumer while it was paused
+    if tp in consumer.assignment():
+        consumer_flow_control.resume(consumer, tp)
+
+
+def take_due_messages(consumer: AIOKafkaConsumer, messages: dict) -> dict:
+    """
+    Returns the messages of a fetch whose delay has passed. Each partition is
+    read up to its first message that is not due yet, which is fetched again
+    once it is, and the partition is paused until then.
+    """
+    now = now_ms()
+    due = {}
+    for tp, message_list in messages.items():
+        for index, message in enumerate(message_list):
+            retry_at = int(get_header(message, RETRY_AT_HEADER) or 0)
+            if retry_at > now:
+                consumer.seek(tp, message.offset)
+                consumer.pause(tp)
+                asyncio.get_running_loop().call_later(
+                    (retry_at - now) / 1000, resume_partition, consumer, tp
+                )
+                message_list = message_list[:index]
+                break
+        if message_list:
+            due[tp] = message_list
+    return due
+
+
+async def consume_retries(
+    handler: Callable[[dict], Awaitable[None]],
+    by_key: bool = False,
+    consumer: AIOKafkaConsumer = kafka_retry_consumer,
+) -> None:
+    """
+    Hands messages on the retry topics back to the handler once their delay has
+    passed, until cancelled. Offsets are committed like the main consumer's.
+    """
+    logger.info("Listening for updates to retry")
+    while True:
+        messages = {}
+        try:
+            consumer_flow_control.update(consumer)
+            messages = await consumer.getmany(
+                timeout_ms=KAFKA_CONSUMER_MAX_WAIT_MS,
+                max_records=consumer_flow_control.max_records(consumer),
+            )
+            messages = take_due_messages(consumer, messages)
+            if not messages:
+                continue
+
+            count = sum(len(batch) for batch in messages.values())
+            logger.info(f"Retrying {count} updates")
+            async with consumer_flow_control.applying(consumer, count):
+                await handle_concurrently(messages, handler, by_key)
+            await consumer.commit()
+        except Exception as e:
+            logger.error(f"Failed to retry updates due to: {e}")
+            rewind_consumer(consumer, messages)
+            await asyncio.sleep(KAFKA_CONSUMER_ERROR_BACKOFF_SECS)